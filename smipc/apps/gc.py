@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+
+from typing import Callable, Optional, Sequence
+
+from smipc.sm.janitor import collect_orphans
+
+
+def run_gc(
+    root: Optional[str] = None,
+    storage_paths: Sequence[str] = (),
+    dry_run=False,
+    printer: Callable[..., None] = print,
+) -> int:
+    orphans = collect_orphans(root, storage_paths, dry_run=dry_run)
+    for path in orphans:
+        printer(f"Would remove '{path}'" if dry_run else f"Removed '{path}'")
+    return len(orphans)
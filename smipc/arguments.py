@@ -22,7 +22,14 @@ Simply usage:
   {PROG} {CMD_CLIENT}
 """
 
-CMDS: Final[Sequence[str]] = CMD_SERVER, CMD_CLIENT
+CMD_GC: Final[str] = "gc"
+CMD_GC_HELP: Final[str] = "Remove the shared memory left behind by dead processes"
+CMD_GC_EPILOG = f"""
+Simply usage:
+  {PROG} {CMD_GC} --dry-run
+"""
+
+CMDS: Final[Sequence[str]] = CMD_SERVER, CMD_CLIENT, CMD_GC
 
 DEFAULT_CHANNEL: Final[str] = "0"
 LOCAL_ROOT_DIR: Final[str] = "pipe"
@@ -81,6 +88,30 @@ def add_client_parser(subparsers) -> None:
     )
 
 
+def add_gc_parser(subparsers) -> None:
+    # noinspection SpellCheckingInspection
+    parser = subparsers.add_parser(
+        name=CMD_GC,
+        help=CMD_GC_HELP,
+        formatter_class=RawDescriptionHelpFormatter,
+        epilog=CMD_GC_EPILOG,
+    )
+    assert isinstance(parser, ArgumentParser)
+    parser.add_argument(
+        "--storage",
+        metavar="dir",
+        action="append",
+        default=list(),
+        help="Another directory that holds the segments (e.g. a tmpfs mount)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        default=False,
+        help="Only print the orphaned segments, without removing them",
+    )
+
+
 def default_argument_parser() -> ArgumentParser:
     parser = ArgumentParser(
         prog=PROG,
@@ -144,6 +175,7 @@ def default_argument_parser() -> ArgumentParser:
     subparsers = parser.add_subparsers(dest="cmd")
     add_server_parser(subparsers)
     add_client_parser(subparsers)
+    add_gc_parser(subparsers)
     return parser
 
 
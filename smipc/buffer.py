@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+from typing import TYPE_CHECKING, Any, Sequence
+
+if TYPE_CHECKING:
+    from typing_extensions import Buffer
+
+    ReadableBuffer = Buffer
+    """Any object that exports the buffer protocol for reading."""
+
+    WritableBuffer = Buffer
+    """Any object that exports a writable buffer (bytearray, mmap, ndarray, ...)."""
+else:
+    ReadableBuffer = Any
+    WritableBuffer = Any
+
+ReadableBuffers = Sequence[ReadableBuffer]
+
+
+def buffer_nbytes(data: ReadableBuffer) -> int:
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    with memoryview(data) as view:
+        return view.nbytes
+
+
+def is_c_contiguous(data: ReadableBuffer) -> bool:
+    if isinstance(data, (bytes, bytearray)):
+        return True
+    with memoryview(data) as view:
+        return view.c_contiguous
+
+
+def copy_buffer(dest: WritableBuffer, data: ReadableBuffer) -> int:
+    """
+    Copy the data to the beginning of the destination, exactly once.
+
+    C-contiguous buffers are copied as raw bytes. Non-contiguous ones
+    (e.g. a sliced numpy array) are copied element by element in C order.
+    """
+
+    with memoryview(dest) as target, memoryview(data) as source:
+        nbytes = source.nbytes
+        if nbytes > target.nbytes:
+            raise ValueError(f"The destination is too small: {target.nbytes} bytes")
+
+        if source.c_contiguous:
+            try:
+                with source.cast("B") as raw:
+                    target[:nbytes] = raw
+                return nbytes
+            except (TypeError, ValueError):
+                pass  # Formats that cannot be cast, such as numpy structured types.
+
+        import numpy as np
+
+        array = np.asarray(source)
+        np.copyto(
+            np.frombuffer(target, array.dtype, array.size).reshape(array.shape), array
+        )
+        return nbytes
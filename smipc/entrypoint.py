@@ -6,8 +6,15 @@ from typing import Callable, List, Optional
 
 from smipc.aio.run import has_uvloop
 from smipc.apps.client import run_client
+from smipc.apps.gc import run_gc
 from smipc.apps.server import run_server
-from smipc.arguments import CMD_CLIENT, CMD_SERVER, CMDS, get_default_arguments
+from smipc.arguments import (
+    CMD_CLIENT,
+    CMD_GC,
+    CMD_SERVER,
+    CMDS,
+    get_default_arguments,
+)
 from smipc.cuda.compatibility import has_cupy
 
 
@@ -38,6 +45,16 @@ def main(
     debug = args.debug
     verbose = args.verbose
 
+    if args.cmd == CMD_GC:
+        assert isinstance(args.storage, list)
+        assert isinstance(args.dry_run, bool)
+        try:
+            run_gc(root_dir, args.storage, args.dry_run, printer)
+        except BaseException as e:
+            printer(e)
+            return 1
+        return 0
+
     if not os.path.isdir(root_dir):
         printer(f"The pipe directory does not exist: '{root_dir}'")
         return 1
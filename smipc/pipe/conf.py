@@ -1,9 +1,59 @@
 # -*- coding: utf-8 -*-
 
+import os
+import sys
+from functools import lru_cache
 from os import PathLike, pathconf
-from typing import Union
+from typing import Final, Union
+
+DEFAULT_IOV_MAX: Final[int] = 1024
+
+# Linux-specific fcntl commands (available as 'fcntl.F_*' since Python 3.10)
+F_SETPIPE_SZ: Final[int] = 1031
+F_GETPIPE_SZ: Final[int] = 1032
 
 
 def get_pipe_buf(path: Union[int, str, bytes, PathLike[str], PathLike[bytes]]) -> int:
     """Maximum number of bytes guaranteed to be atomic when written to a pipe."""
     return pathconf(path, "PC_PIPE_BUF")  # Availability: Unix.
+
+
+def has_pipe_capacity() -> bool:
+    return sys.platform.startswith("linux")
+
+
+def get_pipe_capacity(fd: int) -> int:
+    """Capacity of the pipe buffer in bytes."""
+    if not has_pipe_capacity():
+        raise NotImplementedError("The pipe capacity is only available on Linux")
+
+    from fcntl import fcntl
+
+    return fcntl(fd, F_GETPIPE_SZ)
+
+
+def set_pipe_capacity(fd: int, size: int) -> int:
+    """
+    Change the capacity of the pipe buffer and return the actual capacity.
+
+    The kernel rounds the value up to a power-of-two number of pages.
+    Unprivileged processes cannot exceed '/proc/sys/fs/pipe-max-size'.
+    """
+
+    if not has_pipe_capacity():
+        raise NotImplementedError("The pipe capacity is only available on Linux")
+    if size <= 0:
+        raise ValueError("The 'size' argument must be greater than 0")
+
+    from fcntl import fcntl
+
+    return fcntl(fd, F_SETPIPE_SZ, size)
+
+
+@lru_cache
+def get_iov_max() -> int:
+    """Maximum number of buffers that can be passed to a single 'writev' call."""
+    try:
+        return os.sysconf("SC_IOV_MAX")
+    except (AttributeError, ValueError, OSError):
+        return DEFAULT_IOV_MAX
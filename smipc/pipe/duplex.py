@@ -6,6 +6,9 @@ from pathlib import Path
 from threading import Event
 from typing import Optional, Union
 
+from smipc.buffer import ReadableBuffer, ReadableBuffers, WritableBuffer
+from smipc.pipe.inotify import has_inotify
+from smipc.pipe.opener import PipeOpener, get_default_opener, watch_pipe_writer
 from smipc.pipe.reader import PipeReader
 from smipc.pipe.wait import blocking_pipe_writer, wait_pipe_writer
 from smipc.pipe.writer import PipeWriter
@@ -28,7 +31,16 @@ class FullDuplexPipe:
         *,
         interval=0.001,
         blocking: Optional[Event] = None,
+        pipe_capacity: Optional[int] = None,
+        opener: Optional[PipeOpener] = None,
     ):
+        """
+        Open a pair of FIFOs, waiting up to ``open_timeout`` for the peer reader.
+
+        The writer end is waited for with ``opener``, or with the shared inotify
+        opener on Linux. Without inotify, it is retried every ``interval`` seconds.
+        """
+
         if not interval >= 0:
             raise ValueError("The 'interval' must be a positive float")
 
@@ -44,15 +56,29 @@ class FullDuplexPipe:
         # [WARNING] Do not change the calling order.
         reader = PipeReader(reader_path, blocking=False)
         try:
-            if blocking is not None:
+            if opener is not None:
+                writer = watch_pipe_writer(writer_path, open_timeout, blocking, opener)
+            elif blocking is not None:
                 writer = blocking_pipe_writer(writer_path, open_timeout, blocking)
+            elif has_inotify():
+                opener = get_default_opener()
+                writer = watch_pipe_writer(writer_path, open_timeout, None, opener)
             else:
+                # Fallback polling, when the inotify API is not available.
                 writer = wait_pipe_writer(writer_path, open_timeout, interval)
         except:  # noqa
             reader.close()
             raise
         # ------------------------------------------------------------
 
+        if pipe_capacity is not None:
+            try:
+                writer.pipe_capacity = pipe_capacity
+            except:  # noqa
+                writer.close()
+                reader.close()
+                raise
+
         return cls(reader=reader, writer=writer)
 
     @property
@@ -76,5 +102,18 @@ class FullDuplexPipe:
     def read(self, n=-1) -> bytes:
         return self._reader.read(n)
 
-    def write(self, data: bytes) -> int:
+    def readinto(self, buffer: WritableBuffer) -> int:
+        return self._reader.readinto(buffer)
+
+    def write(self, data: ReadableBuffer) -> int:
         return self._writer.write(data)
+
+    def writev(self, buffers: ReadableBuffers) -> int:
+        return self._writer.writev(buffers)
+
+    def writev_all(
+        self,
+        buffers: ReadableBuffers,
+        timeout: Optional[float] = None,
+    ) -> int:
+        return self._writer.writev_all(buffers, timeout)
@@ -4,7 +4,7 @@ import os
 from os import PathLike
 from typing import Union
 
-from smipc.pipe.conf import get_pipe_buf
+from smipc.pipe.conf import get_pipe_buf, get_pipe_capacity, set_pipe_capacity
 
 
 class PipeFile:
@@ -25,6 +25,14 @@ class PipeFile:
     def pipe_buf(self) -> int:
         return get_pipe_buf(self._fd)
 
+    @property
+    def pipe_capacity(self) -> int:
+        return get_pipe_capacity(self._fd)
+
+    @pipe_capacity.setter
+    def pipe_capacity(self, value: int) -> None:
+        set_pipe_capacity(self._fd, value)
+
     @property
     def blocking(self) -> bool:
         return os.get_blocking(self._fd)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+from ctypes import CDLL, get_errno
+from ctypes.util import find_library
+from functools import lru_cache
+from os import PathLike
+from struct import Struct
+from typing import Final, List, NamedTuple, Optional, Union
+
+# https://man7.org/linux/man-pages/man7/inotify.7.html
+IN_OPEN: Final[int] = 0x00000020
+IN_MOVED_TO: Final[int] = 0x00000080
+IN_CREATE: Final[int] = 0x00000100
+IN_Q_OVERFLOW: Final[int] = 0x00004000
+IN_IGNORED: Final[int] = 0x00008000
+
+IN_CLOEXEC: Final[int] = 0o2000000
+IN_NONBLOCK: Final[int] = 0o0004000
+
+# noinspection SpellCheckingInspection
+INOTIFY_EVENT_FORMAT: Final[str] = "@iIII"
+# |...............................| ^    | i = 4 byte int = wd
+# |...............................|  ^   | I = 4 byte unsigned int = mask
+# |...............................|   ^  | I = 4 byte unsigned int = cookie
+# |...............................|    ^ | I = 4 byte unsigned int = len(name)
+
+INOTIFY_READ_SIZE: Final[int] = 64 * 1024
+
+
+class InotifyEvent(NamedTuple):
+    wd: int
+    mask: int
+    cookie: int
+    name: str
+
+
+@lru_cache
+def _libc() -> Optional[CDLL]:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = CDLL(find_library("c"), use_errno=True)
+        getattr(libc, "inotify_init1")
+    except (OSError, AttributeError):
+        return None
+    else:
+        return libc
+
+
+def has_inotify() -> bool:
+    return _libc() is not None
+
+
+def _raise_errno(path: Optional[Union[str, bytes]] = None) -> None:
+    errno = get_errno()
+    raise OSError(errno, os.strerror(errno), path)
+
+
+class Inotify:
+    def __init__(self):
+        libc = _libc()
+        if libc is None:
+            raise NotImplementedError("The inotify API is only available on Linux")
+
+        self._libc = libc
+        self._event = Struct(INOTIFY_EVENT_FORMAT)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            _raise_errno()
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add_watch(self, path: Union[str, PathLike[str]], mask: int) -> int:
+        encoded_path = os.fsencode(path)
+        wd = self._libc.inotify_add_watch(self._fd, encoded_path, mask)
+        if wd < 0:
+            _raise_errno(encoded_path)
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        if self._libc.inotify_rm_watch(self._fd, wd) < 0:
+            _raise_errno()
+
+    def read(self) -> List[InotifyEvent]:
+        """Read all the queued events without blocking."""
+        try:
+            data = os.read(self._fd, INOTIFY_READ_SIZE)
+        except BlockingIOError:
+            return list()
+
+        result = list()
+        offset = 0
+        while offset + self._event.size <= len(data):
+            wd, mask, cookie, name_size = self._event.unpack_from(data, offset)
+            offset += self._event.size
+            name = data[offset : offset + name_size].rstrip(b"\0")
+            offset += name_size
+            result.append(InotifyEvent(wd, mask, cookie, os.fsdecode(name)))
+        return result
@@ -0,0 +1,399 @@
+# -*- coding: utf-8 -*-
+
+import os
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from errno import ENOENT, ENXIO
+from functools import lru_cache
+from os import PathLike
+from selectors import EVENT_READ, DefaultSelector
+from threading import Event, Lock, Thread
+from time import monotonic
+from typing import Any, Callable, Dict, Final, List, Optional, Set, Union
+
+from smipc.pipe.inotify import (
+    IN_CREATE,
+    IN_MOVED_TO,
+    IN_OPEN,
+    IN_Q_OVERFLOW,
+    Inotify,
+    has_inotify,
+)
+from smipc.pipe.writer import PipeWriter
+
+DEFAULT_POLLING_INTERVAL: Final[float] = 0.001
+"""Retry interval of the fallback, when the inotify API is not available."""
+
+DEFAULT_INTERRUPT_INTERVAL: Final[float] = 0.1
+"""How often a waiting caller checks its interrupt event."""
+
+_WATCH_MASK: Final[int] = IN_CREATE | IN_MOVED_TO | IN_OPEN
+
+_Path = Union[str, PathLike[str]]
+
+
+def _nearest_directory(directory: str) -> str:
+    """The directory itself if it exists, otherwise its nearest existing ancestor."""
+    while not os.path.isdir(directory):
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+    return directory
+
+
+def _try_exists(path: _Path) -> Optional[bool]:
+    return True if os.path.exists(path) else None
+
+
+def _try_pipe_writer(path: _Path) -> Optional[PipeWriter]:
+    try:
+        return PipeWriter(path, blocking=False)
+    except OSError as e:
+        if e.errno in (ENXIO, ENOENT):
+            # ENXIO: No reader has opened the FIFO yet.
+            # ENOENT: The FIFO has not been created yet.
+            return None
+        raise
+
+
+class _Request:
+    __slots__ = ("directory", "name", "attempt", "future", "deadline", "wd", "watched")
+
+    def __init__(
+        self,
+        path: _Path,
+        attempt: Callable[[_Path], Any],
+        future: Future,
+        deadline: Optional[float],
+    ):
+        self.directory, self.name = os.path.split(os.path.abspath(path))
+        self.attempt = attempt
+        self.future = future
+        self.deadline = deadline
+        self.wd: Optional[int] = None
+        self.watched: Optional[str] = None
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, self.name)
+
+    def try_complete(self) -> bool:
+        if self.future.done():
+            return True  # Cancelled by the caller.
+
+        try:
+            result = self.attempt(self.path)
+        except BaseException as e:
+            self.set_exception(e)
+            return True
+
+        if result is None:
+            return False
+
+        if not self.future.set_running_or_notify_cancel():
+            if isinstance(result, PipeWriter):
+                result.close()
+            return True
+
+        self.future.set_result(result)
+        return True
+
+    def set_exception(self, error: BaseException) -> None:
+        if self.future.set_running_or_notify_cancel():
+            self.future.set_exception(error)
+
+
+class PipeOpener:
+    """
+    A single thread that waits for many pending FIFO operations at once.
+
+    On Linux, the parent directories of the pending paths are watched with
+    inotify, so a request is retried only when a file in the directory is created
+    or opened (a reader opening the FIFO is what unblocks a non-blocking writer).
+    If the parent directory does not exist yet, its nearest existing ancestor is
+    watched instead, until the directory appears.
+    Otherwise, all the pending requests are retried at every polling interval.
+    """
+
+    _requests: List[_Request]
+    _incoming: List[_Request]
+    _watches: Dict[int, int]
+    _thread: Optional[Thread]
+
+    def __init__(self, polling_interval=DEFAULT_POLLING_INTERVAL, *, inotify=True):
+        if not polling_interval > 0:
+            raise ValueError("The 'polling_interval' must be a positive float")
+
+        self._polling_interval = polling_interval
+        self._inotify = Inotify() if inotify and has_inotify() else None
+        self._lock = Lock()
+        self._requests = list()
+        self._incoming = list()
+        self._watches = dict()
+        self._closed = False
+        self._thread = None
+
+        self._wakeup_reader, self._wakeup_writer = os.pipe()
+        os.set_blocking(self._wakeup_reader, False)
+        os.set_blocking(self._wakeup_writer, False)
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._inotify is not None
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._requests) + len(self._incoming)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+
+        self._wakeup()
+        if thread is not None:
+            thread.join()
+
+        for request in self._requests + self._incoming:
+            request.set_exception(InterruptedError())
+        self._requests.clear()
+        self._incoming.clear()
+
+        if self._inotify is not None:
+            self._inotify.close()
+        os.close(self._wakeup_reader)
+        os.close(self._wakeup_writer)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _wakeup(self) -> None:
+        try:
+            os.write(self._wakeup_writer, b"\0")
+        except BlockingIOError:
+            pass  # A wake-up is already pending.
+
+    def _submit(
+        self,
+        path: _Path,
+        attempt: Callable[[_Path], Any],
+        timeout: Optional[float] = None,
+    ) -> Future:
+        future: Future = Future()
+        deadline = None if timeout is None else monotonic() + timeout
+        request = _Request(path, attempt, future, deadline)
+
+        # Fast path without involving the thread.
+        if request.try_complete():
+            return future
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The opener is already closed")
+            self._incoming.append(request)
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name="PipeOpener", daemon=True)
+                self._thread.start()
+
+        self._wakeup()
+        return future
+
+    def wait_exists(self, path: _Path, timeout: Optional[float] = None) -> Future:
+        return self._submit(path, _try_exists, timeout)
+
+    def open_writer(self, path: _Path, timeout: Optional[float] = None) -> Future:
+        return self._submit(path, _try_pipe_writer, timeout)
+
+    def _add_watch(self, request: _Request) -> None:
+        assert self._inotify is not None
+        while True:
+            directory = _nearest_directory(request.directory)
+            try:
+                wd = self._inotify.add_watch(directory, _WATCH_MASK)
+            except OSError as e:
+                if e.errno == ENOENT:
+                    continue  # Removed in the meantime.
+                request.set_exception(e)
+                return
+
+            request.wd = wd
+            request.watched = directory
+            self._watches[wd] = self._watches.get(wd, 0) + 1
+
+            # A deeper directory may have been created before the watch was added.
+            if directory == _nearest_directory(request.directory):
+                return
+            self._remove_watch(request)
+
+    def _remove_watch(self, request: _Request) -> None:
+        if self._inotify is None or request.wd is None:
+            return
+
+        count = self._watches[request.wd] - 1
+        if count >= 1:
+            self._watches[request.wd] = count
+            request.wd = None
+            return
+
+        del self._watches[request.wd]
+        try:
+            self._inotify.rm_watch(request.wd)
+        except OSError:
+            pass  # The directory may have been removed.
+        finally:
+            request.wd = None
+
+    def _accept_incoming(self) -> List[_Request]:
+        with self._lock:
+            incoming = self._incoming
+            self._incoming = list()
+
+        if self._inotify is not None:
+            for request in incoming:
+                self._add_watch(request)
+        return incoming
+
+    def _read_changes(self) -> Optional[Dict[int, Set[str]]]:
+        if self._inotify is None:
+            return None  # Polling: everything may have changed.
+
+        changes: Dict[int, Set[str]] = dict()
+        for event in self._inotify.read():
+            if event.mask & IN_Q_OVERFLOW:
+                return None  # Some events were dropped.
+            changes.setdefault(event.wd, set()).add(event.name)
+        return changes
+
+    def _next_timeout(self) -> Optional[float]:
+        deadlines = [r.deadline for r in self._requests if r.deadline is not None]
+        timeout = max(0.0, min(deadlines) - monotonic()) if deadlines else None
+        if self._inotify is None and self._requests:
+            if timeout is None or timeout > self._polling_interval:
+                timeout = self._polling_interval
+        return timeout
+
+    def _is_pending(self, request: _Request, retry: bool, now: float) -> bool:
+        if (retry and request.try_complete()) or request.future.done():
+            self._remove_watch(request)
+            return False
+
+        if request.deadline is not None and request.deadline <= now:
+            request.set_exception(TimeoutError())
+            self._remove_watch(request)
+            return False
+
+        return True
+
+    def _update(
+        self,
+        changes: Optional[Dict[int, Set[str]]],
+        incoming: List[_Request],
+    ) -> None:
+        now = monotonic()
+        remaining = list()
+
+        for request in self._requests:
+            if changes is None:
+                retry = True
+            elif request.wd is None:
+                retry = False
+            elif request.watched != request.directory:
+                # Watching an ancestor: move the watch down as directories appear.
+                retry = request.wd in changes
+                if retry:
+                    self._remove_watch(request)
+                    self._add_watch(request)
+            else:
+                retry = request.name in changes.get(request.wd, ())
+            if self._is_pending(request, retry, now):
+                remaining.append(request)
+
+        # The new requests are retried once they are being watched,
+        # so that no event can be missed.
+        for request in incoming:
+            if self._is_pending(request, True, now):
+                remaining.append(request)
+
+        self._requests = remaining
+
+    def _drain_wakeup(self) -> None:
+        try:
+            while os.read(self._wakeup_reader, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _run(self) -> None:
+        selector = DefaultSelector()
+        selector.register(self._wakeup_reader, EVENT_READ)
+        if self._inotify is not None:
+            selector.register(self._inotify, EVENT_READ)
+
+        try:
+            while not self._closed:
+                selector.select(self._next_timeout())
+                self._drain_wakeup()
+                changes = self._read_changes()
+                self._update(changes, self._accept_incoming())
+        finally:
+            selector.close()
+
+
+@lru_cache
+def get_default_opener() -> PipeOpener:
+    return PipeOpener()
+
+
+def _wait_future(
+    future: Future,
+    event: Optional[Event] = None,
+    interval=DEFAULT_INTERRUPT_INTERVAL,
+):
+    if event is None:
+        return future.result()
+
+    while not event.is_set():
+        try:
+            return future.result(timeout=interval)
+        except FutureTimeoutError:
+            continue
+
+    if not future.cancel():
+        # The request has just been completed.
+        try:
+            result = future.result()
+        except BaseException:  # noqa
+            pass
+        else:
+            if isinstance(result, PipeWriter):
+                result.close()
+    raise InterruptedError
+
+
+def watch_exists(
+    path: _Path,
+    timeout: Optional[float] = None,
+    event: Optional[Event] = None,
+    opener: Optional[PipeOpener] = None,
+) -> None:
+    """Event-driven version of :func:`smipc.pipe.wait.wait_exists`."""
+    opener = opener if opener is not None else get_default_opener()
+    _wait_future(opener.wait_exists(path, timeout), event)
+
+
+def watch_pipe_writer(
+    path: _Path,
+    timeout: Optional[float] = None,
+    event: Optional[Event] = None,
+    opener: Optional[PipeOpener] = None,
+) -> PipeWriter:
+    """Event-driven version of :func:`smipc.pipe.wait.wait_pipe_writer`."""
+    opener = opener if opener is not None else get_default_opener()
+    return _wait_future(opener.open_writer(path, timeout), event)
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+import select
+from typing import Optional
+
+from smipc.pipe.file import PipeFile
+
+
+def _wait_event(file: PipeFile, readable: bool, timeout: Optional[float]) -> bool:
+    if hasattr(select, "poll"):
+        # 'poll' has no FD_SETSIZE limit, unlike 'select'.
+        poller = select.poll()
+        poller.register(file.fileno(), select.POLLIN if readable else select.POLLOUT)
+        milliseconds = None if timeout is None else max(0, int(timeout * 1000))
+        return bool(poller.poll(milliseconds))
+    elif readable:
+        return bool(select.select([file], [], [], timeout)[0])
+    else:
+        return bool(select.select([], [file], [], timeout)[1])
+
+
+def wait_readable(file: PipeFile, timeout: Optional[float] = None) -> bool:
+    return _wait_event(file, True, timeout)
+
+
+def wait_writable(file: PipeFile, timeout: Optional[float] = None) -> bool:
+    return _wait_event(file, False, timeout)
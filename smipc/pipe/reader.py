@@ -4,6 +4,7 @@ import os
 from os import PathLike
 from typing import Union
 
+from smipc.buffer import WritableBuffer
 from smipc.pipe.file import PipeFile
 from smipc.pipe.flags import get_reader_flags
 
@@ -19,3 +20,7 @@ class PipeReader(PipeFile):
 
     def read(self, n: int) -> bytes:
         return os.read(self._fd, n)
+
+    def readinto(self, buffer: WritableBuffer) -> int:
+        """Read directly into a caller-supplied writable buffer."""
+        return os.readv(self._fd, (buffer,))
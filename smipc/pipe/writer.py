@@ -2,10 +2,14 @@
 
 import os
 from os import PathLike
-from typing import Union
+from threading import Lock
+from typing import List, Optional, Union
 
+from smipc.buffer import ReadableBuffer, ReadableBuffers
+from smipc.pipe.conf import get_iov_max
 from smipc.pipe.file import PipeFile
 from smipc.pipe.flags import get_writer_flags
+from smipc.pipe.poll import wait_writable
 
 
 class PipeWriter(PipeFile):
@@ -16,6 +20,53 @@ class PipeWriter(PipeFile):
         blocking=False,
     ):
         super().__init__(path, get_writer_flags(blocking=blocking))
+        self._lock = Lock()
 
-    def write(self, data: bytes) -> int:
-        return os.write(self._fd, data)
+    def write(self, data: ReadableBuffer) -> int:
+        with self._lock:
+            return os.write(self._fd, data)
+
+    def writev(self, buffers: ReadableBuffers) -> int:
+        """Gather the buffers and write them with a single system call."""
+        with self._lock:
+            return os.writev(self._fd, buffers)
+
+    def writev_all(
+        self,
+        buffers: ReadableBuffers,
+        timeout: Optional[float] = None,
+    ) -> int:
+        """
+        Write all the buffers, resuming after partial writes.
+
+        Writes larger than 'PIPE_BUF' are not atomic, but since each FIFO has
+        exactly one writer, the remaining bytes can be written safely afterward.
+        In non-blocking mode, :class:`BlockingIOError` is raised if nothing could be
+        written, otherwise it waits up to ``timeout`` seconds for the pipe to become
+        writable again and raises :class:`TimeoutError` when it does not.
+        """
+
+        views: List[memoryview] = [memoryview(b).cast("B") for b in buffers]
+        iov_max = get_iov_max()
+        index = 0
+        written = 0
+
+        with self._lock:
+            while index < len(views):
+                try:
+                    size = os.writev(self._fd, views[index : index + iov_max])
+                except BlockingIOError:
+                    if written == 0:
+                        raise
+                    if not wait_writable(self, timeout):
+                        raise TimeoutError(f"Only {written} bytes could be written")
+                    continue
+
+                written += size
+                while index < len(views) and size >= views[index].nbytes:
+                    size -= views[index].nbytes
+                    index += 1
+                if size > 0:
+                    views[index] = views[index][size:]
+
+        return written
@@ -1,62 +1,55 @@
 # -*- coding: utf-8 -*-
 
-from abc import ABC, abstractmethod
-from typing import NamedTuple, Optional, Tuple
-
+from abc import ABC
+from collections import deque
+from queue import Full
+from time import monotonic
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from smipc.buffer import (
+    ReadableBuffer,
+    WritableBuffer,
+    buffer_nbytes,
+    is_c_contiguous,
+)
 from smipc.decorators.override import override
 from smipc.pipe.duplex import FullDuplexPipe
-from smipc.pipe.writer import PipeWriter
-from smipc.protocols.header import Header, HeaderPacket, Opcode
+from smipc.pipe.poll import wait_readable
+from smipc.protocols.batch import batch_nbytes
+from smipc.protocols.decoder import Frame
+from smipc.protocols.header import PIPE_FRAGMENT_SIZE, HeaderPacket, Hello, Opcode
+from smipc.protocols.interface import ProtocolInterface, WrittenInfo
+from smipc.protocols.lease import Lease
+from smipc.protocols.mixins.arena import ArenaMixin
+from smipc.protocols.mixins.coalescing import CoalescingMixin
+from smipc.protocols.mixins.framing import calc_max_direct_size
+from smipc.protocols.mixins.handshake import HandshakeMixin
+from smipc.protocols.mixins.ring import RingMixin
+from smipc.protocols.mixins.scatter import ScatterMixin
+from smipc.protocols.mixins.slots import SlotsMixin
+from smipc.protocols.options import ProtocolOptions
+from smipc.protocols.reservation import Reservation
 from smipc.sm.written import SmWritten
-from smipc.variables import DEFAULT_ENCODING, DEFAULT_PIPE_BUF
-
-
-def calc_writer_size(writer: PipeWriter, header: Header) -> int:
-    try:
-        return writer.pipe_buf - header.size
-    except:  # noqa
-        return DEFAULT_PIPE_BUF - header.size
-
-
-class WrittenInfo(NamedTuple):
-    pipe_byte: int
-    sm_byte: int
-    sm_name: Optional[bytes]
-
-
-class ProtocolInterface(ABC):
-    @abstractmethod
-    def close(self) -> None:
-        raise NotImplementedError
-
-    @abstractmethod
-    def send(self, data: bytes) -> WrittenInfo:
-        raise NotImplementedError
-
-    @abstractmethod
-    def recv(self) -> Optional[bytes]:
-        raise NotImplementedError
+from smipc.variables import DEFAULT_ENCODING
+
+
+class BaseProtocol(
+    ProtocolInterface,
+    RingMixin,
+    ArenaMixin,
+    SlotsMixin,
+    ScatterMixin,
+    CoalescingMixin,
+    HandshakeMixin,
+    ABC,
+):
+    """
+    Messages over a pair of FIFOs, written in the pipe or in shared memory.
+
+    The transport modes live in the mixins of :mod:`smipc.protocols.mixins`;
+    this class chooses between them and dispatches the incoming frames.
+    """
 
-
-class SmInterface(ABC):
-    @abstractmethod
-    def close_sm(self) -> None:
-        raise NotImplementedError
-
-    @abstractmethod
-    def write_sm(self, data: bytes) -> SmWritten:
-        raise NotImplementedError
-
-    @abstractmethod
-    def read_sm(self, name: bytes, size: int) -> bytes:
-        raise NotImplementedError
-
-    @abstractmethod
-    def restore_sm(self, name: bytes) -> None:
-        raise NotImplementedError
-
-
-class BaseProtocol(ProtocolInterface, SmInterface, ABC):
     def __init__(
         self,
         pipe: FullDuplexPipe,
@@ -64,102 +57,542 @@ class BaseProtocol(ProtocolInterface, SmInterface, ABC):
         *,
         force_sm_over_pipe=False,
         disable_restore_sm=False,
+        options: Optional[ProtocolOptions] = None,
+        segment_tag="",
     ):
         self._pipe = pipe
         self._encoding = encoding
-        self._header = Header()
+        self._options = options if options is not None else ProtocolOptions()
         self._force_sm_over_pipe = force_sm_over_pipe
         self._disable_restore_sm = disable_restore_sm
-        self._writer_size = calc_writer_size(self._pipe.writer, self._header)
+        self._fragments = bytearray()
+        self._pending = deque()
+
+        self._init_framing(self._options)
+        self._init_handshake(self._options)
+        self._init_coalescing(self._options)
+        self._init_ring(self._options, segment_tag)
+        self._init_arena()
+        self._init_slots()
+        self._pipe_direct_threshold = self._calc_pipe_direct_threshold()
+
+        if self._options.handshake:
+            self.send_hello()
+
+    @override
+    def _calc_pipe_direct_threshold(self) -> int:
+        if self._options.pipe_direct_threshold is not None:
+            threshold = self._options.pipe_direct_threshold
+        elif self._ring_writer is not None:
+            # Everything that fits in a ring record is written in place.
+            threshold = self.ring_direct_size
+        else:
+            # By default, only the atomic writes go through the pipe.
+            threshold = self._writer_size
+
+        if self._ring_writer is None:
+            # A larger message could never be written while the reader is busy.
+            max_direct_size = calc_max_direct_size(self._pipe.writer, self._header)
+            if max_direct_size is not None:
+                threshold = min(threshold, max_direct_size)
+        return threshold
 
     @property
     def pipe(self):
         return self._pipe
 
-    @property
-    def header_size(self):
-        return self._header.size
-
     @property
     def encoding(self):
         return self._encoding
 
+    @property
+    def options(self) -> ProtocolOptions:
+        return self._options
+
+    @property
+    def pipe_direct_threshold(self) -> int:
+        return self._pipe_direct_threshold
+
     @override
     def close(self) -> None:
+        self._close_coalescers()
         self._pipe.close()
         self.close_sm()
+        self.close_ring()
+
+    def send_pipe_direct(self, data: ReadableBuffer) -> WrittenInfo:
+        if not is_c_contiguous(data):
+            data = memoryview(data).tobytes()  # The pipe writes raw bytes only.
 
-    def send_empty(self) -> WrittenInfo:
-        pipe_byte = self._pipe.write(self._header.encode_empty())
+        size = buffer_nbytes(data)
+        if self._ring_writer is not None and size > self.ring_direct_size:
+            return self._send_ring_overflow(data)
+        if size > self._header.max_pipe_data_size:
+            return self.send_pipe_fragments(data)
+
+        header = self._header.encode(Opcode.PIPE_DIRECT, size)
+        atomic = size <= self._writer_size
+        pipe_byte = self.write_frames(((header, data),), atomic)
         return WrittenInfo(pipe_byte, 0, None)
 
-    def send_pipe_direct(self, data: bytes) -> WrittenInfo:
-        header = self._header.encode(Opcode.PIPE_DIRECT, len(data))
-        assert len(header) == self._header.size
-        pipe_byte = self._pipe.write(header + data)
+    def send_pipe_fragments(self, data: ReadableBuffer) -> WrittenInfo:
+        if self._ring_writer is not None:
+            return self._send_ring_overflow(data)
+
+        payload = memoryview(data).cast("B")
+        total = payload.nbytes
+        step = PIPE_FRAGMENT_SIZE
+
+        frames: List[Tuple[bytes, ReadableBuffer]] = list()
+        for begin in range(0, total, step):
+            fragment = payload[begin : begin + step]
+            header = self._header.encode(Opcode.PIPE_FRAGMENT, fragment.nbytes, total)
+            frames.append((header, fragment))
+        pipe_byte = self.write_frames(frames, atomic=False)
         return WrittenInfo(pipe_byte, 0, None)
 
-    def send_sm_over_pipe(self, data: bytes) -> WrittenInfo:
-        written = self.write_sm(data)
+    @override
+    def send_sm_written(self, written: SmWritten) -> WrittenInfo:
+        if self._use_slot(written.slot):
+            return self.send_sm_slot(written)
+
         name = written.encode_name(encoding=self._encoding)
-        header = self._header.encode(Opcode.SM_OVER_PIPE, len(name), len(data))
-        assert len(header) == self._header.size
-        pipe_byte = self._pipe.write(header + name)
+        header = self._header.encode(Opcode.SM_OVER_PIPE, len(name), written.size)
+        try:
+            pipe_byte = self.write_frames(((header, name),))
+        except BaseException:
+            self.restore_sm(name)
+            raise
         return WrittenInfo(pipe_byte, written.size, name)
 
-    def send_sm_restore(self, sm_name: bytes) -> WrittenInfo:
+    def send_sm_over_pipe(self, data: ReadableBuffer) -> WrittenInfo:
+        written = self.write_sm(data)
+        assert written.size == buffer_nbytes(data)
+        return self.send_sm_written(written)
+
+    @override
+    def _abort_reserved(self, written: SmWritten) -> None:
+        self.restore_sm(written.encode_name(encoding=self._encoding))
+
+    def reserve(self, nbytes: int) -> Reservation:
+        """
+        Reserve a shared memory region for the caller to write the next message in.
+
+        Committing the reservation sends it with ``SM_OVER_PIPE``, without copying.
+        """
+
+        written, view = self.reserve_sm(nbytes)
+        return Reservation(written, view, self.send_sm_written, self._abort_reserved)
+
+    @override
+    def send_sm_restore(
+        self,
+        sm_name: bytes,
+        timeout: Optional[float] = 0.0,
+    ) -> WrittenInfo:
         header = self._header.encode(Opcode.SM_RESTORE, len(sm_name))
-        assert len(header) == self._header.size
-        pipe_byte = self._pipe.write(header + sm_name)
+        pipe_byte = self.write_frames(((header, sm_name),), timeout=timeout)
         return WrittenInfo(pipe_byte, 0, None)
 
     @override
-    def send(self, data: bytes) -> WrittenInfo:
-        if not self._force_sm_over_pipe and len(data) <= self._writer_size:
+    def send(self, data: ReadableBuffer, timeout: Optional[float] = 0.0) -> WrittenInfo:
+        """
+        Send any buffer, copying it exactly once into the pipe or shared memory.
+
+        When the shared memory limits are reached, it waits up to ``timeout``
+        seconds (forever if ``None``) for the peer to hand segments back, and
+        raises :class:`queue.Full` if none is. The messages received meanwhile
+        are kept for the next receive calls.
+
+        With ``coalesce_bytes``, small messages are buffered instead and sent
+        as one batch, see :meth:`flush`; nothing is written yet in that case.
+        If a batch could not be written in the background, the next sends raise
+        a :class:`RuntimeError` until :meth:`flush` succeeds.
+        """
+
+        if self._coalescer is not None:
+            limit = self.coalesce_limit
+            if batch_nbytes((buffer_nbytes(data),)) <= limit:
+                self._coalescer.append(data, limit, timeout)
+                return WrittenInfo(0, 0, None)
+            self._coalescer.flush(timeout)  # Keep the order of the messages.
+        return self._send_now(data, timeout)
+
+    @override
+    def _send_now(self, data: ReadableBuffer, timeout: Optional[float]) -> WrittenInfo:
+        size = buffer_nbytes(data)
+        peer = self._peer_capabilities
+        if peer is not None and 0 < peer.max_message_size < size:
+            raise ValueError(
+                f"The peer accepts messages up to {peer.max_message_size} bytes"
+            )
+        if not self._force_sm_over_pipe and size <= self._pipe_direct_threshold:
             return self.send_pipe_direct(data)
-        else:
-            return self.send_sm_over_pipe(data)
 
-    def recv_pipe_direct(self, header: HeaderPacket) -> bytes:
+        arena_result = self.send_arena_over_pipe(data)
+        if arena_result is not None:
+            return arena_result
+
+        if size > self._options.scatter_chunk_size:
+            return self._retry_full(lambda: self.send_sm_scatter(data), timeout)
+        return self._retry_full(lambda: self.send_sm_over_pipe(data), timeout)
+
+    @override
+    def _retry_full(
+        self,
+        send_sm: Callable[[], WrittenInfo],
+        timeout: Optional[float],
+    ) -> WrittenInfo:
+        deadline = None if timeout is None else monotonic() + timeout
+        while True:
+            try:
+                return send_sm()
+            except Full:
+                remaining = None if deadline is None else deadline - monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise
+                self.poll_restore(remaining)
+
+    def send_many(
+        self,
+        messages: Iterable[ReadableBuffer],
+        timeout: Optional[float] = 0.0,
+    ) -> WrittenInfo:
+        """
+        Send several messages in one ``BATCH`` frame, preceded by a length table.
+
+        Small batches are written inline in the pipe, and larger ones in one
+        segment. If the peer announced that it cannot unpack batches, the
+        messages are sent one by one.
+        """
+
+        buffers = [b if is_c_contiguous(b) else bytes(memoryview(b)) for b in messages]
+        if self._coalescer is not None:
+            self._coalescer.flush(timeout)
+        return self._send_batch(buffers, timeout)
+
+    @override
+    def _reply_sm_restore(self, sm_name: bytes) -> None:
+        if self._disable_restore_sm:
+            return
+
+        if self._queue_restore(sm_name):
+            return
+
+        restore_result = self.send_sm_restore(sm_name)
+        assert restore_result.pipe_byte == self._header.size + len(sm_name)
+        assert restore_result.sm_byte == 0
+        assert restore_result.sm_name is None
+
+    def recv_pipe_direct(self, header: HeaderPacket, payload: bytes) -> bytes:
         assert header.pipe_data_size >= 1
         assert header.sm_data_size == 0
-        return self._pipe.read(header.pipe_data_size)
+        assert header.pipe_data_size == len(payload)
+        return payload
 
-    def recv_sm_over_pipe(self, header: HeaderPacket) -> bytes:
+    def recv_pipe_fragment(
+        self,
+        header: HeaderPacket,
+        payload: bytes,
+    ) -> Optional[bytes]:
         assert header.pipe_data_size >= 1
-        assert header.sm_data_size >= 1
-        sm_name = self._pipe.read(header.pipe_data_size)
-        result = self.read_sm(sm_name, header.sm_data_size)
+        assert header.pipe_data_size == len(payload)
+        self._fragments += payload
 
-        if not self._disable_restore_sm:
-            restore_result = self.send_sm_restore(sm_name)
-            assert restore_result.pipe_byte == self._header.size + len(sm_name)
-            assert restore_result.sm_byte == 0
-            assert restore_result.sm_name is None
+        if len(self._fragments) < header.sm_data_size:
+            return None
 
+        assert len(self._fragments) == header.sm_data_size
+        result = bytes(self._fragments)
+        self._fragments.clear()
         return result
 
-    def recv_sm_restore(self, header: HeaderPacket) -> None:
+    def recv_sm_over_pipe(self, header: HeaderPacket, sm_name: bytes) -> bytes:
+        assert header.pipe_data_size >= 1
+        assert header.sm_data_size >= 1
+        assert header.pipe_data_size == len(sm_name)
+        result = self.read_sm(sm_name, header.sm_data_size)
+        self._reply_sm_restore(sm_name)
+        return result
+
+    def recv_sm_restore(self, header: HeaderPacket, sm_name: bytes) -> None:
         assert header.pipe_data_size >= 1
         assert header.sm_data_size == 0
-        name = self._pipe.read(header.pipe_data_size)
-        self.restore_sm(name)
+        assert header.pipe_data_size == len(sm_name)
+        self.restore_sm(sm_name)
 
-    def recv_with_header(self) -> Tuple[HeaderPacket, Optional[bytes]]:
-        header_data = self._pipe.read(self._header.size)
-        header = self._header.decode(header_data)
+    @override
+    def recv_frame(self, frame: Frame) -> Optional[bytes]:
+        header, payload = frame
         if header.opcode == Opcode.EMPTY:
-            return header, None
+            if header.reserve != Hello.NONE:
+                self.recv_empty(header)
+            return None
         if header.opcode == Opcode.PIPE_DIRECT:
-            return header, self.recv_pipe_direct(header)
+            return self.recv_pipe_direct(header, payload)
+        elif header.opcode == Opcode.PIPE_FRAGMENT:
+            return self.recv_pipe_fragment(header, payload)
         elif header.opcode == Opcode.SM_OVER_PIPE:
-            return header, self.recv_sm_over_pipe(header)
+            return self.recv_sm_over_pipe(header, payload)
+        elif header.opcode == Opcode.SM_SCATTER:
+            return self.recv_sm_scatter(header, payload)
         elif header.opcode == Opcode.SM_RESTORE:
-            self.recv_sm_restore(header)
-            return header, None
+            self.recv_sm_restore(header, payload)
+            return None
+        elif header.opcode == Opcode.BATCH:
+            self.recv_batch(header, payload)
+            return None
+        elif header.opcode == Opcode.SM_RESTORE_MANY:
+            self.recv_sm_restore_many(header, payload)
+            return None
+        elif header.opcode == Opcode.SM_OPEN:
+            self.recv_sm_open(header, payload)
+            return None
+        elif header.opcode == Opcode.SM_SLOT:
+            return self.recv_sm_slot(header)
+        elif header.opcode == Opcode.SM_RESTORE_SLOT:
+            self.recv_sm_restore_slot(header)
+            return None
+        elif header.opcode == Opcode.ARENA_OPEN:
+            self.recv_arena_open(header, payload)
+            return None
+        elif header.opcode == Opcode.ARENA_OVER_PIPE:
+            return self.recv_arena_over_pipe(header, payload)
+        elif header.opcode == Opcode.ARENA_RESTORE:
+            self.recv_arena_restore(header, payload)
+            return None
+        elif header.opcode == Opcode.RING_OPEN:
+            self.recv_ring_open(header, payload)
+            return None
         else:
             raise ValueError(f"Unsupported opcode: {header.opcode}")
 
+    def _poll_frame(self, timeout: Optional[float]) -> Optional[Frame]:
+        if self._ring_reader is not None:
+            return self._poll_ring_frame(timeout)
+
+        frame = self._decoder.pop()
+        if frame is not None:
+            return frame
+        if self._decoder.pending == 0 and not wait_readable(self._pipe.reader, timeout):
+            return None
+        return self.read_frame(started=True)
+
+    @override
+    def poll_restore(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait up to ``timeout`` seconds for the next frame, and handle it.
+
+        Segments handed back by the peer are restored, and the messages are kept
+        for the next receive calls. Returns ``False`` if no frame has arrived.
+        """
+
+        frame = self._poll_frame(timeout)
+        if frame is None:
+            return False
+
+        data = self.recv_frame(frame)
+        while data is None and frame.header.opcode == Opcode.PIPE_FRAGMENT:
+            frame = self.read_frame(started=True)
+            data = self.recv_frame(frame)
+        if data is not None:
+            self._pending.append((frame.header, data))
+        return True
+
+    @property
+    def pending(self) -> int:
+        """The number of messages received while waiting to send."""
+        return len(self._pending)
+
+    def read_message_header(self) -> HeaderPacket:
+        """
+        Read the header of the next frame, handling the announcements in front of it.
+
+        An ``ARENA_OPEN``, ``RING_OPEN`` or ``SM_OPEN`` frame is always followed by
+        the message that uses the arena, the ring or the slot, so the message is
+        waited for.
+        """
+
+        header = self.read_header()
+        while header.opcode in (Opcode.ARENA_OPEN, Opcode.RING_OPEN, Opcode.SM_OPEN):
+            self.recv_frame(self.read_frame())
+            header = self.read_header(started=True)
+        return header
+
+    def _read_fragments_into(self, target: memoryview) -> None:
+        offset = len(self._fragments)
+        target[:offset] = self._fragments
+        self._fragments.clear()
+
+        while offset < target.nbytes:
+            header = self.read_header(started=True)
+            if header.opcode != Opcode.PIPE_FRAGMENT:
+                raise ValueError(f"Unexpected opcode in a fragmented message: {header}")
+            end = offset + header.pipe_data_size
+            with target[offset:end] as fragment:
+                self._read_frame_payload_into(fragment)
+            offset = end
+
+    def recv_into(self, buffer: WritableBuffer) -> Optional[int]:
+        """
+        Receive the next message directly into a caller-supplied writable buffer.
+
+        Pipe payloads are read straight into the buffer, and shared memory payloads
+        are copied out of the segment once. Returns the number of bytes received,
+        or ``None`` if the frame did not carry a message.
+        If the buffer is too small, :class:`ValueError` is raised and the message
+        is left unread.
+        """
+
+        if self._pending:
+            return self._recv_pending_into(buffer)
+
+        header = self.read_message_header()
+        if header.opcode == Opcode.PIPE_DIRECT:
+            size = header.pipe_data_size
+        elif header.opcode == Opcode.PIPE_FRAGMENT:
+            size = header.sm_data_size
+        elif header.opcode in (
+            Opcode.SM_OVER_PIPE,
+            Opcode.ARENA_OVER_PIPE,
+            Opcode.SM_SLOT,
+        ):
+            size = header.sm_data_size
+        elif header.opcode == Opcode.SM_SCATTER:
+            return self._recv_scatter_into(buffer)
+        else:
+            self.recv_frame(self.read_frame())
+            if self._pending:
+                return self._recv_pending_into(buffer)  # Unpacked from a batch.
+            return None
+
+        with memoryview(buffer) as view, view.cast("B") as target:
+            if target.nbytes < size:
+                raise ValueError(
+                    f"The buffer is too small: {target.nbytes} < {size} bytes"
+                )
+
+            if header.opcode == Opcode.PIPE_DIRECT:
+                with target[:size] as payload:
+                    self._read_frame_payload_into(payload)
+            elif header.opcode == Opcode.PIPE_FRAGMENT:
+                with target[:size] as payload:
+                    self._read_fragments_into(payload)
+            elif header.opcode == Opcode.ARENA_OVER_PIPE:
+                _, location = self.read_frame()
+                with self._lease_arena(header, location) as lease:
+                    target[:size] = lease.view
+            elif header.opcode == Opcode.SM_SLOT:
+                self.read_frame()
+                slot = header.pipe_data_size
+                self.read_sm_into(self._peer_slots[slot], size, target)
+                self._reply_sm_restore_slot(slot)
+            else:
+                _, sm_name = self.read_frame()
+                self.read_sm_into(sm_name, size, target)
+                self._reply_sm_restore(sm_name)
+
+        return size
+
+    def _recv_pending_into(self, buffer: WritableBuffer) -> int:
+        _, data = self._pending[0]
+        with memoryview(buffer) as view, view.cast("B") as target:
+            if target.nbytes < len(data):
+                raise ValueError(
+                    f"The buffer is too small: {target.nbytes} < {len(data)} bytes"
+                )
+            target[: len(data)] = data
+        self._pending.popleft()
+        return len(data)
+
+    def recv_lease(self) -> Optional[Lease]:
+        """
+        Receive the next message without copying it out of the shared memory.
+
+        The ``SM_RESTORE`` reply is delayed until the returned lease is released,
+        so the sender cannot reuse the segment while the view is alive.
+        Messages sent through the pipe are wrapped as they are.
+        Returns ``None`` if the frame did not carry a message.
+        """
+
+        if self._pending:
+            pending_header, pending_data = self._pending.popleft()
+            return Lease(pending_header, memoryview(pending_data))
+
+        header = self.read_message_header()
+        if header.opcode == Opcode.ARENA_OVER_PIPE:
+            _, location = self.read_frame()
+            return self._lease_arena(header, location)
+        elif header.opcode == Opcode.SM_SLOT:
+            self.read_frame()
+            return self._lease_slot(header)
+        elif header.opcode != Opcode.SM_OVER_PIPE:
+            header, data = self.recv_with_header()
+            return Lease(header, memoryview(data)) if data is not None else None
+
+        _, sm_name = self.read_frame()
+        assert header.pipe_data_size == len(sm_name)
+        assert header.sm_data_size >= 1
+        view, unpin = self.lease_sm(sm_name, header.sm_data_size)
+
+        def _release() -> None:
+            unpin()
+            self._reply_sm_restore(sm_name)
+
+        return Lease(header, view, _release)
+
+    def recv_with_header(self) -> Tuple[HeaderPacket, Optional[bytes]]:
+        if self._pending:
+            return self._pending.popleft()
+
+        self.read_message_header()
+        frame = self.read_frame()
+        data = self.recv_frame(frame)
+        while data is None and frame.header.opcode == Opcode.PIPE_FRAGMENT:
+            frame = self.read_frame(started=True)
+            data = self.recv_frame(frame)
+        if data is None and self._pending:
+            return self._pending.popleft()  # Unpacked from a batch.
+        return frame.header, data
+
     @override
     def recv(self) -> Optional[bytes]:
         return self.recv_with_header()[1]
+
+    def recv_many(self) -> List[bytes]:
+        """
+        Return all the messages that are ready, reading the pipe at most once.
+
+        As many bytes as fit in the decoder buffer are requested with one system
+        call, and an incomplete trailing frame is kept for the next call.
+        With a ring, all the published records are consumed instead.
+        """
+
+        result: List[bytes] = list()
+        self._take_pending(result)
+
+        if self._ring_reader is not None:
+            return self._recv_many_ring(result)
+
+        if self._decoder.remaining() >= 1:
+            try:
+                read_bytes = self._decoder.fill(self._pipe.reader)
+            except BlockingIOError:
+                pass
+            else:
+                if read_bytes == 0 and self._decoder.pending == 0:
+                    raise EOFError("The writer side of the pipe has been closed")
+
+        while True:
+            frame = self._decoder.pop()
+            if frame is None:
+                break
+            data = self.recv_frame(frame)
+            if data is not None:
+                result.append(data)
+            elif self._pending:
+                self._take_pending(result)
+
+        if self._ring_reader is not None:
+            return self._recv_many_ring(result)  # Switched by RING_OPEN.
+        return result
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+from struct import Struct
+from typing import Final, List, Sequence
+
+from smipc.buffer import ReadableBuffer
+
+# noinspection SpellCheckingInspection
+BATCH_SIZE_FORMAT: Final[str] = "@I"
+# |............................| ^ | I = 4 byte unsigned int = count or size
+
+_BATCH_SIZE: Final[Struct] = Struct(BATCH_SIZE_FORMAT)
+
+BATCH_ENTRY_SIZE: Final[int] = _BATCH_SIZE.size
+
+MAX_BATCH_MESSAGE_SIZE: Final[int] = 0xFFFFFFFF
+
+
+def encode_batch_table(sizes: Sequence[int]) -> bytes:
+    """The length table in front of the messages: the count, then each size."""
+    if any(size > MAX_BATCH_MESSAGE_SIZE for size in sizes):
+        raise ValueError(f"A batched message exceeds {MAX_BATCH_MESSAGE_SIZE} bytes")
+    return Struct(f"@{len(sizes) + 1}I").pack(len(sizes), *sizes)
+
+
+def batch_nbytes(sizes: Sequence[int]) -> int:
+    return BATCH_ENTRY_SIZE * (len(sizes) + 1) + sum(sizes)
+
+
+def decode_batch(data: ReadableBuffer) -> List[bytes]:
+    """Split a batch into its messages, copying each of them once."""
+    with memoryview(data) as view:
+        (count,) = _BATCH_SIZE.unpack_from(view, 0)
+        table = Struct(f"@{count}I")
+        sizes = table.unpack_from(view, _BATCH_SIZE.size)
+
+        result = list()
+        offset = _BATCH_SIZE.size + table.size
+        for size in sizes:
+            result.append(bytes(view[offset : offset + size]))
+            offset += size
+    return result
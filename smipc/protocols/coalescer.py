@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+
+from logging import getLogger
+from queue import Full
+from threading import Condition, Thread
+from time import monotonic
+from typing import Callable, List, Optional
+
+from smipc.buffer import ReadableBuffer
+from smipc.protocols.batch import BATCH_ENTRY_SIZE
+
+_RETRY_DELAY = 0.001
+_MAX_RETRY_DELAY = 1.0
+
+logger = getLogger(__name__)
+
+
+class Coalescer:
+    """
+    Outbound buffer that groups small messages, like the Nagle algorithm.
+
+    The messages are handed to ``send`` when the next one would not fit in the
+    byte limit, when ``max_count`` messages are buffered, ``delay`` seconds
+    after the first one was appended, or when :meth:`flush` is called.
+    The deadline is watched by a daemon thread, which is started on the first
+    append. Sends are serialized by an internal lock, so the order of the
+    messages is kept.
+
+    A failed send keeps the messages buffered. The error is raised to the caller
+    that flushed, or, when the thread flushed, the coalescer is broken: the next
+    appends raise a :class:`RuntimeError` until :meth:`flush` succeeds.
+    With ``retry``, :meth:`append` never raises instead: the errors are logged
+    and the thread retries the messages with a growing delay.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[List[bytes], Optional[float]], None],
+        delay: float,
+        name="Coalescer",
+        max_count=0,
+        retry=False,
+    ):
+        if delay < 0:
+            raise ValueError("The 'delay' must not be negative")
+        if max_count < 0:
+            raise ValueError("The 'max_count' must not be negative")
+
+        self._send = send
+        self._delay = delay
+        self._name = name
+        self._max_count = max_count
+        self._retry = retry
+        self._messages: List[bytes] = list()
+        self._nbytes = BATCH_ENTRY_SIZE
+        self._limit = 0
+        self._deadline = 0.0
+        self._failures = 0
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._cond = Condition()
+        self._thread: Optional[Thread] = None
+
+    @property
+    def delay(self) -> float:
+        return self._delay
+
+    @property
+    def max_count(self) -> int:
+        """The number of messages that triggers a flush, or ``0`` for no limit."""
+        return self._max_count
+
+    @property
+    def retry(self) -> bool:
+        return self._retry
+
+    @property
+    def nbytes(self) -> int:
+        """The size of the buffered messages as one batch, with its length table."""
+        return self._nbytes
+
+    @property
+    def failures(self) -> int:
+        """The number of flushes of the thread that failed in a row."""
+        return self._failures
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        """The error that broke the coalescer in the thread, if any."""
+        return self._error
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def append(
+        self,
+        data: ReadableBuffer,
+        limit: int,
+        timeout: Optional[float] = 0.0,
+    ) -> None:
+        """Buffer a copy of the data, flushing first if the batch would exceed limit."""
+        message = bytes(data)
+        entry = BATCH_ENTRY_SIZE + len(message)
+        with self._cond:
+            self._check_broken()
+            self._limit = limit
+            if self._messages and self._nbytes + entry > limit:
+                self._try_flush_locked(timeout)
+
+            self._messages.append(message)
+            self._nbytes += entry
+            if len(self._messages) == 1:
+                self._deadline = monotonic() + self._delay
+                self._start_locked()
+                self._cond.notify()
+            if self._nbytes >= limit or 0 < self._max_count <= len(self._messages):
+                try:
+                    self._try_flush_locked(timeout)
+                except Full:
+                    pass  # The message is buffered, the thread retries it.
+
+    def flush(self, timeout: Optional[float] = 0.0) -> int:
+        """
+        Send the buffered messages now, and return how many there were.
+
+        It also retries the messages of a broken coalescer, and repairs it if
+        they could be sent.
+        """
+        with self._cond:
+            count = self._flush_locked(timeout)
+            self._error = None
+            self._failures = 0
+            return count
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            thread, self._thread = self._thread, None
+            self._cond.notify()
+        if thread is not None:
+            thread.join()
+
+    def _check_broken(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(
+                f"The {self._name} could not send {len(self._messages)} messages"
+            ) from self._error
+
+    def _try_flush_locked(self, timeout: Optional[float]) -> None:
+        try:
+            self._flush_locked(timeout)
+        except Exception as e:
+            if not self._retry:
+                raise
+            # The messages stay buffered, the thread retries them.
+            if not isinstance(e, Full):
+                logger.warning("%s could not send", self._name, exc_info=e)
+
+    def _take_batch_locked(self) -> List[bytes]:
+        """Take the first messages that fit in the byte limit as one batch."""
+        count = 0
+        nbytes = BATCH_ENTRY_SIZE
+        for message in self._messages:
+            entry = BATCH_ENTRY_SIZE + len(message)
+            if count and nbytes + entry > self._limit:
+                break
+            if 0 < self._max_count <= count:
+                break
+            count += 1
+            nbytes += entry
+
+        batch = self._messages[:count]
+        del self._messages[:count]
+        self._nbytes -= nbytes - BATCH_ENTRY_SIZE
+        return batch
+
+    def _flush_locked(self, timeout: Optional[float]) -> int:
+        count = 0
+        while self._messages:
+            # Only the batches that could not be sent stay buffered.
+            batch = self._take_batch_locked()
+            try:
+                self._send(batch, timeout)
+            except BaseException:
+                self._messages[:0] = batch
+                self._nbytes += sum(BATCH_ENTRY_SIZE + len(m) for m in batch)
+                raise
+            count += len(batch)
+        return count
+
+    def _start_locked(self) -> None:
+        if self._thread is None and not self._closed:
+            self._thread = Thread(target=self._main, name=self._name, daemon=True)
+            self._thread.start()
+
+    def _retry_delay(self) -> float:
+        delay = max(self._delay, _RETRY_DELAY) * 2 ** min(self._failures - 1, 32)
+        return min(delay, max(self._delay, _MAX_RETRY_DELAY))
+
+    def _main(self) -> None:
+        with self._cond:
+            while not self._closed:
+                if not self._messages or self._error is not None:
+                    self._cond.wait()
+                    continue
+
+                remaining = self._deadline - monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+
+                try:
+                    self._flush_locked(0.0)
+                except Exception as e:
+                    if not self._retry and not isinstance(e, Full):
+                        self._error = e  # Kept until the owner flushes successfully.
+                        continue
+
+                    # Retry once the peer had the time to read or hand segments back.
+                    self._failures += 1
+                    delay = self._retry_delay()
+                    self._deadline = monotonic() + delay
+                    if not isinstance(e, Full):
+                        logger.warning(
+                            "%s failed, retrying in %.3f seconds",
+                            self._name,
+                            delay,
+                            exc_info=e,
+                        )
+                else:
+                    self._failures = 0
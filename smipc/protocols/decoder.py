@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+from typing import Final, FrozenSet, NamedTuple, Optional
+
+from smipc.buffer import WritableBuffer
+from smipc.pipe.reader import PipeReader
+from smipc.protocols.header import AnyHeader, HeaderPacket, Opcode
+from smipc.variables import DEFAULT_DECODER_BUFFER_SIZE
+
+_HEADER_ONLY_OPCODES: Final[FrozenSet[Opcode]] = frozenset(
+    (Opcode.EMPTY, Opcode.SM_SLOT, Opcode.SM_RESTORE_SLOT)
+)
+
+
+class Frame(NamedTuple):
+    header: HeaderPacket
+    payload: bytes
+
+
+def payload_size(header: HeaderPacket) -> int:
+    if header.opcode in _HEADER_ONLY_OPCODES:
+        return 0  # The 'pipe_data_size' field is reused by these frames.
+    return header.pipe_data_size
+
+
+class FrameDecoder:
+    """
+    Reassembles frames from a byte stream that may be split at any position.
+
+    Incoming bytes are read into a reusable buffer, so that a single ``read()``
+    system call can deliver many frames, and a partially received frame is
+    carried over to the next read.
+    """
+
+    _next: Optional[HeaderPacket]
+
+    def __init__(self, header: AnyHeader, buffer_size=DEFAULT_DECODER_BUFFER_SIZE):
+        if buffer_size < header.size:
+            raise ValueError("The 'buffer_size' must not be less than the header")
+
+        self._header = header
+        self._buffer = bytearray(buffer_size)
+        self._begin = 0
+        self._end = 0
+        self._next = None
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buffer)
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered bytes that have not been decoded yet."""
+        return self._end - self._begin
+
+    def set_header(self, header: AnyHeader) -> None:
+        """Decode the following frames with another header, between two frames."""
+        self._header = header
+        self._next = None
+
+    def clear(self) -> None:
+        self._begin = 0
+        self._end = 0
+        self._next = None
+
+    def peek(self) -> Optional[HeaderPacket]:
+        """Decode the header of the next frame without consuming it."""
+        if self._next is None and self.pending >= self._header.size:
+            self._next = self._header.decode_from(self._buffer, self._begin)
+        return self._next
+
+    def remaining(self) -> int:
+        """Number of bytes still missing to complete the next frame."""
+        header = self.peek()
+        if header is None:
+            return self._header.size - self.pending
+        frame_size = self._header.size + payload_size(header)
+        return max(0, frame_size - self.pending)
+
+    def _reserve(self, size: int) -> None:
+        if self._begin == self._end:
+            self._begin = self._end = 0
+
+        if len(self._buffer) - self._end >= size:
+            return
+
+        pending = self.pending
+        if self._begin > 0:
+            self._buffer[:pending] = self._buffer[self._begin : self._end]
+            self._begin = 0
+            self._end = pending
+
+        shortage = size - (len(self._buffer) - self._end)
+        if shortage > 0:
+            self._buffer.extend(bytes(shortage))
+
+    def feed(self, data: bytes) -> None:
+        self._reserve(len(data))
+        end = self._end + len(data)
+        self._buffer[self._end : end] = data
+        self._end = end
+
+    def fill(self, reader: PipeReader, size: Optional[int] = None) -> int:
+        """
+        Read at most ``size`` bytes from the reader with a single system call.
+
+        If ``size`` is omitted, all the free space of the buffer (and at least
+        enough to complete the next frame) is requested at once.
+        Returns the number of bytes read, where ``0`` means end-of-file.
+        """
+
+        if size is None:
+            self._reserve(max(1, self.remaining()))
+            size = len(self._buffer) - self._end
+        else:
+            self._reserve(size)
+
+        if size <= 0:
+            return 0
+
+        with memoryview(self._buffer) as view:
+            with view[self._end : self._end + size] as free:
+                read_bytes = reader.readinto(free)
+
+        self._end += read_bytes
+        return read_bytes
+
+    def skip_header(self) -> HeaderPacket:
+        """
+        Consume only the header of the next frame.
+
+        The payload must then be consumed by the caller, for example with
+        :meth:`take_into` followed by direct reads from the pipe.
+        """
+
+        header = self.peek()
+        if header is None:
+            raise BufferError("The header of the next frame is incomplete")
+        self._begin += self._header.size
+        self._next = None
+        return header
+
+    def take_into(self, buffer: WritableBuffer) -> int:
+        """Move as many buffered bytes as fit into the buffer."""
+        with memoryview(buffer) as target:
+            size = min(self.pending, target.nbytes)
+            end = self._begin + size
+            with memoryview(self._buffer) as view:
+                target[:size] = view[self._begin : end]
+        self._begin = end
+        return size
+
+    def pop(self) -> Optional[Frame]:
+        header = self.peek()
+        if header is None:
+            return None
+
+        begin = self._begin + self._header.size
+        end = begin + payload_size(header)
+        if end > self._end:
+            return None
+
+        with memoryview(self._buffer) as view:
+            payload = bytes(view[begin:end])
+        self._begin = end
+        self._next = None
+        return Frame(header, payload)
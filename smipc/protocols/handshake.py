@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+from enum import IntEnum, unique
+from typing import Dict, List, NamedTuple, Optional
+
+from smipc.protocols.header import AnyHeader, Capability, HeaderPacket, Hello
+from smipc.sm.backend import (
+    DirectoryBackend,
+    HugetlbfsBackend,
+    PosixBackend,
+    SharedMemoryBackend,
+)
+
+_MAX_MESSAGE_SIZE_BITS = 32
+
+
+@unique
+class BackendKind(IntEnum):
+    UNKNOWN = 0
+    POSIX = 1
+    DIRECTORY = 2
+    HUGETLBFS = 3
+
+
+def get_backend_kind(backend: Optional[SharedMemoryBackend]) -> BackendKind:
+    if backend is None or isinstance(backend, PosixBackend):
+        return BackendKind.POSIX
+    if isinstance(backend, HugetlbfsBackend):
+        return BackendKind.HUGETLBFS
+    if isinstance(backend, DirectoryBackend):
+        return BackendKind.DIRECTORY
+    return BackendKind.UNKNOWN
+
+
+def _to_backend_kind(value: int) -> BackendKind:
+    try:
+        return BackendKind(value)
+    except ValueError:
+        return BackendKind.UNKNOWN  # Added by a newer peer.
+
+
+class Capabilities(NamedTuple):
+    version: int
+    flags: Capability
+    pipe_capacity: int
+    """The capacity of the pipe in bytes, or ``0`` if it is unknown."""
+
+    backend: BackendKind
+    max_message_size: int
+    """The largest message in bytes, or ``0`` if there is no limit."""
+
+    def supports(self, flag: Capability) -> bool:
+        return flag in self.flags
+
+
+def encode_hello(header: AnyHeader, capabilities: Capabilities) -> List[bytes]:
+    """
+    Encode the capabilities as ``EMPTY`` frames, without any payload.
+
+    Peers that do not know the handshake read them as plain signals.
+    """
+
+    max_message_size = capabilities.max_message_size
+    return [
+        header.encode_hello(Hello.PIPE_CAPACITY, 0, capabilities.pipe_capacity),
+        header.encode_hello(Hello.BACKEND, 0, int(capabilities.backend)),
+        header.encode_hello(
+            Hello.MAX_MESSAGE_SIZE,
+            max_message_size >> _MAX_MESSAGE_SIZE_BITS,
+            max_message_size & 0xFFFFFFFF,
+        ),
+        header.encode_hello(
+            Hello.VERSION, int(capabilities.flags), capabilities.version
+        ),
+    ]
+
+
+class HelloDecoder:
+    """Collect the fields of the handshake, until the final ``VERSION`` frame."""
+
+    def __init__(self):
+        self._fields: Dict[Hello, HeaderPacket] = dict()
+
+    def feed(self, packet: HeaderPacket) -> Optional[Capabilities]:
+        hello = Hello(packet.reserve)
+        self._fields[hello] = packet
+        if hello != Hello.VERSION:
+            return None
+
+        fields, self._fields = self._fields, dict()
+        capacity = fields.get(Hello.PIPE_CAPACITY)
+        backend = fields.get(Hello.BACKEND)
+        max_size = fields.get(Hello.MAX_MESSAGE_SIZE)
+        return Capabilities(
+            version=packet.sm_data_size,
+            flags=Capability(packet.pipe_data_size),
+            pipe_capacity=capacity.sm_data_size if capacity else 0,
+            backend=_to_backend_kind(backend.sm_data_size if backend else 0),
+            max_message_size=(
+                (max_size.pipe_data_size << _MAX_MESSAGE_SIZE_BITS)
+                | max_size.sm_data_size
+                if max_size
+                else 0
+            ),
+        )
@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
 
-from enum import IntEnum, unique
+from enum import IntEnum, IntFlag, unique
 from struct import Struct, calcsize, pack
-from typing import Final, NamedTuple
+from typing import Final, NamedTuple, Tuple, Union
+
+from smipc.buffer import ReadableBuffer
 
 
 @unique
@@ -19,12 +21,80 @@ class Opcode(IntEnum):
     SM_RESTORE = 3
     """Returns the Shared Memory ownership."""
 
+    PIPE_FRAGMENT = 4
+    """A part of a message that is too large for a single PIPE_DIRECT frame."""
+
+    ARENA_OPEN = 5
+    """Announce the name of an arena before its first use."""
+
+    ARENA_OVER_PIPE = 6
+    """Send the location of a message in an arena to Named PIPE."""
+
+    ARENA_RESTORE = 7
+    """Returns the ownership of a region of an arena."""
+
+    RING_OPEN = 8
+    """Switch the direction to a ring in Shared Memory, with PIPE as a doorbell."""
+
+    SM_SCATTER = 9
+    """Send a message spread over several Shared Memory segments, listed in PIPE."""
+
+    BATCH = 10
+    """Send several messages with a length table, in PIPE or in one Shared Memory."""
+
+    SM_RESTORE_MANY = 11
+    """Hand several Shared Memory segments back at once, names batched in PIPE."""
+
+    SM_OPEN = 12
+    """Bind a slot id to the name of a Shared Memory segment, sent in PIPE."""
+
+    SM_SLOT = 13
+    """Send a message over the Shared Memory of a slot, whose id is in the header."""
+
+    SM_RESTORE_SLOT = 14
+    """Hand the Shared Memory of a slot back, without any PIPE payload."""
+
+
+@unique
+class Hello(IntEnum):
+    """The meaning of an ``EMPTY`` frame, in its 'reserve' field."""
+
+    NONE = 0
+    """A plain signal, as sent by every version."""
+
+    PIPE_CAPACITY = 1
+    """The capacity of the pipe, in 'sm_data_size'."""
+
+    BACKEND = 2
+    """The kind of shared memory backend, in 'sm_data_size'."""
+
+    MAX_MESSAGE_SIZE = 3
+    """The largest message, split in 'pipe_data_size' (high) and 'sm_data_size'."""
+
+    VERSION = 4
+    """The protocol version and the capability flags; it ends the handshake."""
+
+    UPGRADE = 5
+    """The following frames use the header of the handshake version."""
+
+
+@unique
+class Capability(IntFlag):
+    NONE = 0
+    LEASE = 1
+    BATCH = 2
+    HEADER_V2 = 4
+    RESTORE_MANY = 8
+    SLOT_IDS = 16
+
 
 class HeaderPacket(NamedTuple):
     opcode: Opcode
     reserve: int
     pipe_data_size: int
     sm_data_size: int
+    flags: int = 0
+    sequence: int = 0
 
 
 # noinspection SpellCheckingInspection
@@ -37,10 +107,39 @@ HEADER_FORMAT: Final[str] = "@BBHI"
 
 HEADER_SIZE: Final[int] = calcsize(HEADER_FORMAT)
 
+MAX_PIPE_DATA_SIZE: Final[int] = 0xFFFF
+"""The largest payload that the 'pipe_data_size' field can describe."""
+
+MAX_SM_DATA_SIZE: Final[int] = 0xFFFFFFFF
+"""The largest message that the 'sm_data_size' field can describe."""
+
+PIPE_FRAGMENT_SIZE: Final[int] = 0x10000 - HEADER_SIZE
+"""Payload size of a PIPE_FRAGMENT frame, so that each frame is exactly 64 KiB."""
+
 EMPTY_HEADER_PACKET: Final[bytes] = pack(HEADER_FORMAT, int(Opcode.EMPTY), 0x00, 0, 0)
 
+PROTOCOL_VERSION: Final[int] = 2
+
+# noinspection SpellCheckingInspection
+HEADER_V2_FORMAT: Final[str] = "@BBHIQQ"
+# |...........................| ^      | @ = native byte order
+# |...........................|  ^     | B = 1 byte unsigned char = opcode
+# |...........................|   ^    | B = 1 byte unsigned char = flags
+# |...........................|    ^   | H = 2 byte unsigned short = reserve
+# |...........................|     ^  | I = 4 byte unsigned int = sequence number
+# |...........................|      ^ | Q = 8 byte unsigned long long = pipe size
+# |...........................|       ^| Q = 8 byte unsigned long long = sm size
+
+HEADER_V2_SIZE: Final[int] = calcsize(HEADER_V2_FORMAT)
+
+MAX_V2_DATA_SIZE: Final[int] = 0xFFFF_FFFF_FFFF_FFFF
+
 
 class Header:
+    version = 1
+    max_pipe_data_size = MAX_PIPE_DATA_SIZE
+    max_sm_data_size = MAX_SM_DATA_SIZE
+
     def __init__(self):
         self._header = Struct(HEADER_FORMAT)
         assert self._header.size == HEADER_SIZE
@@ -56,8 +155,20 @@ class Header:
     def encode(self, op: Opcode, pipe_data_size: int, sm_data_size=0) -> bytes:
         return self._header.pack(int(op), 0x00, pipe_data_size, sm_data_size)
 
+    def encode_hello(self, hello: Hello, pipe_data_size=0, sm_data_size=0) -> bytes:
+        """An ``EMPTY`` frame of the handshake, which older peers simply ignore."""
+        return self._header.pack(
+            int(Opcode.EMPTY), int(hello), pipe_data_size, sm_data_size
+        )
+
     def decode(self, data: bytes) -> HeaderPacket:
-        props = self._header.unpack(data)
+        return self._to_packet(self._header.unpack(data))
+
+    def decode_from(self, buffer: ReadableBuffer, offset=0) -> HeaderPacket:
+        return self._to_packet(self._header.unpack_from(buffer, offset))
+
+    @staticmethod
+    def _to_packet(props: Tuple) -> HeaderPacket:
         assert isinstance(props, tuple)
         assert len(props) == 4
 
@@ -77,3 +188,63 @@ class Header:
             pipe_data_size=pipe_data_size,
             sm_data_size=sm_data_size,
         )
+
+
+class HeaderV2:
+    """
+    The header of the version 2, with 64-bit sizes, flags and a sequence number.
+
+    It is only used once both peers have announced it during the handshake.
+    """
+
+    version = 2
+    max_pipe_data_size = MAX_V2_DATA_SIZE
+    max_sm_data_size = MAX_V2_DATA_SIZE
+
+    def __init__(self):
+        self._header = Struct(HEADER_V2_FORMAT)
+        self._sequence = 0
+        assert self._header.size == HEADER_V2_SIZE
+
+    @property
+    def size(self):
+        return self._header.size
+
+    def _next_sequence(self) -> int:
+        self._sequence = (self._sequence + 1) & 0xFFFFFFFF
+        return self._sequence
+
+    def encode_empty(self) -> bytes:
+        return self._header.pack(int(Opcode.EMPTY), 0x00, 0, 0, 0, 0)
+
+    def encode(self, op: Opcode, pipe_data_size: int, sm_data_size=0, flags=0) -> bytes:
+        sequence = self._next_sequence()
+        return self._header.pack(
+            int(op), flags, 0, sequence, pipe_data_size, sm_data_size
+        )
+
+    def encode_hello(self, hello: Hello, pipe_data_size=0, sm_data_size=0) -> bytes:
+        return self._header.pack(
+            int(Opcode.EMPTY), 0x00, int(hello), 0, pipe_data_size, sm_data_size
+        )
+
+    def decode(self, data: bytes) -> HeaderPacket:
+        return self._to_packet(self._header.unpack(data))
+
+    def decode_from(self, buffer: ReadableBuffer, offset=0) -> HeaderPacket:
+        return self._to_packet(self._header.unpack_from(buffer, offset))
+
+    @staticmethod
+    def _to_packet(props: Tuple) -> HeaderPacket:
+        opcode, flags, reserve, sequence, pipe_data_size, sm_data_size = props
+        return HeaderPacket(
+            opcode=Opcode(opcode),
+            reserve=reserve,
+            pipe_data_size=pipe_data_size,
+            sm_data_size=sm_data_size,
+            flags=flags,
+            sequence=sequence,
+        )
+
+
+AnyHeader = Union[Header, HeaderV2]
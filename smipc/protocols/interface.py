@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+from abc import ABC, abstractmethod
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from smipc.buffer import ReadableBuffer, WritableBuffer
+from smipc.sm.arena import ArenaWritten
+from smipc.sm.written import SmWritten
+
+
+class WrittenInfo(NamedTuple):
+    pipe_byte: int
+    sm_byte: int
+    sm_name: Optional[bytes]
+
+
+class ProtocolInterface(ABC):
+    @abstractmethod
+    def close(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def send(self, data: ReadableBuffer) -> WrittenInfo:
+        raise NotImplementedError
+
+    @abstractmethod
+    def recv(self) -> Optional[bytes]:
+        raise NotImplementedError
+
+
+class SmInterface(ABC):
+    @abstractmethod
+    def close_sm(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def write_sm(self, data: ReadableBuffer) -> SmWritten:
+        raise NotImplementedError
+
+    @abstractmethod
+    def reserve_sm(self, size: int) -> Tuple[SmWritten, memoryview]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def write_sm_scatter(
+        self, data: ReadableBuffer, chunk_size: int
+    ) -> List[SmWritten]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def read_sm(self, name: Union[str, bytes], size: int) -> bytes:
+        raise NotImplementedError
+
+    @abstractmethod
+    def read_sm_into(
+        self,
+        name: Union[str, bytes],
+        size: int,
+        buffer: WritableBuffer,
+    ) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def lease_sm(
+        self,
+        name: Union[str, bytes],
+        size: int,
+    ) -> Tuple[memoryview, Callable[[], None]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def restore_sm(self, name: bytes) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def restore_sm_slot(self, slot: int) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def restore_sm_many(self, names: Sequence[bytes]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def write_arena(self, data: ReadableBuffer) -> Optional[ArenaWritten]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def arena_name(self, arena_id: int) -> bytes:
+        raise NotImplementedError
+
+    @abstractmethod
+    def open_arena(self, arena_id: int, name: bytes) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def lease_arena(
+        self,
+        written: ArenaWritten,
+    ) -> Tuple[memoryview, Callable[[], None]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def free_arena(self, written: ArenaWritten) -> None:
+        raise NotImplementedError
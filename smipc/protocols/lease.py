@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Callable, List, Optional
+from weakref import ref
+
+from smipc.protocols.header import HeaderPacket
+
+
+class Lease:
+    """
+    A received message that is read in place.
+
+    The view refers directly to the shared memory segment of the sender, and the
+    segment is handed back to the sender only when the lease is released.
+    The arrays returned by :meth:`ndarray` must be dropped before the release,
+    otherwise :class:`BufferError` is raised and the lease stays held.
+    Other objects created from the view must not outlive the lease either.
+    """
+
+    def __init__(
+        self,
+        header: HeaderPacket,
+        view: memoryview,
+        release: Optional[Callable[[], None]] = None,
+    ):
+        self._header = header
+        self._view: Optional[memoryview] = view
+        self._release = release
+        self._arrays: List[ref] = list()
+
+    def __repr__(self):
+        state = "released" if self.released else f"{self.nbytes} bytes"
+        return f"<{type(self).__name__} opcode={self._header.opcode} {state}>"
+
+    @property
+    def header(self):
+        return self._header
+
+    @property
+    def released(self) -> bool:
+        return self._view is None
+
+    @property
+    def view(self) -> memoryview:
+        if self._view is None:
+            raise ValueError("The lease has already been released")
+        return self._view
+
+    @property
+    def nbytes(self) -> int:
+        return self.view.nbytes
+
+    @property
+    def shared(self) -> bool:
+        """Whether the view refers to a shared memory segment."""
+        return self._release is not None
+
+    def ndarray(self, dtype: Any = "uint8", shape: Any = None):
+        """Return a numpy array over the view, without copying."""
+        import numpy as np
+
+        array = np.frombuffer(self.view, dtype=dtype)
+        if shape is not None:
+            array = array.reshape(shape)
+        self._arrays.append(ref(array))
+        return array
+
+    def tobytes(self) -> bytes:
+        return self.view.tobytes()
+
+    def release(self) -> None:
+        if self._view is None:
+            return
+
+        alive = sum(1 for array in self._arrays if array() is not None)
+        if alive >= 1:
+            raise BufferError(f"{alive} arrays of the lease still exist")
+        self._arrays.clear()
+
+        self._view.release()
+        self._view = None
+
+        release = self._release
+        self._release = None
+        if release is not None:
+            release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
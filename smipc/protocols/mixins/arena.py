@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+from abc import ABC
+from typing import Optional, Set
+
+from smipc.buffer import ReadableBuffer
+from smipc.protocols.header import HeaderPacket, Opcode
+from smipc.protocols.interface import WrittenInfo
+from smipc.protocols.lease import Lease
+from smipc.protocols.mixins.state import ProtocolState
+from smipc.sm.arena import ArenaWritten
+
+
+class ArenaMixin(ProtocolState, ABC):
+    """
+    Messages sub-allocated in a shared memory arena, opened once with an
+    ``ARENA_OPEN`` frame and located by an offset.
+    """
+
+    def _init_arena(self) -> None:
+        self._opened_arenas: Set[int] = set()
+
+    def send_arena_open(self, arena_id: int) -> WrittenInfo:
+        name = self.arena_name(arena_id)
+        header = self._header.encode(Opcode.ARENA_OPEN, len(name), arena_id)
+        pipe_byte = self.write_frames(((header, name),))
+        self._opened_arenas.add(arena_id)
+        return WrittenInfo(pipe_byte, 0, name)
+
+    def send_arena_over_pipe(self, data: ReadableBuffer) -> Optional[WrittenInfo]:
+        """Send the data through an arena, or return ``None`` if it does not fit."""
+        written = self.write_arena(data)
+        if written is None:
+            return None
+
+        location = written.encode_location()
+        size = written.size
+        header = self._header.encode(Opcode.ARENA_OVER_PIPE, len(location), size)
+        try:
+            if written.arena_id not in self._opened_arenas:
+                self.send_arena_open(written.arena_id)
+            pipe_byte = self.write_frames(((header, location),))
+        except BaseException:
+            self.free_arena(written)
+            raise
+        return WrittenInfo(pipe_byte, written.size, None)
+
+    def send_arena_restore(self, location: bytes) -> WrittenInfo:
+        header = self._header.encode(Opcode.ARENA_RESTORE, len(location))
+        pipe_byte = self.write_frames(((header, location),))
+        return WrittenInfo(pipe_byte, 0, None)
+
+    def _reply_arena_restore(self, location: bytes) -> None:
+        if not self._disable_restore_sm:
+            self.send_arena_restore(location)
+
+    def _lease_arena(self, header: HeaderPacket, location: bytes) -> Lease:
+        assert header.sm_data_size >= 1
+        written = ArenaWritten.decode_location(location, header.sm_data_size)
+        view, unpin = self.lease_arena(written)
+
+        def _release() -> None:
+            unpin()
+            self._reply_arena_restore(location)
+
+        return Lease(header, view, _release)
+
+    def recv_arena_open(self, header: HeaderPacket, name: bytes) -> None:
+        assert header.pipe_data_size >= 1
+        assert header.pipe_data_size == len(name)
+        self.open_arena(header.sm_data_size, name)
+
+    def recv_arena_over_pipe(self, header: HeaderPacket, location: bytes) -> bytes:
+        with self._lease_arena(header, location) as lease:
+            return lease.tobytes()
+
+    def recv_arena_restore(self, header: HeaderPacket, location: bytes) -> None:
+        assert header.sm_data_size == 0
+        self.free_arena(ArenaWritten.decode_location(location, 0))
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+from abc import ABC
+from typing import List, Optional, Sequence
+
+from smipc.buffer import ReadableBuffer, buffer_nbytes, copy_buffer
+from smipc.decorators.override import override
+from smipc.protocols.batch import batch_nbytes, decode_batch, encode_batch_table
+from smipc.protocols.header import Capability, HeaderPacket, Opcode
+from smipc.protocols.interface import WrittenInfo
+from smipc.protocols.mixins.state import ProtocolState
+
+
+class BatchingMixin(ProtocolState, ABC):
+    """
+    Several messages in one ``BATCH`` frame, preceded by a length table,
+    inline in the pipe or in one segment.
+    """
+
+    def send_batch_sm(self, buffers: Sequence[ReadableBuffer]) -> WrittenInfo:
+        """Send the messages with their length table in one segment."""
+        table = encode_batch_table([buffer_nbytes(b) for b in buffers])
+        written, view = self.reserve_sm(len(table) + sum(map(buffer_nbytes, buffers)))
+        try:
+            with view:
+                offset = copy_buffer(view, table)
+                for buffer in buffers:
+                    with view[offset:] as target:
+                        offset += copy_buffer(target, buffer)
+        except BaseException:
+            self._abort_reserved(written)
+            raise
+
+        name = written.encode_name(encoding=self._encoding)
+        header = self._header.encode(Opcode.BATCH, len(name), written.size)
+        try:
+            pipe_byte = self.write_frames(((header, name),))
+        except BaseException:
+            self.restore_sm(name)
+            raise
+        return WrittenInfo(pipe_byte, written.size, name)
+
+    def _send_batch(
+        self,
+        buffers: Sequence[ReadableBuffer],
+        timeout: Optional[float],
+    ) -> WrittenInfo:
+        if not buffers:
+            return WrittenInfo(0, 0, None)
+
+        peer = self._peer_capabilities
+        if peer is not None and not peer.supports(Capability.BATCH):
+            pipe_byte = sm_byte = 0
+            for buffer in buffers:
+                info = self._send_now(buffer, timeout)
+                pipe_byte += info.pipe_byte
+                sm_byte += info.sm_byte
+            return WrittenInfo(pipe_byte, sm_byte, None)
+
+        sizes = [buffer_nbytes(b) for b in buffers]
+        total = batch_nbytes(sizes)
+        if peer is not None and 0 < peer.max_message_size < total:
+            raise ValueError(
+                f"The peer accepts messages up to {peer.max_message_size} bytes"
+            )
+
+        inline = min(self._pipe_direct_threshold, self._header.max_pipe_data_size)
+        if not self._force_sm_over_pipe and total <= inline:
+            payload = b"".join([encode_batch_table(sizes), *buffers])
+            header = self._header.encode(Opcode.BATCH, len(payload))
+            pipe_byte = self.write_frames(((header, payload),))
+            return WrittenInfo(pipe_byte, 0, None)
+
+        return self._retry_full(lambda: self.send_batch_sm(buffers), timeout)
+
+    def recv_batch(self, header: HeaderPacket, payload: bytes) -> None:
+        """Unpack the messages of the batch, and keep them for the receive calls."""
+        assert header.pipe_data_size == len(payload)
+        if header.sm_data_size == 0:
+            messages = decode_batch(payload)
+        else:
+            view, unpin = self.lease_sm(payload, header.sm_data_size)
+            try:
+                messages = decode_batch(view)
+            finally:
+                view.release()
+                unpin()
+            self._reply_sm_restore(payload)
+        self._pending.extend((header, data) for data in messages)
+
+    @override
+    def _take_pending(self, result: List[bytes]) -> None:
+        result.extend(data for _, data in self._pending)
+        self._pending.clear()
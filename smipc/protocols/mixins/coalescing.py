@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+from abc import ABC
+from queue import Full
+from typing import List, Optional, Sequence
+
+from smipc.decorators.override import override
+from smipc.protocols.batch import decode_batch, encode_batch_table
+from smipc.protocols.coalescer import Coalescer
+from smipc.protocols.header import Capability, HeaderPacket, Opcode
+from smipc.protocols.interface import WrittenInfo
+from smipc.protocols.mixins.batching import BatchingMixin
+from smipc.protocols.options import ProtocolOptions
+
+
+class CoalescingMixin(BatchingMixin, ABC):
+    """
+    Delayed writes: small messages are coalesced into batches, and the segments
+    handed back are grouped into ``SM_RESTORE_MANY`` frames.
+    """
+
+    def _init_coalescing(self, options: ProtocolOptions) -> None:
+        self._coalescer: Optional[Coalescer] = None
+        if options.coalesce_bytes is not None:
+            self._coalescer = Coalescer(self._send_coalesced, options.coalesce_delay)
+        self._restorer: Optional[Coalescer] = None
+        if options.restore_batch is not None:
+            self._restorer = Coalescer(
+                self._send_restores,
+                options.restore_delay,
+                name="RestoreCoalescer",
+                max_count=options.restore_batch,
+                retry=True,
+            )
+
+    def _close_coalescers(self) -> None:
+        if self._coalescer is not None:
+            try:
+                self._coalescer.flush()
+            except (OSError, Full):
+                pass  # The peer is gone or busy, the messages are dropped.
+            finally:
+                self._coalescer.close()
+        if self._restorer is not None:
+            try:
+                self._restorer.flush()
+            except OSError:
+                pass  # The peer is gone, it does not need the segments anymore.
+            finally:
+                self._restorer.close()
+
+    @property
+    def coalescing(self) -> bool:
+        return self._coalescer is not None
+
+    @property
+    def coalesce_limit(self) -> int:
+        """The largest batch of coalesced messages, always written inline."""
+        coalesce_bytes = self._options.coalesce_bytes
+        if coalesce_bytes is None:
+            return 0
+        inline = min(self._pipe_direct_threshold, self._header.max_pipe_data_size)
+        return min(coalesce_bytes, inline)
+
+    def _send_coalesced(self, messages: List[bytes], timeout: Optional[float]) -> None:
+        if len(messages) == 1:
+            self._send_now(messages[0], timeout)
+        else:
+            self._send_batch(messages, timeout)
+
+    def flush(self, timeout: Optional[float] = 0.0) -> int:
+        """Send the coalesced messages now, and return how many there were."""
+        if self._coalescer is None:
+            return 0
+        return self._coalescer.flush(timeout)
+
+    @property
+    def restore_limit(self) -> int:
+        """The largest payload of ``SM_RESTORE_MANY``, written atomically."""
+        limit = self._writer_size
+        if self._ring_writer is not None:
+            limit = min(limit, self.ring_direct_size)
+        return limit
+
+    def send_sm_restore_many(
+        self,
+        sm_names: Sequence[bytes],
+        timeout: Optional[float] = 0.0,
+    ) -> WrittenInfo:
+        """Hand several segments back in one frame, with a length table of names."""
+        payload = b"".join([encode_batch_table([len(n) for n in sm_names]), *sm_names])
+        header = self._header.encode(
+            Opcode.SM_RESTORE_MANY, len(payload), len(sm_names)
+        )
+        pipe_byte = self.write_frames(((header, payload),), timeout=timeout)
+        return WrittenInfo(pipe_byte, 0, None)
+
+    def _send_restores(self, sm_names: List[bytes], timeout: Optional[float]) -> None:
+        if len(sm_names) == 1:
+            self.send_sm_restore(sm_names[0], timeout)
+        else:
+            self.send_sm_restore_many(sm_names, timeout)
+
+    @override
+    def _queue_restore(self, sm_name: bytes) -> bool:
+        if self._restorer is None:
+            return False
+        peer = self._peer_capabilities
+        if peer is not None and not peer.supports(Capability.RESTORE_MANY):
+            return False
+        self._restorer.append(sm_name, self.restore_limit)
+        return True
+
+    def flush_restores(self, timeout: Optional[float] = 0.0) -> int:
+        """
+        Hand the delayed segments back now, and return how many there were.
+
+        The segments that could not be handed back stay queued, and are retried
+        by the restore thread if this raises.
+        """
+        if self._restorer is None:
+            return 0
+        return self._restorer.flush(timeout)
+
+    def recv_sm_restore_many(self, header: HeaderPacket, payload: bytes) -> None:
+        assert header.pipe_data_size == len(payload)
+        sm_names = decode_batch(payload)
+        assert header.sm_data_size == len(sm_names)
+        self.restore_sm_many(sm_names)
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+from abc import ABC
+from threading import Lock
+from time import monotonic
+from typing import List, Optional, Sequence, Tuple
+
+from smipc.buffer import ReadableBuffer
+from smipc.decorators.override import override
+from smipc.pipe.poll import wait_readable, wait_writable
+from smipc.pipe.writer import PipeWriter
+from smipc.protocols.decoder import Frame, FrameDecoder
+from smipc.protocols.header import AnyHeader, Header, HeaderPacket
+from smipc.protocols.interface import WrittenInfo
+from smipc.protocols.mixins.state import ProtocolState
+from smipc.protocols.options import ProtocolOptions
+from smipc.variables import DEFAULT_PIPE_BUF
+
+
+def calc_writer_size(writer: PipeWriter, header: AnyHeader) -> int:
+    try:
+        return writer.pipe_buf - header.size
+    except:  # noqa
+        return DEFAULT_PIPE_BUF - header.size
+
+
+def calc_max_direct_size(writer: PipeWriter, header: AnyHeader) -> Optional[int]:
+    """The largest payload that still fits in an empty pipe, if it is known."""
+    try:
+        return writer.pipe_capacity - header.size
+    except (NotImplementedError, OSError):
+        return None
+
+
+class FramingMixin(ProtocolState, ABC):
+    """
+    Frames of the pipe: the version 1 or 2 header, and the writes and reads of
+    exactly one frame.
+    """
+
+    def _init_framing(self, options: ProtocolOptions) -> None:
+        self._header = Header()
+        self._peer_header = self._header
+        self._writer_size = calc_writer_size(self._pipe.writer, self._header)
+        self._decoder = FrameDecoder(self._header, options.decoder_buffer_size)
+        self._write_lock = Lock()
+
+    @property
+    def header_size(self):
+        return self._header.size
+
+    @property
+    def header_version(self) -> int:
+        """The version of the header of the outgoing frames."""
+        return self._header.version
+
+    @property
+    def peer_header_version(self) -> int:
+        """The version of the header of the incoming frames."""
+        return self._peer_header.version
+
+    def _set_header(self, header: AnyHeader) -> None:
+        self._header = header
+        self._writer_size = calc_writer_size(self._pipe.writer, header)
+        self._pipe_direct_threshold = self._calc_pipe_direct_threshold()
+
+    @override
+    def write_frames(
+        self,
+        frames: Sequence[Tuple[bytes, ReadableBuffer]],
+        atomic=True,
+        timeout: Optional[float] = 0.0,
+    ) -> int:
+        """
+        Write the frames in order to the pipe.
+
+        If ``atomic`` is set, the frames are written to the pipe with a single
+        system call, which is atomic only up to 'PIPE_BUF' bytes. If the pipe is
+        full, it waits up to ``timeout`` seconds (forever if ``None``) before
+        raising :class:`BlockingIOError`. A partial write is always completed
+        within the ``write_timeout`` of the protocol.
+        """
+
+        buffers: List[ReadableBuffer] = list()
+        for header, payload in frames:
+            assert len(header) == self._header.size
+            buffers.append(header)
+            buffers.append(payload)
+
+        # The coalescing threads must not write in the middle of a partial write.
+        with self._write_lock:
+            if atomic:
+                return self._writev_atomic(buffers, timeout)
+            else:
+                return self._pipe.writev_all(buffers, self._options.write_timeout)
+
+    def _writev_atomic(
+        self,
+        buffers: Sequence[ReadableBuffer],
+        timeout: Optional[float],
+    ) -> int:
+        deadline = None if timeout is None else monotonic() + timeout
+        while True:
+            try:
+                return self._pipe.writev(buffers)
+            except BlockingIOError:
+                remaining = None if deadline is None else deadline - monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise
+                wait_writable(self._pipe.writer, remaining)
+
+    def send_empty(self) -> WrittenInfo:
+        pipe_byte = self._pipe.write(self._header.encode_empty())
+        return WrittenInfo(pipe_byte, 0, None)
+
+    def _fill_next_frame(self, started=False) -> None:
+        try:
+            read_bytes = self._decoder.fill(
+                self._pipe.reader, self._decoder.remaining()
+            )
+        except BlockingIOError:
+            if not started and self._decoder.pending == 0:
+                raise
+            wait_readable(self._pipe.reader)
+            return
+
+        if read_bytes == 0:
+            raise EOFError("The writer side of the pipe has been closed")
+
+    def read_header(self, started=False) -> HeaderPacket:
+        """Read the header of the next frame, leaving its payload unread."""
+        header = self._decoder.peek()
+        while header is None:
+            self._fill_next_frame(started)
+            header = self._decoder.peek()
+        return header
+
+    @override
+    def read_frame(self, started=False) -> Frame:
+        """
+        Read exactly one frame.
+
+        Only the bytes of the next frame are requested from the pipe, so that the
+        readiness of the pipe still signals one frame per event. Once a frame has
+        started to arrive (or ``started`` is set because the frame belongs to a
+        message that is being received), the remaining bytes are waited for,
+        even in the non-blocking mode.
+        """
+
+        frame = self._decoder.pop()
+        while frame is None:
+            self._fill_next_frame(started)
+            frame = self._decoder.pop()
+        return frame
+
+    def _read_payload_into(self, target: memoryview) -> None:
+        copied = self._decoder.take_into(target)
+        while copied < len(target):
+            try:
+                read_bytes = self._pipe.readinto(target[copied:])
+            except BlockingIOError:
+                wait_readable(self._pipe.reader)
+                continue
+            if read_bytes == 0:
+                raise EOFError("The writer side of the pipe has been closed")
+            copied += read_bytes
+
+    def _read_frame_payload_into(self, target: memoryview) -> None:
+        self._decoder.skip_header()
+        self._read_payload_into(target)
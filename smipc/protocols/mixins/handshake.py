@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+from abc import ABC
+from time import monotonic
+from typing import Optional
+
+from smipc.protocols.handshake import (
+    Capabilities,
+    HelloDecoder,
+    encode_hello,
+    get_backend_kind,
+)
+from smipc.protocols.header import (
+    PROTOCOL_VERSION,
+    Capability,
+    HeaderPacket,
+    HeaderV2,
+    Hello,
+)
+from smipc.protocols.interface import WrittenInfo
+from smipc.protocols.mixins.framing import FramingMixin
+from smipc.protocols.options import ProtocolOptions
+
+
+class HandshakeMixin(FramingMixin, ABC):
+    """
+    Exchange of the capabilities, in ``EMPTY`` frames ignored by older peers,
+    and upgrade of the outgoing frames to the version 2 header.
+    """
+
+    def _init_handshake(self, options: ProtocolOptions) -> None:
+        self._backend_kind = get_backend_kind(options.backend)
+        self._hello = HelloDecoder()
+        self._peer_capabilities = None
+
+    @property
+    def capabilities(self) -> Capabilities:
+        try:
+            pipe_capacity = self._pipe.writer.pipe_capacity
+        except (NotImplementedError, OSError):
+            pipe_capacity = 0
+
+        flags = (
+            Capability.LEASE
+            | Capability.BATCH
+            | Capability.RESTORE_MANY
+            | Capability.SLOT_IDS
+        )
+        if self._options.handshake:
+            flags |= Capability.HEADER_V2
+        return Capabilities(
+            version=PROTOCOL_VERSION,
+            flags=flags,
+            pipe_capacity=pipe_capacity,
+            backend=self._backend_kind,
+            max_message_size=self._options.max_message_size or 0,
+        )
+
+    @property
+    def peer_capabilities(self) -> Optional[Capabilities]:
+        """The capabilities announced by the peer, or ``None`` before its handshake."""
+        return self._peer_capabilities
+
+    def send_hello(self) -> WrittenInfo:
+        """
+        Announce the capabilities of this side to the peer.
+
+        The handshake is made of ``EMPTY`` frames, so older peers ignore it.
+        Once both sides have announced the version 2, each side switches its
+        outgoing frames to the new header, with an ``UPGRADE`` frame in front.
+        """
+
+        hello = encode_hello(self._header, self.capabilities)
+        pipe_byte = self.write_frames([(header, b"") for header in hello])
+        return WrittenInfo(pipe_byte, 0, None)
+
+    def _negotiate(self, peer: Capabilities) -> None:
+        self._peer_capabilities = peer
+        if not self._options.handshake or self._header.version >= 2:
+            return
+        if peer.version >= 2 and peer.supports(Capability.HEADER_V2):
+            upgrade = self._header.encode_hello(Hello.UPGRADE)
+            self.write_frames(((upgrade, b""),))
+            self._set_header(HeaderV2())
+
+    def wait_handshake(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait up to ``timeout`` seconds for the capabilities of the peer.
+
+        Messages that arrive meanwhile are kept for the next receive calls.
+        Returns ``False`` if the peer has not announced them, like older peers.
+        """
+
+        deadline = None if timeout is None else monotonic() + timeout
+        while self._peer_capabilities is None:
+            remaining = None if deadline is None else deadline - monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self.poll_restore(remaining)
+        return True
+
+    def recv_empty(self, header: HeaderPacket) -> None:
+        try:
+            hello = Hello(header.reserve)
+        except ValueError:
+            return  # Added by a newer peer.
+
+        if hello == Hello.UPGRADE:
+            self._peer_header = HeaderV2()
+            self._decoder.set_header(self._peer_header)
+        elif hello != Hello.NONE:
+            peer = self._hello.feed(header)
+            if peer is not None:
+                self._negotiate(peer)
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+from abc import ABC
+from errno import EAGAIN
+from threading import Lock
+from typing import List, Optional, Sequence, Tuple
+
+from smipc.buffer import ReadableBuffer, buffer_nbytes, copy_buffer
+from smipc.decorators.override import override
+from smipc.pipe.poll import wait_readable
+from smipc.protocols.decoder import Frame, payload_size
+from smipc.protocols.header import HeaderPacket, Opcode
+from smipc.protocols.interface import WrittenInfo
+from smipc.protocols.mixins.framing import FramingMixin
+from smipc.protocols.options import ProtocolOptions
+from smipc.sm.ring import RingReader, RingWriter
+from smipc.variables import DEFAULT_PIPE_BUF
+
+
+class RingMixin(FramingMixin, ABC):
+    """
+    Frames written in place in a shared memory ring instead of the pipe, which
+    then carries only the ``RING_OPEN`` frame and the doorbells.
+    """
+
+    def _init_ring(self, options: ProtocolOptions, segment_tag: str) -> None:
+        self._ring_lock = Lock()
+        self._ring_writer: Optional[RingWriter] = None
+        if options.ring_size is not None:
+            self._ring_writer = RingWriter(
+                options.ring_size, options.backend, segment_tag
+            )
+        self._ring_opened = False
+        self._ring_reader: Optional[RingReader] = None
+        self._doorbells = bytearray(DEFAULT_PIPE_BUF)
+
+    @property
+    def ring_writer(self):
+        return self._ring_writer
+
+    @property
+    def ring_reader(self):
+        return self._ring_reader
+
+    @property
+    def ring_direct_size(self) -> int:
+        """The largest PIPE_DIRECT payload that fits in a record of the ring."""
+        assert self._ring_writer is not None
+        size = self._ring_writer.max_record - self._header.size
+        return min(size, self._header.max_pipe_data_size)
+
+    def close_ring(self) -> None:
+        if self._ring_reader is not None:
+            self._ring_reader.close()
+            self._ring_reader = None
+        if self._ring_writer is not None:
+            self._ring_writer.close()
+
+    def send_ring_open(self) -> WrittenInfo:
+        assert self._ring_writer is not None
+        name = self._ring_writer.name.encode(encoding=self._encoding)
+        header = self._header.encode(Opcode.RING_OPEN, len(name))
+        assert len(header) == self._header.size
+        pipe_byte = self._pipe.writev((header, name))
+        self._ring_opened = True
+        return WrittenInfo(pipe_byte, 0, name)
+
+    def _ring_doorbell(self) -> None:
+        try:
+            self._pipe.write(self._header.encode_empty())
+        except BlockingIOError:
+            pass  # The pipe is full of doorbells that are not read yet.
+
+    def _write_ring_record(self, header: bytes, payload: ReadableBuffer) -> int:
+        assert self._ring_writer is not None
+        size = len(header) + buffer_nbytes(payload)
+
+        while True:
+            with self._ring_lock:
+                if not self._ring_opened:
+                    self.send_ring_open()
+                wake = self._ring_writer.try_write((header, payload))
+            if wake is not None:
+                break
+
+            # The ring is full: wait without holding the lock, like a full pipe.
+            if not self._pipe.writer.blocking:
+                raise BlockingIOError(EAGAIN, "The ring is full")
+            if not self._ring_writer.wait_free(size, self._options.ring_timeout):
+                raise TimeoutError("The ring is still full")
+
+        if wake:
+            self._ring_doorbell()
+        return size
+
+    def _write_ring(self, frames: Sequence[Tuple[bytes, ReadableBuffer]]) -> int:
+        return sum(self._write_ring_record(h, p) for h, p in frames)
+
+    @override
+    def write_frames(
+        self,
+        frames: Sequence[Tuple[bytes, ReadableBuffer]],
+        atomic=True,
+        timeout: Optional[float] = 0.0,
+    ) -> int:
+        """Write the frames in order, to the ring if there is one."""
+        if self._ring_writer is not None:
+            return self._write_ring(frames)
+        return super().write_frames(frames, atomic, timeout)
+
+    def _send_ring_overflow(self, data: ReadableBuffer) -> WrittenInfo:
+        # Messages larger than a ring record go through a segment instead.
+        written, view = self.reserve_sm(buffer_nbytes(data))
+        with view:
+            copy_buffer(view, data)
+        return self.send_sm_written(written)
+
+    def recv_ring_open(self, header: HeaderPacket, name: bytes) -> None:
+        assert header.pipe_data_size >= 1
+        assert header.pipe_data_size == len(name)
+        if self._ring_reader is not None:
+            self._ring_reader.close()
+        self._ring_reader = RingReader(str(name, encoding=self._encoding))
+        # From now on, the pipe carries only doorbells.
+        self._decoder.clear()
+
+    def _wait_ring(self, started=False) -> None:
+        """
+        Wait for the next record of the ring, using the pipe as a doorbell.
+
+        The consumer is parked first, so that the producer rings the doorbell after
+        its next write. In the non-blocking mode, stale doorbells are drained and
+        :class:`BlockingIOError` is raised when there is nothing else to read.
+        """
+
+        assert self._ring_reader is not None
+        if not self._ring_reader.park():
+            return  # A record was published in the meantime.
+
+        try:
+            read_bytes = self._pipe.readinto(self._doorbells)
+        except BlockingIOError:
+            if not started:
+                raise
+            wait_readable(self._pipe.reader)
+            return
+
+        if read_bytes == 0:
+            raise EOFError("The writer side of the pipe has been closed")
+
+    def _peek_ring(self, started=False) -> memoryview:
+        assert self._ring_reader is not None
+        record = self._ring_reader.peek()
+        while record is None:
+            self._wait_ring(started)
+            record = self._ring_reader.peek()
+        return record
+
+    def _pop_ring_frame(self, record: memoryview) -> Frame:
+        assert self._ring_reader is not None
+        header = self._peer_header.decode_from(record)
+        begin = self._peer_header.size
+        payload = bytes(record[begin : begin + payload_size(header)])
+        self._ring_reader.advance()
+        return Frame(header, payload)
+
+    def _poll_ring_frame(self, timeout: Optional[float]) -> Optional[Frame]:
+        assert self._ring_reader is not None
+        record = self._ring_reader.peek()
+        if record is None and self._ring_reader.park():
+            if not wait_readable(self._pipe.reader, timeout):
+                return None
+            try:
+                self._pipe.readinto(self._doorbells)
+            except BlockingIOError:
+                pass
+            record = self._ring_reader.peek()
+        return self._pop_ring_frame(record) if record is not None else None
+
+    @override
+    def read_header(self, started=False) -> HeaderPacket:
+        if self._ring_reader is not None:
+            return self._peer_header.decode_from(self._peek_ring(started))
+        return super().read_header(started)
+
+    @override
+    def read_frame(self, started=False) -> Frame:
+        if self._ring_reader is not None:
+            return self._pop_ring_frame(self._peek_ring(started))
+        return super().read_frame(started)
+
+    @override
+    def _read_frame_payload_into(self, target: memoryview) -> None:
+        if self._ring_reader is not None:
+            record = self._peek_ring(started=True)
+            begin = self._peer_header.size
+            target[:] = record[begin : begin + target.nbytes]
+            self._ring_reader.advance()
+        else:
+            super()._read_frame_payload_into(target)
+
+    def _recv_many_ring(self, result: List[bytes]) -> List[bytes]:
+        assert self._ring_reader is not None
+        while True:
+            record = self._ring_reader.peek()
+            if record is not None:
+                data = self.recv_frame(self._pop_ring_frame(record))
+                if data is not None:
+                    result.append(data)
+                elif self._pending:
+                    self._take_pending(result)
+            elif result:
+                if self._ring_reader.park():
+                    break  # The next write will ring the doorbell.
+            else:
+                try:
+                    self._wait_ring()
+                except BlockingIOError:
+                    break
+        return result
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+from abc import ABC
+from typing import List, Tuple
+
+from smipc.buffer import ReadableBuffer, WritableBuffer
+from smipc.protocols.header import HeaderPacket, Opcode
+from smipc.protocols.interface import WrittenInfo
+from smipc.protocols.mixins.state import ProtocolState
+from smipc.sm.written import decode_segments, encode_segments
+
+
+class ScatterMixin(ProtocolState, ABC):
+    """
+    Large messages split over several pooled segments, listed in one
+    ``SM_SCATTER`` frame.
+    """
+
+    @property
+    def scatter_chunk_size(self) -> int:
+        return self._options.scatter_chunk_size
+
+    def send_sm_scatter(self, data: ReadableBuffer) -> WrittenInfo:
+        """Send the data through several pooled segments, listed in one frame."""
+        writtens = self.write_sm_scatter(data, self._options.scatter_chunk_size)
+        names = [w.encode_name(encoding=self._encoding) for w in writtens]
+        try:
+            segments = encode_segments(writtens, encoding=self._encoding)
+            if len(segments) > self._header.max_pipe_data_size:
+                raise ValueError(
+                    f"Too many segments: {len(writtens)}, "
+                    "increase the 'scatter_chunk_size'"
+                )
+            header = self._header.encode(
+                Opcode.SM_SCATTER, len(segments), len(writtens)
+            )
+            atomic = len(header) + len(segments) <= self._writer_size
+            pipe_byte = self.write_frames(((header, segments),), atomic)
+        except BaseException:
+            for name in names:
+                self.restore_sm(name)
+            raise
+        return WrittenInfo(pipe_byte, sum(w.size for w in writtens), None)
+
+    def _read_segments_into(
+        self,
+        segments: List[Tuple[bytes, int]],
+        target: memoryview,
+    ) -> None:
+        offset = 0
+        for sm_name, size in segments:
+            with target[offset : offset + size] as chunk:
+                self.read_sm_into(sm_name, size, chunk)
+            self._reply_sm_restore(sm_name)
+            offset += size
+
+    def recv_sm_scatter(self, header: HeaderPacket, payload: bytes) -> bytes:
+        assert header.pipe_data_size == len(payload)
+        segments = decode_segments(payload)
+        assert header.sm_data_size == len(segments)
+        result = bytearray(sum(size for _, size in segments))
+        with memoryview(result) as target:
+            self._read_segments_into(segments, target)
+        return bytes(result)
+
+    def _recv_scatter_into(self, buffer: WritableBuffer) -> int:
+        frame = self.read_frame()
+        segments = decode_segments(frame.payload)
+        size = sum(size for _, size in segments)
+        with memoryview(buffer) as view, view.cast("B") as target:
+            nbytes = target.nbytes
+            if nbytes >= size:
+                with target[:size] as payload:
+                    self._read_segments_into(segments, payload)
+                return size
+
+        # The list is consumed already, so keep the message for the next call.
+        data = self.recv_sm_scatter(frame.header, frame.payload)
+        self._pending.appendleft((frame.header, data))
+        raise ValueError(f"The buffer is too small: {nbytes} < {size} bytes")
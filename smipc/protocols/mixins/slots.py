@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+from abc import ABC
+from typing import List, Optional, Tuple, Union
+
+from smipc.buffer import ReadableBuffer
+from smipc.protocols.header import Capability, HeaderPacket, Opcode
+from smipc.protocols.interface import WrittenInfo
+from smipc.protocols.lease import Lease
+from smipc.protocols.mixins.state import ProtocolState
+from smipc.sm.written import SmWritten
+
+
+class SlotsMixin(ProtocolState, ABC):
+    """
+    Segments sent by their slot id, in frames made of the header only, once
+    their name has been announced with an ``SM_OPEN`` frame.
+    """
+
+    def _init_slots(self) -> None:
+        self._announced_slots: List[Optional[Union[str, bytes]]] = list()
+        self._peer_slots: List[str] = list()
+
+    def _use_slot(self, slot: int) -> bool:
+        if (
+            not self._options.slot_ids
+            or not 0 <= slot <= self._header.max_pipe_data_size
+        ):
+            return False
+        peer = self._peer_capabilities
+        return peer is None or peer.supports(Capability.SLOT_IDS)
+
+    def send_sm_slot(self, written: SmWritten) -> WrittenInfo:
+        """
+        Send a segment by its slot id, in a frame made of the header only.
+
+        The name of the segment is sent once in an ``SM_OPEN`` frame in front,
+        the first time the slot is used for it.
+        """
+
+        slot = written.slot
+        announced = self._announced_slots
+        if slot >= len(announced):
+            announced.extend([None] * (slot + 1 - len(announced)))
+
+        frames: List[Tuple[bytes, ReadableBuffer]] = list()
+        if announced[slot] != written.name:
+            name = written.encode_name(encoding=self._encoding)
+            frames.append((self._header.encode(Opcode.SM_OPEN, len(name), slot), name))
+        frames.append((self._header.encode(Opcode.SM_SLOT, slot, written.size), b""))
+        try:
+            pipe_byte = self.write_frames(frames)
+        except BaseException:
+            self.restore_sm_slot(slot)
+            raise
+        announced[slot] = written.name
+        return WrittenInfo(pipe_byte, written.size, None)
+
+    def send_sm_restore_slot(self, slot: int) -> WrittenInfo:
+        header = self._header.encode(Opcode.SM_RESTORE_SLOT, slot)
+        pipe_byte = self.write_frames(((header, b""),))
+        return WrittenInfo(pipe_byte, 0, None)
+
+    def _reply_sm_restore_slot(self, slot: int) -> None:
+        if self._disable_restore_sm:
+            return
+
+        name = self._peer_slots[slot].encode(encoding=self._encoding)
+        if not self._queue_restore(name):
+            self.send_sm_restore_slot(slot)
+
+    def recv_sm_open(self, header: HeaderPacket, name: bytes) -> None:
+        assert header.pipe_data_size >= 1
+        assert header.pipe_data_size == len(name)
+        slot = header.sm_data_size
+        if slot >= len(self._peer_slots):
+            self._peer_slots.extend([""] * (slot + 1 - len(self._peer_slots)))
+        self._peer_slots[slot] = str(name, encoding=self._encoding)
+
+    def recv_sm_slot(self, header: HeaderPacket) -> bytes:
+        assert header.sm_data_size >= 1
+        slot = header.pipe_data_size
+        result = self.read_sm(self._peer_slots[slot], header.sm_data_size)
+        self._reply_sm_restore_slot(slot)
+        return result
+
+    def recv_sm_restore_slot(self, header: HeaderPacket) -> None:
+        assert header.sm_data_size == 0
+        self.restore_sm_slot(header.pipe_data_size)
+
+    def _lease_slot(self, header: HeaderPacket) -> Lease:
+        assert header.sm_data_size >= 1
+        slot = header.pipe_data_size
+        view, unpin = self.lease_sm(self._peer_slots[slot], header.sm_data_size)
+
+        def _release() -> None:
+            unpin()
+            self._reply_sm_restore_slot(slot)
+
+        return Lease(header, view, _release)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+from abc import ABC, abstractmethod
+from typing import Callable, Deque, List, Optional, Sequence, Tuple
+
+from smipc.buffer import ReadableBuffer
+from smipc.pipe.duplex import FullDuplexPipe
+from smipc.protocols.decoder import Frame, FrameDecoder
+from smipc.protocols.handshake import Capabilities
+from smipc.protocols.header import AnyHeader, HeaderPacket
+from smipc.protocols.interface import SmInterface, WrittenInfo
+from smipc.protocols.options import ProtocolOptions
+from smipc.sm.ring import RingReader, RingWriter
+from smipc.sm.written import SmWritten
+
+
+class ProtocolState(SmInterface, ABC):
+    """
+    The state shared by the transport modes of the protocol.
+
+    Each mode is a mixin that keeps its own state, and reaches the other modes
+    through the methods declared here.
+    """
+
+    _pipe: FullDuplexPipe
+    _encoding: str
+    _options: ProtocolOptions
+    _force_sm_over_pipe: bool
+    _disable_restore_sm: bool
+    _header: AnyHeader
+    _peer_header: AnyHeader
+    _writer_size: int
+    _pipe_direct_threshold: int
+    _decoder: FrameDecoder
+    _pending: Deque[Tuple[HeaderPacket, bytes]]
+    _peer_capabilities: Optional[Capabilities]
+    _ring_writer: Optional[RingWriter]
+    _ring_reader: Optional[RingReader]
+
+    @abstractmethod
+    def _calc_pipe_direct_threshold(self) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def write_frames(
+        self,
+        frames: Sequence[Tuple[bytes, ReadableBuffer]],
+        atomic=True,
+        timeout: Optional[float] = 0.0,
+    ) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def read_frame(self, started=False) -> Frame:
+        raise NotImplementedError
+
+    @abstractmethod
+    def recv_frame(self, frame: Frame) -> Optional[bytes]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def poll_restore(self, timeout: Optional[float] = None) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _send_now(self, data: ReadableBuffer, timeout: Optional[float]) -> WrittenInfo:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _retry_full(
+        self,
+        send_sm: Callable[[], WrittenInfo],
+        timeout: Optional[float],
+    ) -> WrittenInfo:
+        raise NotImplementedError
+
+    @abstractmethod
+    def send_sm_written(self, written: SmWritten) -> WrittenInfo:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _abort_reserved(self, written: SmWritten) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def send_sm_restore(
+        self,
+        sm_name: bytes,
+        timeout: Optional[float] = 0.0,
+    ) -> WrittenInfo:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _reply_sm_restore(self, sm_name: bytes) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _queue_restore(self, sm_name: bytes) -> bool:
+        """Delay handing the segment back, or return ``False`` if it is not batched."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _take_pending(self, result: List[bytes]) -> None:
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def ring_direct_size(self) -> int:
+        raise NotImplementedError
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+from dataclasses import dataclass
+from typing import Optional
+
+from smipc.protocols.header import MAX_SM_DATA_SIZE
+from smipc.sm.backend import SharedMemoryBackend
+from smipc.sm.copier import ParallelCopier
+from smipc.variables import (
+    DEFAULT_ARENA_ALIGNMENT,
+    DEFAULT_ATTACH_CACHE_SIZE,
+    DEFAULT_COALESCE_DELAY,
+    DEFAULT_DECODER_BUFFER_SIZE,
+    DEFAULT_PIPE_WRITE_TIMEOUT,
+    DEFAULT_PREWARM_COUNT,
+    DEFAULT_RESTORE_DELAY,
+    DEFAULT_SCATTER_CHUNK_SIZE,
+    INFINITY_QUEUE_SIZE,
+)
+
+
+@dataclass(frozen=True)
+class ProtocolOptions:
+    """
+    Tuning of a channel, from the pipe to the shared memory pool.
+
+    The servers and clients hand it unchanged to the protocol, which passes
+    each group of fields to the transport mode that uses it.
+    """
+
+    # Pipe and framing
+    pipe_capacity: Optional[int] = None
+    pipe_direct_threshold: Optional[int] = None
+    decoder_buffer_size: int = DEFAULT_DECODER_BUFFER_SIZE
+    write_timeout: Optional[float] = DEFAULT_PIPE_WRITE_TIMEOUT
+
+    # Handshake
+    handshake: bool = False
+    max_message_size: Optional[int] = None
+
+    # Shared memory pool
+    backend: Optional[SharedMemoryBackend] = None
+    copier: Optional[ParallelCopier] = None
+    attach_cache_size: int = DEFAULT_ATTACH_CACHE_SIZE
+    max_per_class: int = INFINITY_QUEUE_SIZE
+    max_bytes: int = INFINITY_QUEUE_SIZE
+    idle_ttl: Optional[float] = None
+    max_waiting_bytes: int = INFINITY_QUEUE_SIZE
+    min_free_bytes: int = 0
+    prewarm_size: Optional[int] = None
+    prewarm_count: int = DEFAULT_PREWARM_COUNT
+    prefault: bool = False
+    lock_pages: bool = False
+    refill: bool = False
+
+    # Transport modes
+    scatter_chunk_size: int = DEFAULT_SCATTER_CHUNK_SIZE
+    arena_size: Optional[int] = None
+    arena_alignment: int = DEFAULT_ARENA_ALIGNMENT
+    ring_size: Optional[int] = None
+    ring_timeout: Optional[float] = None
+    slot_ids: bool = False
+
+    # Batching
+    coalesce_bytes: Optional[int] = None
+    coalesce_delay: float = DEFAULT_COALESCE_DELAY
+    restore_batch: Optional[int] = None
+    restore_delay: float = DEFAULT_RESTORE_DELAY
+
+    def __post_init__(self):
+        if self.pipe_direct_threshold is not None and self.pipe_direct_threshold < 0:
+            raise ValueError("The 'pipe_direct_threshold' must not be negative")
+        if not 0 < self.scatter_chunk_size <= MAX_SM_DATA_SIZE:
+            raise ValueError(
+                f"The 'scatter_chunk_size' must be in the range 1 to {MAX_SM_DATA_SIZE}"
+            )
+        if self.max_message_size is not None and self.max_message_size <= 0:
+            raise ValueError("The 'max_message_size' must be greater than 0")
+        if self.coalesce_bytes is not None and self.coalesce_bytes <= 0:
+            raise ValueError("The 'coalesce_bytes' must be greater than 0")
+        if self.restore_batch is not None and self.restore_batch <= 0:
+            raise ValueError("The 'restore_batch' must be greater than 0")
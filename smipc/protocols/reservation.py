@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Callable, List, Optional
+from weakref import ref
+
+from smipc.sm.written import SmWritten
+
+
+class Reservation:
+    """
+    A region of an outgoing shared memory segment, written in place by the producer.
+
+    :meth:`commit` sends the region without copying it, and :meth:`abort` hands
+    the segment back to the pool. When used as a context manager, the region is
+    committed on success and aborted when an exception is raised.
+    The arrays returned by :meth:`ndarray` must be dropped before the commit or
+    the abort, otherwise :class:`BufferError` is raised and the region stays held.
+    Nothing must write to the view (or to other objects created from it) after commit.
+    """
+
+    def __init__(
+        self,
+        written: SmWritten,
+        view: memoryview,
+        commit: Callable[[SmWritten], Any],
+        abort: Callable[[SmWritten], None],
+    ):
+        self._written = written
+        self._view: Optional[memoryview] = view
+        self._commit = commit
+        self._abort = abort
+        self._arrays: List[ref] = list()
+
+    def __repr__(self):
+        state = "closed" if self.closed else f"{self._written.size} bytes"
+        return f"<{type(self).__name__} name={self._written.name!r} {state}>"
+
+    @property
+    def written(self):
+        return self._written
+
+    @property
+    def closed(self) -> bool:
+        return self._view is None
+
+    @property
+    def view(self) -> memoryview:
+        if self._view is None:
+            raise ValueError("The reservation has already been committed or aborted")
+        return self._view
+
+    @property
+    def nbytes(self) -> int:
+        return self._written.size
+
+    def ndarray(self, dtype: Any = "uint8", shape: Any = None):
+        """Return a writable numpy array over the view, without copying."""
+        import numpy as np
+
+        array = np.frombuffer(self.view, dtype=dtype)
+        if shape is not None:
+            array = array.reshape(shape)
+        self._arrays.append(ref(array))
+        return array
+
+    def _close(self) -> None:
+        view = self.view
+
+        alive = sum(1 for array in self._arrays if array() is not None)
+        if alive >= 1:
+            raise BufferError(f"{alive} arrays of the reservation still exist")
+        self._arrays.clear()
+
+        view.release()
+        self._view = None
+
+    def commit(self, nbytes: Optional[int] = None):
+        """Send the first ``nbytes`` bytes of the region (all of them by default)."""
+        size = self._written.size if nbytes is None else nbytes
+        if not 1 <= size <= self._written.size:
+            raise ValueError(f"The 'nbytes' must be in [1, {self._written.size}]")
+
+        self._close()
+        offset = self._written.offset
+        written = self._written
+        return self._commit(
+            SmWritten(written.name, offset, offset + size, written.slot)
+        )
+
+    def abort(self) -> None:
+        if self._view is None:
+            return
+        self._close()
+        self._abort(self._written)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            self.abort()
+        elif not self.closed:
+            self.commit()
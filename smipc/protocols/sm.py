@@ -2,14 +2,22 @@
 
 from os import PathLike
 from threading import Event
-from typing import Optional, Union
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
 
+from smipc.buffer import ReadableBuffer, WritableBuffer
 from smipc.decorators.override import override
 from smipc.pipe.duplex import FullDuplexPipe
+from smipc.pipe.opener import PipeOpener
 from smipc.protocols.base import BaseProtocol
+from smipc.protocols.options import ProtocolOptions
+from smipc.sm.arena import ArenaWritten, SharedMemoryArena
+from smipc.sm.cache import SharedMemoryCache
 from smipc.sm.queue import SharedMemoryQueue
 from smipc.sm.written import SmWritten
-from smipc.variables import DEFAULT_ENCODING, INFINITY_QUEUE_SIZE
+from smipc.variables import (
+    DEFAULT_ENCODING,
+    INFINITY_QUEUE_SIZE,
+)
 
 
 class SmProtocol(BaseProtocol):
@@ -18,14 +26,57 @@ class SmProtocol(BaseProtocol):
         pipe: FullDuplexPipe,
         encoding=DEFAULT_ENCODING,
         max_queue=INFINITY_QUEUE_SIZE,
+        *,
+        options: Optional[ProtocolOptions] = None,
+        segment_tag="",
     ):
         super().__init__(
             pipe=pipe,
             encoding=encoding,
             force_sm_over_pipe=False,
             disable_restore_sm=False,
+            options=options,
+            segment_tag=segment_tag,
+        )
+        options = self._options
+        self._sms = SharedMemoryQueue(
+            max_queue,
+            max_per_class=options.max_per_class,
+            prefault=options.prefault,
+            lock_pages=options.lock_pages,
+            backend=options.backend,
+            max_bytes=options.max_bytes,
+            idle_ttl=options.idle_ttl,
+            max_waiting_bytes=options.max_waiting_bytes,
+            min_free_bytes=options.min_free_bytes,
+            tag=segment_tag,
+            copier=options.copier,
         )
-        self._sms = SharedMemoryQueue(max_queue)
+        self._attached = SharedMemoryCache(options.attach_cache_size, options.copier)
+        self._arena: Optional[SharedMemoryArena] = None
+        self._peer_arenas: Dict[int, str] = dict()
+
+        if options.arena_size is not None:
+            self._arena = SharedMemoryArena(
+                0,
+                options.arena_size,
+                options.arena_alignment,
+                options.backend,
+                segment_tag,
+            )
+
+        if (
+            options.idle_ttl is not None
+            or options.max_waiting_bytes >= 0
+            or options.min_free_bytes > 0
+        ):
+            self._sms.start_trim()
+
+        if options.prewarm_size is not None:
+            if options.refill:
+                self._sms.start_refill(options.prewarm_size, options.prewarm_count)
+            else:
+                self._sms.prewarm(options.prewarm_size, options.prewarm_count)
 
     @classmethod
     def from_fifo(
@@ -38,6 +89,9 @@ class SmProtocol(BaseProtocol):
         *,
         interval=0.001,
         blocking: Optional[Event] = None,
+        opener: Optional[PipeOpener] = None,
+        options: Optional[ProtocolOptions] = None,
+        segment_tag="",
     ):
         pipe = FullDuplexPipe.from_fifo(
             writer_path,
@@ -45,22 +99,120 @@ class SmProtocol(BaseProtocol):
             open_timeout,
             interval=interval,
             blocking=blocking,
+            pipe_capacity=options.pipe_capacity if options is not None else None,
+            opener=opener,
         )
-        return cls(pipe=pipe, encoding=encoding, max_queue=max_queue)
+        return cls(
+            pipe=pipe,
+            encoding=encoding,
+            max_queue=max_queue,
+            options=options,
+            segment_tag=segment_tag,
+        )
+
+    @property
+    def sms(self):
+        return self._sms
+
+    @property
+    def attached(self):
+        return self._attached
+
+    @property
+    def arena(self):
+        return self._arena
 
     @override
     def close_sm(self) -> None:
+        self._sms.stop_refill()
+        self._sms.stop_trim()
+        self._attached.clear()
         self._sms.clear()
+        if self._arena is not None:
+            self._arena.close()
 
     @override
-    def write_sm(self, data: bytes) -> SmWritten:
+    def write_sm(self, data: ReadableBuffer) -> SmWritten:
         return self._sms.write(data)
 
     @override
-    def read_sm(self, name: bytes, size: int) -> bytes:
-        sm_name = str(name, encoding=self._encoding)
-        return SharedMemoryQueue.read(sm_name, size=size)
+    def reserve_sm(self, size: int) -> Tuple[SmWritten, memoryview]:
+        written = self._sms.reserve(size)
+        buf = self._sms.find_working(str(written.name)).buf
+        assert buf is not None
+        return written, buf[written.offset : written.end]
+
+    @override
+    def write_sm_scatter(
+        self, data: ReadableBuffer, chunk_size: int
+    ) -> List[SmWritten]:
+        return self._sms.write_scatter(data, chunk_size)
+
+    def _decode_name(self, name: Union[str, bytes]) -> str:
+        if isinstance(name, str):
+            return name  # Already decoded by the slot table.
+        return str(name, encoding=self._encoding)
+
+    @override
+    def read_sm(self, name: Union[str, bytes], size: int) -> bytes:
+        return self._attached.read(self._decode_name(name), size=size)
+
+    @override
+    def read_sm_into(
+        self,
+        name: Union[str, bytes],
+        size: int,
+        buffer: WritableBuffer,
+    ) -> None:
+        self._attached.read_into(self._decode_name(name), buffer, size=size)
+
+    @override
+    def lease_sm(
+        self,
+        name: Union[str, bytes],
+        size: int,
+    ) -> Tuple[memoryview, Callable[[], None]]:
+        return self._attached.lease(self._decode_name(name), 0, size)
 
     @override
     def restore_sm(self, name: bytes) -> None:
         self._sms.restore(str(name, encoding=self._encoding))
+
+    @override
+    def restore_sm_slot(self, slot: int) -> None:
+        self._sms.restore_slot(slot)
+
+    @override
+    def restore_sm_many(self, names: Sequence[bytes]) -> None:
+        self._sms.restore_many(str(name, encoding=self._encoding) for name in names)
+
+    @override
+    def write_arena(self, data: ReadableBuffer) -> Optional[ArenaWritten]:
+        if self._arena is None:
+            return None
+        return self._arena.write(data)
+
+    @override
+    def arena_name(self, arena_id: int) -> bytes:
+        assert self._arena is not None
+        assert self._arena.arena_id == arena_id
+        return self._arena.name.encode(encoding=self._encoding)
+
+    @override
+    def open_arena(self, arena_id: int, name: bytes) -> None:
+        self._peer_arenas[arena_id] = str(name, encoding=self._encoding)
+
+    @override
+    def lease_arena(
+        self,
+        written: ArenaWritten,
+    ) -> Tuple[memoryview, Callable[[], None]]:
+        name = self._peer_arenas.get(written.arena_id)
+        if name is None:
+            raise ValueError(f"Unknown arena: {written.arena_id}")
+        return self._attached.lease(name, written.offset, written.size)
+
+    @override
+    def free_arena(self, written: ArenaWritten) -> None:
+        assert self._arena is not None
+        self._arena.free(written)
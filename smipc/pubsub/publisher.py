@@ -4,7 +4,9 @@ import os
 from threading import Event
 from typing import Optional
 
+from smipc.buffer import ReadableBuffer
 from smipc.decorators.override import override
+from smipc.pipe.opener import PipeOpener
 from smipc.pipe.temp import TemporaryPipe
 from smipc.protocols.base import ProtocolInterface, WrittenInfo
 from smipc.protocols.sm import SmProtocol
@@ -30,6 +32,7 @@ class Publisher(ProtocolInterface):
         *,
         interval=0.001,
         blocking: Optional[Event] = None,
+        opener: Optional[PipeOpener] = None,
     ):
         p2s_path = prefix + p2s_suffix
         s2p_path = prefix + s2p_suffix
@@ -54,6 +57,7 @@ class Publisher(ProtocolInterface):
             max_queue=max_queue,
             interval=interval,
             blocking=blocking,
+            opener=opener,
         )
 
     def cleanup(self) -> None:
@@ -69,5 +73,5 @@ class Publisher(ProtocolInterface):
         return self._proto.recv()
 
     @override
-    def send(self, data: bytes) -> WrittenInfo:
+    def send(self, data: ReadableBuffer) -> WrittenInfo:
         return self._proto.send(data)
@@ -3,7 +3,9 @@
 import os
 from typing import Optional
 
+from smipc.buffer import ReadableBuffer
 from smipc.decorators.override import override
+from smipc.pipe.opener import PipeOpener
 from smipc.protocols.base import ProtocolInterface, WrittenInfo
 from smipc.protocols.sm import SmProtocol
 from smipc.variables import (
@@ -23,6 +25,8 @@ class Subscriber(ProtocolInterface):
         encoding=DEFAULT_ENCODING,
         p2s_suffix=SERVER_TO_CLIENT_SUFFIX,
         s2p_suffix=CLIENT_TO_SERVER_SUFFIX,
+        *,
+        opener: Optional[PipeOpener] = None,
     ):
         p2s_path = prefix + p2s_suffix
         s2p_path = prefix + s2p_suffix
@@ -38,6 +42,7 @@ class Subscriber(ProtocolInterface):
             open_timeout=open_timeout,
             encoding=encoding,
             max_queue=max_queue,
+            opener=opener,
         )
 
     @override
@@ -49,5 +54,5 @@ class Subscriber(ProtocolInterface):
         return self._proto.recv()
 
     @override
-    def send(self, data: bytes) -> WrittenInfo:
+    def send(self, data: ReadableBuffer) -> WrittenInfo:
         return self._proto.send(data)
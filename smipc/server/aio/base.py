@@ -5,8 +5,10 @@ from asyncio import get_event_loop, run_coroutine_threadsafe
 from typing import Optional
 from weakref import ReferenceType
 
+from smipc.buffer import WritableBuffer
 from smipc.decorators.override import override
 from smipc.pipe.temp_pair import TemporaryPipePair
+from smipc.protocols.options import ProtocolOptions
 from smipc.protocols.sm import SmProtocol
 from smipc.server.base import (
     BaseServer,
@@ -14,7 +16,9 @@ from smipc.server.base import (
     create_pipe,
     create_proto,
     get_path_pair,
+    write_owner_manifest,
 )
+from smipc.sm.backend import make_segment_tag
 from smipc.variables import (
     CLIENT_TO_SERVER_SUFFIX,
     DEFAULT_ENCODING,
@@ -24,19 +28,21 @@ from smipc.variables import (
 
 
 def _aio_channel_reader(channel: "AioChannel") -> None:
-    header, data = channel.proto.recv_with_header()
-    if data is None:
+    # Dispatch every message that arrived together with a single read.
+    messages = channel.proto.recv_many()
+    if not messages:
         return
 
     base = channel.base
-    if base is not None:
-        assert isinstance(base, AioServer)
-        coro = base.on_recv(channel, data)
-    else:
-        coro = channel.on_recv(data)
-
     loop = get_event_loop()
-    run_coroutine_threadsafe(coro, loop)
+
+    for data in messages:
+        if base is not None:
+            assert isinstance(base, AioServer)
+            coro = base.on_recv(channel, data)
+        else:
+            coro = channel.on_recv(data)
+        run_coroutine_threadsafe(coro, loop)
 
 
 class AioChannelInterface(ABC):
@@ -75,6 +81,24 @@ class AioChannel(Channel, AioChannelInterface):
             f"{type(self).__name__} requires data to be received through callbacks"
         )
 
+    @override
+    def recv_many(self):
+        raise RuntimeError(
+            f"{type(self).__name__} requires data to be received through callbacks"
+        )
+
+    @override
+    def recv_into(self, buffer: WritableBuffer):
+        raise RuntimeError(
+            f"{type(self).__name__} requires data to be received through callbacks"
+        )
+
+    @override
+    def recv_lease(self):
+        raise RuntimeError(
+            f"{type(self).__name__} requires data to be received through callbacks"
+        )
+
     @override
     async def on_recv(self, data: bytes) -> None:
         pass
@@ -104,6 +128,7 @@ class AioClient(AioChannel):
         max_queue=INFINITY_QUEUE_SIZE,
         s2c_suffix=SERVER_TO_CLIENT_SUFFIX,
         c2s_suffix=CLIENT_TO_SERVER_SUFFIX,
+        options: Optional[ProtocolOptions] = None,
     ):
         paths = get_path_pair(
             root=root,
@@ -112,8 +137,20 @@ class AioClient(AioChannel):
             s2c_suffix=s2c_suffix,
             c2s_suffix=c2s_suffix,
         )
-        pipe = create_pipe(paths, blocking=blocking, no_faker=True)
-        proto = create_proto(pipe, encoding, max_queue)
+        pipe = create_pipe(
+            paths,
+            blocking=blocking,
+            no_faker=True,
+            pipe_capacity=options.pipe_capacity if options is not None else None,
+        )
+        proto = create_proto(
+            pipe,
+            encoding,
+            max_queue,
+            options=options,
+            segment_tag=make_segment_tag(key),
+        )
+        write_owner_manifest(root, proto)
         return cls(key, proto)
 
 
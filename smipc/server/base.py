@@ -2,15 +2,19 @@
 
 import os
 from abc import ABC, abstractmethod
-from typing import Dict, NamedTuple, Optional
+from typing import Dict, Iterable, NamedTuple, Optional
 from weakref import ReferenceType, ref
 
+from smipc.buffer import ReadableBuffer, WritableBuffer
 from smipc.decorators.override import override
 from smipc.pipe.duplex import FullDuplexPipe
 from smipc.pipe.reader import PipeReader
 from smipc.pipe.temp_pair import TemporaryPipePair
 from smipc.pipe.writer import PipeWriter
+from smipc.protocols.options import ProtocolOptions
 from smipc.protocols.sm import SmProtocol
+from smipc.sm.backend import make_segment_tag
+from smipc.sm.janitor import write_manifest
 from smipc.variables import (
     CLIENT_TO_SERVER_SUFFIX,
     DEFAULT_ENCODING,
@@ -51,7 +55,13 @@ def create_fifos(paths: PathPair, mode=DEFAULT_FILE_MODE):
     return TemporaryPipePair(s2c_path, c2s_path, mode)
 
 
-def create_pipe(paths: PathPair, blocking=False, *, no_faker=False):
+def create_pipe(
+    paths: PathPair,
+    blocking=False,
+    *,
+    no_faker=False,
+    pipe_capacity: Optional[int] = None,
+):
     s2c_path = paths.s2c
     c2s_path = paths.c2s
 
@@ -74,6 +84,14 @@ def create_pipe(paths: PathPair, blocking=False, *, no_faker=False):
             _fake_writer_reader.close()
     # ------------------------------------------------------
 
+    if pipe_capacity is not None:
+        try:
+            writer.pipe_capacity = pipe_capacity
+        except:  # noqa
+            writer.close()
+            reader.close()
+            raise
+
     return FullDuplexPipe(writer, reader)
 
 
@@ -81,14 +99,24 @@ def create_proto(
     pipe: FullDuplexPipe,
     encoding=DEFAULT_ENCODING,
     max_queue=INFINITY_QUEUE_SIZE,
+    *,
+    options: Optional[ProtocolOptions] = None,
+    segment_tag="",
 ):
     return SmProtocol(
         pipe=pipe,
         encoding=encoding,
         max_queue=max_queue,
+        options=options,
+        segment_tag=segment_tag,
     )
 
 
+def write_owner_manifest(root: str, proto: SmProtocol) -> str:
+    """Record the segments of the channel, so that ``smipc gc`` finds them."""
+    return write_manifest(root, proto.sms.tag, [proto.sms.storage_path], proto)
+
+
 class Channel:
     def __init__(
         self,
@@ -138,8 +166,30 @@ class Channel:
     def recv(self):
         return self._proto.recv()
 
-    def send(self, data: bytes):
-        return self._proto.send(data)
+    def recv_many(self):
+        return self._proto.recv_many()
+
+    def recv_into(self, buffer: WritableBuffer):
+        return self._proto.recv_into(buffer)
+
+    def recv_lease(self):
+        return self._proto.recv_lease()
+
+    def send(self, data: ReadableBuffer, timeout: Optional[float] = 0.0):
+        return self._proto.send(data, timeout)
+
+    def send_many(
+        self,
+        messages: Iterable[ReadableBuffer],
+        timeout: Optional[float] = 0.0,
+    ):
+        return self._proto.send_many(messages, timeout)
+
+    def flush(self, timeout: Optional[float] = 0.0):
+        return self._proto.flush(timeout)
+
+    def reserve(self, nbytes: int):
+        return self._proto.reserve(nbytes)
 
 
 class BaseClient(Channel):
@@ -166,6 +216,7 @@ class BaseClient(Channel):
         max_queue=INFINITY_QUEUE_SIZE,
         s2c_suffix=SERVER_TO_CLIENT_SUFFIX,
         c2s_suffix=CLIENT_TO_SERVER_SUFFIX,
+        options: Optional[ProtocolOptions] = None,
     ):
         paths = get_path_pair(
             root=root,
@@ -174,8 +225,20 @@ class BaseClient(Channel):
             s2c_suffix=s2c_suffix,
             c2s_suffix=c2s_suffix,
         )
-        pipe = create_pipe(paths, blocking=blocking, no_faker=True)
-        proto = create_proto(pipe, encoding, max_queue)
+        pipe = create_pipe(
+            paths,
+            blocking=blocking,
+            no_faker=True,
+            pipe_capacity=options.pipe_capacity if options is not None else None,
+        )
+        proto = create_proto(
+            pipe,
+            encoding,
+            max_queue,
+            options=options,
+            segment_tag=make_segment_tag(key),
+        )
+        write_owner_manifest(root, proto)
         return cls(key, proto)
 
 
@@ -204,6 +267,7 @@ class BaseServer(BaseServerInterface):
         s2c_suffix=SERVER_TO_CLIENT_SUFFIX,
         c2s_suffix=CLIENT_TO_SERVER_SUFFIX,
         make_root=True,
+        options: Optional[ProtocolOptions] = None,
     ):
         if s2c_suffix == c2s_suffix:
             raise ValueError("The 's2c_suffix' and 'c2s_suffix' cannot be the same")
@@ -224,12 +288,17 @@ class BaseServer(BaseServerInterface):
         self._max_queue = max_queue
         self._s2c_suffix = s2c_suffix
         self._c2s_suffix = c2s_suffix
+        self._options = options if options is not None else ProtocolOptions()
         self._channels = dict()
 
     @property
     def root(self):
         return self._root
 
+    @property
+    def options(self):
+        return self._options
+
     def __getitem__(self, key: str):
         return self._channels.__getitem__(key)
 
@@ -251,6 +320,23 @@ class BaseServer(BaseServerInterface):
             c2s_suffix=self._c2s_suffix,
         )
 
+    def create_pipe(self, paths: PathPair, blocking=False, *, no_faker=False):
+        return create_pipe(
+            paths,
+            blocking=blocking,
+            no_faker=no_faker,
+            pipe_capacity=self._options.pipe_capacity,
+        )
+
+    def create_proto(self, pipe: FullDuplexPipe, segment_tag=""):
+        return create_proto(
+            pipe,
+            self._encoding,
+            self._max_queue,
+            options=self._options,
+            segment_tag=segment_tag,
+        )
+
     @override
     def on_create_channel(
         self,
@@ -266,15 +352,17 @@ class BaseServer(BaseServerInterface):
         # [WARNING] Do not change the calling order.
         paths = self.get_path_pair(key)
         fifos = create_fifos(paths, self._mode)
-        pipe = create_pipe(paths, blocking=blocking, no_faker=False)
-        proto = create_proto(pipe, self._encoding, self._max_queue)
+        pipe = self.create_pipe(paths, blocking=blocking, no_faker=False)
+        proto = self.create_proto(pipe, make_segment_tag(key))
+        write_owner_manifest(self._root, proto)
         # ------------------------------------------
         return self.on_create_channel(key, proto, ref(self), fifos)
 
     def create_client_channel(self, key: str, blocking=False):
         paths = self.get_path_pair(key, flip=True)
-        pipe = create_pipe(paths, blocking=blocking, no_faker=True)
-        proto = create_proto(pipe, self._encoding, self._max_queue)
+        pipe = self.create_pipe(paths, blocking=blocking, no_faker=True)
+        proto = self.create_proto(pipe, make_segment_tag(key))
+        write_owner_manifest(self._root, proto)
         return self.on_create_channel(key, proto, None, None)
 
     def open(self, key: str, blocking=False):
@@ -297,5 +385,28 @@ class BaseServer(BaseServerInterface):
     def recv(self, key: str):
         return self._channels[key].recv()
 
-    def send(self, key: str, data: bytes):
-        return self._channels[key].send(data)
+    def recv_many(self, key: str):
+        return self._channels[key].recv_many()
+
+    def recv_into(self, key: str, buffer: WritableBuffer):
+        return self._channels[key].recv_into(buffer)
+
+    def recv_lease(self, key: str):
+        return self._channels[key].recv_lease()
+
+    def send(self, key: str, data: ReadableBuffer, timeout: Optional[float] = 0.0):
+        return self._channels[key].send(data, timeout)
+
+    def send_many(
+        self,
+        key: str,
+        messages: Iterable[ReadableBuffer],
+        timeout: Optional[float] = 0.0,
+    ):
+        return self._channels[key].send_many(messages, timeout)
+
+    def flush(self, key: str, timeout: Optional[float] = 0.0):
+        return self._channels[key].flush(timeout)
+
+    def reserve(self, key: str, nbytes: int):
+        return self._channels[key].reserve(nbytes)
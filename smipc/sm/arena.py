@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+from bisect import bisect_left
+from mmap import PAGESIZE
+from multiprocessing.shared_memory import SharedMemory
+from struct import Struct
+from threading import Lock
+from typing import Dict, Final, List, NamedTuple, Optional
+from weakref import finalize
+
+from smipc.buffer import ReadableBuffer, buffer_nbytes, copy_buffer
+from smipc.sm.backend import SharedMemoryBackend
+from smipc.sm.size_class import round_up
+from smipc.sm.utils import create_shared_memory, destroy_shared_memory
+from smipc.variables import DEFAULT_ARENA_ALIGNMENT
+
+# noinspection SpellCheckingInspection
+ARENA_LOCATION_FORMAT: Final[str] = "@IQ"
+# |.................................| ^  | I = 4 byte unsigned int = arena id
+# |.................................|  ^ | Q = 8 byte unsigned long long = offset
+
+_ARENA_LOCATION: Final[Struct] = Struct(ARENA_LOCATION_FORMAT)
+
+
+class ArenaWritten(NamedTuple):
+    arena_id: int
+    offset: int
+    size: int
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.size
+
+    def encode_location(self) -> bytes:
+        return _ARENA_LOCATION.pack(self.arena_id, self.offset)
+
+    @classmethod
+    def decode_location(cls, data: ReadableBuffer, size: int) -> "ArenaWritten":
+        arena_id, offset = _ARENA_LOCATION.unpack(data)
+        return cls(arena_id, offset, size)
+
+
+class FreeListAllocator:
+    """
+    Best-fit allocator over the offsets of a fixed-size region.
+
+    The free blocks are kept sorted by offset, so that a released block is merged
+    with its free neighbors immediately.
+    """
+
+    _free: List[List[int]]
+    _allocated: Dict[int, int]
+
+    def __init__(self, capacity: int, alignment=DEFAULT_ARENA_ALIGNMENT):
+        if capacity <= 0:
+            raise ValueError("The 'capacity' argument must be greater than 0")
+        if alignment <= 0 or alignment & (alignment - 1) != 0:
+            raise ValueError("The 'alignment' argument must be a power of two")
+
+        self._capacity = capacity // alignment * alignment
+        self._alignment = alignment
+        self._free = [[0, self._capacity]] if self._capacity > 0 else []
+        self._allocated = dict()
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def alignment(self) -> int:
+        return self._alignment
+
+    @property
+    def used(self) -> int:
+        return sum(self._allocated.values())
+
+    @property
+    def available(self) -> int:
+        return self._capacity - self.used
+
+    @property
+    def allocated(self) -> int:
+        return len(self._allocated)
+
+    @property
+    def fragments(self) -> int:
+        return len(self._free)
+
+    def allocate(self, size: int) -> Optional[int]:
+        """Return the offset of a new block, or ``None`` if no free block fits."""
+        if size <= 0:
+            raise ValueError("The 'size' argument must be greater than 0")
+
+        size = round_up(size, self._alignment)
+        best: Optional[int] = None
+        for index, (_, free_size) in enumerate(self._free):
+            if free_size >= size and (best is None or free_size < self._free[best][1]):
+                best = index
+                if free_size == size:
+                    break
+
+        if best is None:
+            return None
+
+        block = self._free[best]
+        offset = block[0]
+        if block[1] == size:
+            del self._free[best]
+        else:
+            block[0] += size
+            block[1] -= size
+
+        self._allocated[offset] = size
+        return offset
+
+    def free(self, offset: int) -> None:
+        size = self._allocated.pop(offset)
+        index = bisect_left(self._free, [offset, 0])
+
+        merge_prev = index > 0 and sum(self._free[index - 1]) == offset
+        merge_next = index < len(self._free) and self._free[index][0] == offset + size
+
+        if merge_prev and merge_next:
+            self._free[index - 1][1] += size + self._free[index][1]
+            del self._free[index]
+        elif merge_prev:
+            self._free[index - 1][1] += size
+        elif merge_next:
+            self._free[index][0] = offset
+            self._free[index][1] += size
+        else:
+            self._free.insert(index, [offset, size])
+
+
+class SharedMemoryArena:
+    """
+    One large shared memory segment whose regions are sub-allocated per message.
+
+    Both sides map the segment only once, and each message costs an allocation
+    instead of creating or attaching a segment.
+    """
+
+    def __init__(
+        self,
+        arena_id: int,
+        size: int,
+        alignment=DEFAULT_ARENA_ALIGNMENT,
+        backend: Optional[SharedMemoryBackend] = None,
+        tag="",
+    ):
+        self._arena_id = arena_id
+        self._sm = create_shared_memory(round_up(size, PAGESIZE), backend, tag)
+        self._allocator = FreeListAllocator(self._sm.size, alignment)
+        self._lock = Lock()
+        self._finalizer = finalize(self, destroy_shared_memory, self._sm)
+
+    @property
+    def arena_id(self) -> int:
+        return self._arena_id
+
+    @property
+    def name(self) -> str:
+        return self._sm.name
+
+    @property
+    def size(self) -> int:
+        return self._sm.size
+
+    @property
+    def sm(self) -> SharedMemory:
+        return self._sm
+
+    @property
+    def allocator(self):
+        return self._allocator
+
+    def close(self) -> None:
+        self._finalizer()
+
+    def allocate(self, size: int) -> Optional[ArenaWritten]:
+        with self._lock:
+            offset = self._allocator.allocate(size)
+        if offset is None:
+            return None
+        return ArenaWritten(self._arena_id, offset, size)
+
+    def write(self, data: ReadableBuffer) -> Optional[ArenaWritten]:
+        size = buffer_nbytes(data)
+        written = self.allocate(size)
+        if written is None:
+            return None
+
+        buf = self._sm.buf
+        assert buf is not None
+        with buf[written.offset : written.end] as view:
+            copy_buffer(view, data)
+        return written
+
+    def free(self, written: ArenaWritten) -> None:
+        assert written.arena_id == self._arena_id
+        with self._lock:
+            self._allocator.free(written.offset)
@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+
+import mmap
+import os
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from multiprocessing.shared_memory import SharedMemory
+from secrets import token_hex
+from typing import Final, Optional
+from weakref import finalize
+from zlib import crc32
+
+from smipc.sm.size_class import round_up
+from smipc.variables import DEFAULT_FILE_MODE
+
+DEFAULT_HUGETLBFS_ROOT: Final[str] = "/dev/hugepages"
+DEFAULT_POSIX_SHM_ROOT: Final[str] = "/dev/shm"
+SEGMENT_FILE_PREFIX: Final[str] = "smipc_"
+SEGMENT_TOKEN_BYTES: Final[int] = 4
+
+
+def make_segment_tag(key: str) -> str:
+    """A short tag of the channel, which is safe to use in the segment names."""
+    return f"{crc32(key.encode()):08x}"
+
+
+def make_segment_name(tag="") -> str:
+    """
+    A new segment name, ``smipc_<pid>_<tag>_<token>``.
+
+    The PID of the owner is part of the name, so that the segments left behind
+    by a dead process can be found. It fits the 31 characters of macOS.
+    """
+
+    token = token_hex(SEGMENT_TOKEN_BYTES)
+    if tag:
+        return f"{SEGMENT_FILE_PREFIX}{os.getpid()}_{tag}_{token}"
+    return f"{SEGMENT_FILE_PREFIX}{os.getpid()}_{token}"
+
+
+def parse_segment_pid(name: str) -> Optional[int]:
+    """The PID of the owner of the segment, or ``None`` if it is not ours."""
+    basename = os.path.basename(name)
+    if not basename.startswith(SEGMENT_FILE_PREFIX):
+        return None
+    pid = basename[len(SEGMENT_FILE_PREFIX) :].split("_", 1)[0]
+    if not pid.isdigit():
+        return None
+    return int(pid)
+
+
+def advise_huge_pages(sm: SharedMemory) -> bool:
+    """Ask for transparent huge pages (``MADV_HUGEPAGE``), if supported."""
+    mapped = getattr(sm, "_mmap", None)
+    advice = getattr(mmap, "MADV_HUGEPAGE", None)
+    if mapped is None or advice is None or not hasattr(mapped, "madvise"):
+        return False
+
+    try:
+        mapped.madvise(advice)
+    except OSError:
+        return False
+    return True
+
+
+@lru_cache
+def get_huge_page_size(meminfo="/proc/meminfo") -> int:
+    """The default size of the hugetlbfs pages, in bytes."""
+    with open(meminfo) as f:
+        for line in f:
+            if line.startswith("Hugepagesize:"):
+                value, unit = line.split(":", 1)[1].split()
+                assert unit == "kB"
+                return int(value) * 1024
+    raise NotImplementedError("Huge pages are not supported")
+
+
+try:
+    from _posixshmem import shm_open as _shm_open  # noqa
+    from _posixshmem import shm_unlink as _shm_unlink  # noqa
+except ImportError:  # pragma: no cover
+
+    def _shm_open(path: str, flags: int, mode: int) -> int:
+        return os.open(DEFAULT_POSIX_SHM_ROOT + path, flags, mode)
+
+    def _shm_unlink(path: str) -> None:
+        os.unlink(DEFAULT_POSIX_SHM_ROOT + path)
+
+
+def _unlink_quietly(unlink, path: str) -> None:
+    try:
+        unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class _MappedSharedMemory(SharedMemory):
+    """
+    A segment mapped from its own file descriptor.
+
+    Unlike :class:`SharedMemory`, it never talks to the resource tracker.
+    A created segment is unlinked when the object is garbage collected or the
+    interpreter exits, unless :meth:`unlink` was already called.
+    """
+
+    _finalizer: Optional[finalize] = None
+
+    def _map(self, name: str, create: bool, size: int) -> None:
+        if create and size <= 0:
+            raise ValueError("The 'size' must be a positive number")
+
+        flags = os.O_RDWR | (os.O_CREAT | os.O_EXCL if create else 0)
+        fd = self._open(name, flags)
+        try:
+            if create:
+                os.ftruncate(fd, size)
+            else:
+                size = os.fstat(fd).st_size
+            mapped = mmap.mmap(fd, size)
+        except:  # noqa
+            os.close(fd)
+            if create:
+                self._remove(name)
+            raise
+
+        self._name = name
+        self._fd = fd
+        self._mmap = mapped
+        self._size = size
+        self._buf = memoryview(mapped)
+        self._flags = flags
+        self._mode = DEFAULT_FILE_MODE
+        if create:
+            self._finalizer = finalize(self, _unlink_quietly, self._remove, name)
+
+    @staticmethod
+    def _open(name: str, flags: int) -> int:
+        raise NotImplementedError
+
+    @staticmethod
+    def _remove(name: str) -> None:
+        raise NotImplementedError
+
+    def unlink(self) -> None:
+        if self._finalizer is not None:
+            self._finalizer.detach()
+        self._remove(self._name)
+
+
+class NativeSharedMemory(_MappedSharedMemory):
+    """POSIX shared memory (``shm_open``), without the resource tracker."""
+
+    def __init__(self, name: str, create=False, size=0):
+        self._map("/" + name, create, size)
+
+    @staticmethod
+    def _open(name: str, flags: int) -> int:
+        return _shm_open(name, flags, mode=DEFAULT_FILE_MODE)
+
+    @staticmethod
+    def _remove(name: str) -> None:
+        _shm_unlink(name)
+
+
+class FileSharedMemory(_MappedSharedMemory):
+    """
+    Shared memory backed by a memory-mapped file, named by its absolute path.
+
+    It behaves like :class:`SharedMemory`, but the segment can live in any
+    directory (e.g. a tmpfs or hugetlbfs mount) instead of ``/dev/shm``.
+    """
+
+    def __init__(self, path: str, create=False, size=0):
+        if not os.path.isabs(path):
+            raise ValueError("The 'path' must be an absolute path")
+        self._map(path, create, size)
+
+    @staticmethod
+    def _open(name: str, flags: int) -> int:
+        return os.open(name, flags, DEFAULT_FILE_MODE)
+
+    @staticmethod
+    def _remove(name: str) -> None:
+        os.unlink(name)
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+
+def has_native_shared_memory() -> bool:
+    return os.name == "posix"
+
+
+def get_free_bytes(path: Optional[str]) -> Optional[int]:
+    """Free space of the file system that holds the segments, if it is known."""
+    if path is None:
+        return None
+    try:
+        stat = os.statvfs(path)
+    except (AttributeError, OSError):
+        return None
+    return stat.f_bavail * stat.f_frsize
+
+
+def is_file_segment_name(name: str) -> bool:
+    return os.path.isabs(name)
+
+
+def open_shared_memory(name: str) -> SharedMemory:
+    """Attach a segment created by any backend, which is known from its name."""
+    if is_file_segment_name(name):
+        return FileSharedMemory(name)
+    if has_native_shared_memory():
+        return NativeSharedMemory(name)
+    return SharedMemory(name=name)
+
+
+class SharedMemoryBackend(ABC):
+    @abstractmethod
+    def create(self, size: int, tag="") -> SharedMemory:
+        raise NotImplementedError
+
+    @property
+    def storage_path(self) -> Optional[str]:
+        """The directory whose file system holds the segments, if any."""
+        return None
+
+
+class PosixBackend(SharedMemoryBackend):
+    """
+    POSIX shared memory (``shm_open``), which lives in ``/dev/shm`` on Linux.
+
+    The segments bypass the resource tracker of :mod:`multiprocessing`, so no
+    tracker process is spawned and no message is sent per segment.
+    """
+
+    def __init__(self, huge_pages=False):
+        self._huge_pages = huge_pages
+
+    @property
+    def huge_pages(self) -> bool:
+        return self._huge_pages
+
+    @property
+    def storage_path(self) -> Optional[str]:
+        if os.path.isdir(DEFAULT_POSIX_SHM_ROOT):
+            return DEFAULT_POSIX_SHM_ROOT
+        return None
+
+    @staticmethod
+    def _create(name: str, size: int) -> SharedMemory:
+        if has_native_shared_memory():
+            return NativeSharedMemory(name, create=True, size=size)
+        return SharedMemory(name, create=True, size=size)
+
+    def create(self, size: int, tag="") -> SharedMemory:
+        while True:
+            try:
+                sm = self._create(make_segment_name(tag), size)
+            except FileExistsError:
+                continue
+            break
+
+        if self._huge_pages:
+            advise_huge_pages(sm)
+        return sm
+
+
+class DirectoryBackend(SharedMemoryBackend):
+    """Memory-mapped files in a directory, preferably on a tmpfs mount."""
+
+    def __init__(self, root: str, huge_pages=False, page_size=mmap.PAGESIZE):
+        if not os.path.isdir(root):
+            raise NotADirectoryError(f"'{root}' must be a directory")
+        if page_size <= 0:
+            raise ValueError("The 'page_size' must be a positive number")
+
+        self._root = os.path.abspath(root)
+        self._huge_pages = huge_pages
+        self._page_size = page_size
+
+    @property
+    def root(self) -> str:
+        return self._root
+
+    @property
+    def huge_pages(self) -> bool:
+        return self._huge_pages
+
+    @property
+    def page_size(self) -> int:
+        return self._page_size
+
+    @property
+    def storage_path(self) -> Optional[str]:
+        return self._root
+
+    def create(self, size: int, tag="") -> SharedMemory:
+        size = round_up(size, self._page_size)
+        while True:
+            path = os.path.join(self._root, make_segment_name(tag))
+            try:
+                sm = FileSharedMemory(path, create=True, size=size)
+            except FileExistsError:
+                continue
+            break
+
+        if self._huge_pages:
+            advise_huge_pages(sm)
+        return sm
+
+
+class HugetlbfsBackend(DirectoryBackend):
+    """Files on a hugetlbfs mount, whose sizes are rounded up to the huge pages."""
+
+    def __init__(self, root=DEFAULT_HUGETLBFS_ROOT, page_size: Optional[int] = None):
+        if page_size is None:
+            page_size = get_huge_page_size()
+        super().__init__(root, huge_pages=False, page_size=page_size)
+
+
+@lru_cache
+def get_default_backend() -> SharedMemoryBackend:
+    return PosixBackend()
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+import os
+from collections import OrderedDict
+from multiprocessing.shared_memory import SharedMemory
+from threading import Lock
+from typing import Callable, Optional, Tuple
+from weakref import finalize
+
+from smipc.buffer import WritableBuffer
+from smipc.sm.backend import open_shared_memory
+from smipc.sm.copier import ParallelCopier
+from smipc.variables import DEFAULT_ATTACH_CACHE_SIZE
+
+
+def is_attached_valid(sm: SharedMemory, end=0) -> bool:
+    """
+    Check that an attached segment still refers to the peer's current segment.
+
+    A segment that has been unlinked by its owner has no more links, and a segment
+    that has been recreated with a larger size no longer covers the range.
+    """
+
+    if sm.size < end:
+        return False
+
+    fd = getattr(sm, "_fd", -1)
+    if fd < 0:
+        return True  # Windows does not keep a file descriptor.
+
+    try:
+        return os.fstat(fd).st_nlink >= 1
+    except OSError:
+        return False
+
+
+def _close_quietly(sm: SharedMemory) -> None:
+    try:
+        sm.close()
+    except BufferError:
+        pass  # A view of the segment is still referenced by the user.
+
+
+class _Entry:
+    __slots__ = ("sm", "pins", "cached")
+
+    def __init__(self, sm: SharedMemory):
+        self.sm = sm
+        self.pins = 0
+        self.cached = True
+
+
+class SharedMemoryCache:
+    """
+    Bounded LRU cache of shared memory segments attached by the receiver.
+
+    Segments that are pinned by a lease are never closed, even when they are
+    evicted or invalidated; they are closed when the last lease is released.
+    """
+
+    _cache: "OrderedDict[str, _Entry]"
+
+    def __init__(
+        self,
+        max_size=DEFAULT_ATTACH_CACHE_SIZE,
+        copier: Optional[ParallelCopier] = None,
+    ):
+        if max_size < 1:
+            raise ValueError("The 'max_size' must be greater than 0")
+
+        self._max_size = max_size
+        self._copier = copier
+        self._cache = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._finalizer = finalize(self, self._cleanup, self._cache)
+
+    @staticmethod
+    def _cleanup(cache: "OrderedDict[str, _Entry]") -> None:
+        while cache:
+            _, entry = cache.popitem()
+            entry.cached = False
+            _close_quietly(entry.sm)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cleanup(self._cache)
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def size(self) -> int:
+        return len(self._cache)
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._cache
+
+    def _detach(self, entry: _Entry) -> None:
+        entry.cached = False
+        if entry.pins == 0:
+            _close_quietly(entry.sm)
+
+    def invalidate(self, name: str) -> None:
+        with self._lock:
+            entry = self._cache.pop(name, None)
+            if entry is not None:
+                self._detach(entry)
+
+    def _evict(self) -> None:
+        if len(self._cache) <= self._max_size:
+            return
+
+        unpinned = [name for name, entry in self._cache.items() if entry.pins == 0]
+        for name in unpinned[: len(self._cache) - self._max_size]:
+            self._detach(self._cache.pop(name))
+
+    def _attach(self, name: str, end: int) -> _Entry:
+        entry = self._cache.get(name)
+        if entry is not None:
+            if is_attached_valid(entry.sm, end):
+                self._cache.move_to_end(name)
+                self._hits += 1
+                return entry
+            del self._cache[name]
+            self._detach(entry)
+
+        self._misses += 1
+        entry = _Entry(open_shared_memory(name))
+        self._cache[name] = entry
+        self._evict()
+        return entry
+
+    def attach(self, name: str, end=0) -> SharedMemory:
+        """Return the segment attached under the name, attaching it on a miss."""
+        with self._lock:
+            return self._attach(name, end).sm
+
+    def _unpin(self, entry: _Entry) -> None:
+        with self._lock:
+            assert entry.pins >= 1
+            entry.pins -= 1
+            if entry.pins == 0:
+                if entry.cached:
+                    self._evict()
+                else:
+                    _close_quietly(entry.sm)
+
+    def lease(
+        self,
+        name: str,
+        offset: int,
+        size: int,
+    ) -> Tuple[memoryview, Callable[[], None]]:
+        """
+        Return a view over the range of the segment and the function to unpin it.
+
+        The view must be released before the unpin function is called.
+        """
+
+        if size <= 0:
+            raise ValueError("The 'size' argument must be greater than 0")
+
+        with self._lock:
+            entry = self._attach(name, offset + size)
+            entry.pins += 1
+
+        buf = entry.sm.buf
+        assert buf is not None
+        return buf[offset : offset + size], lambda: self._unpin(entry)
+
+    def read(self, name: str, offset=0, size: Optional[int] = None) -> bytes:
+        if size is not None and size <= 0:
+            raise ValueError("The 'size' argument must be greater than 0")
+
+        end = 0 if size is None else offset + size
+        sm = self.attach(name, end)
+        if size is None:
+            return bytes(sm.buf[offset:])  # type: ignore[index]
+        else:
+            return bytes(sm.buf[offset:end])  # type: ignore[index]
+
+    def read_into(
+        self,
+        name: str,
+        buffer: WritableBuffer,
+        offset=0,
+        size: Optional[int] = None,
+    ) -> int:
+        end = 0 if size is None else offset + size
+        sm = self.attach(name, end)
+        end = sm.size if size is None else end
+        if end <= offset:
+            raise ValueError("The 'size' argument must be greater than 0")
+
+        buf = sm.buf
+        assert buf is not None
+        with buf[offset:end] as source:
+            if self._copier is not None:
+                return self._copier.copy(buffer, source)
+            with memoryview(buffer) as view, view.cast("B") as target:
+                target[: end - offset] = source
+        return end - offset
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from mmap import PAGESIZE
+from threading import Lock
+from typing import List, Optional
+
+import numpy as np
+
+from smipc.buffer import ReadableBuffer, WritableBuffer, copy_buffer
+from smipc.sm.size_class import round_up
+from smipc.variables import (
+    DEFAULT_PARALLEL_COPY_CHUNK_SIZE,
+    DEFAULT_PARALLEL_COPY_THRESHOLD,
+)
+
+
+def _copy_chunk(dest: np.ndarray, src: np.ndarray) -> None:
+    np.copyto(dest, src)  # Releases the GIL while copying.
+
+
+class ParallelCopier:
+    """
+    Copy engine that splits large copies into chunks and runs them on a thread pool.
+
+    Each chunk is copied by :func:`numpy.copyto`, which releases the GIL, so the
+    chunks are copied on several cores at once. Copies smaller than
+    ``threshold`` bytes, or of non-contiguous buffers, are done in the caller.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        threshold=DEFAULT_PARALLEL_COPY_THRESHOLD,
+        chunk_size=DEFAULT_PARALLEL_COPY_CHUNK_SIZE,
+    ):
+        if max_workers is None:
+            max_workers = min(8, os.cpu_count() or 1)
+        if max_workers <= 0:
+            raise ValueError("The 'max_workers' must be greater than 0")
+        if chunk_size <= 0:
+            raise ValueError("The 'chunk_size' must be greater than 0")
+
+        self._max_workers = max_workers
+        self._threshold = threshold
+        self._chunk_size = chunk_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = Lock()
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    @property
+    def threshold(self) -> int:
+        return self._threshold
+
+    @property
+    def chunk_size(self) -> int:
+        return self._chunk_size
+
+    def close(self) -> None:
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # The caller copies one chunk too.
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(1, self._max_workers - 1),
+                    thread_name_prefix=type(self).__name__,
+                )
+            return self._executor
+
+    def _split(self, nbytes: int) -> List[int]:
+        per_worker = round_up(-(-nbytes // self._max_workers), PAGESIZE)
+        step = max(self._chunk_size, per_worker)
+        return list(range(0, nbytes, step)) + [nbytes]
+
+    def copy(self, dest: WritableBuffer, data: ReadableBuffer) -> int:
+        """Copy the data to the beginning of the destination, like ``copy_buffer``."""
+        with memoryview(data) as source:
+            nbytes = source.nbytes
+            parallel = (
+                self._max_workers >= 2
+                and nbytes >= self._threshold
+                and source.c_contiguous
+            )
+            if parallel:
+                try:
+                    raw = source.cast("B")
+                except (TypeError, ValueError):
+                    parallel = False
+            if not parallel:
+                return copy_buffer(dest, data)
+
+            with raw, memoryview(dest) as target, target.cast("B") as output:
+                if nbytes > output.nbytes:
+                    raise ValueError(
+                        f"The destination is too small: {output.nbytes} bytes"
+                    )
+                src = np.frombuffer(raw, np.uint8)
+                dst = np.frombuffer(output, np.uint8)
+                self._copy_chunks(dst, src, self._split(nbytes))
+                del src, dst
+        return nbytes
+
+    def _copy_chunks(self, dst: np.ndarray, src: np.ndarray, bounds: List[int]):
+        if len(bounds) <= 2:
+            _copy_chunk(dst[: bounds[-1]], src)
+            return
+
+        executor = self._get_executor()
+        futures: List[Future] = list()
+        for begin, end in zip(bounds[1:-1], bounds[2:]):
+            futures.append(executor.submit(_copy_chunk, dst[begin:end], src[begin:end]))
+        try:
+            _copy_chunk(dst[: bounds[1]], src[: bounds[1]])
+        finally:
+            for future in futures:
+                future.result()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+import mmap
+import platform
+from ctypes import CDLL, CFUNCTYPE, addressof, c_char, c_int, c_size_t, c_void_p
+from ctypes.util import find_library
+from functools import lru_cache
+from struct import pack
+from typing import Callable, Dict, Final, Optional
+
+_FENCE_CODES: Final[Dict[str, bytes]] = {
+    # mfence; ret
+    "x86_64": bytes((0x0F, 0xAE, 0xF0, 0xC3)),
+    "amd64": bytes((0x0F, 0xAE, 0xF0, 0xC3)),
+    # dmb ish; ret
+    "aarch64": pack("<II", 0xD5033BBF, 0xD65F03C0),
+    "arm64": pack("<II", 0xD5033BBF, 0xD65F03C0),
+}
+
+_STRONGLY_ORDERED_MACHINES: Final = ("x86_64", "amd64", "i386", "i686", "x86")
+
+
+@lru_cache
+def get_machine() -> str:
+    return platform.machine().lower()
+
+
+def is_strongly_ordered() -> bool:
+    """
+    Whether stores are never reordered with other stores, nor loads with loads.
+
+    This holds on x86 (TSO). Only a store followed by a load may be reordered.
+    """
+
+    return get_machine() in _STRONGLY_ORDERED_MACHINES
+
+
+@lru_cache
+def _load_fence() -> Optional[Callable[[], None]]:
+    code = _FENCE_CODES.get(get_machine())
+    prot_exec = getattr(mmap, "PROT_EXEC", None)
+    if code is None or prot_exec is None:
+        return None
+
+    try:
+        libc = CDLL(find_library("c"), use_errno=True)
+        mprotect = libc.mprotect
+    except (OSError, AttributeError):
+        return None
+
+    mprotect.argtypes = (c_void_p, c_size_t, c_int)
+    mprotect.restype = c_int
+
+    try:
+        page = mmap.mmap(-1, mmap.PAGESIZE, prot=mmap.PROT_READ | mmap.PROT_WRITE)
+    except OSError:
+        return None
+
+    page.write(code)
+    address = addressof(c_char.from_buffer(page))
+    if mprotect(address, mmap.PAGESIZE, mmap.PROT_READ | prot_exec) != 0:
+        return None  # Executable mappings are not allowed (e.g. W^X policies).
+
+    # The page stays mapped for the lifetime of the process,
+    # because the buffer exported above keeps the mmap object alive.
+    fence = CFUNCTYPE(None)(address)
+    setattr(fence, "_page", page)
+    return fence
+
+
+def has_memory_fence() -> bool:
+    return _load_fence() is not None
+
+
+def memory_fence() -> None:
+    """
+    Full memory barrier (``mfence`` on x86-64, ``dmb ish`` on AArch64).
+
+    All the loads and stores before the call are globally visible before any load
+    or store after it, which is what a store-then-load handshake between two
+    processes requires.
+    """
+
+    fence = _load_fence()
+    if fence is None:
+        raise NotImplementedError(f"No memory fence is available on '{get_machine()}'")
+    fence()
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+from secrets import token_hex
+from typing import Any, Final, Iterable, List, NamedTuple, Optional, Set
+from weakref import finalize
+
+from smipc.sm.backend import (
+    DEFAULT_POSIX_SHM_ROOT,
+    SEGMENT_FILE_PREFIX,
+    SEGMENT_TOKEN_BYTES,
+    parse_segment_pid,
+)
+
+MANIFEST_SUFFIX: Final[str] = ".owner"
+
+
+class OwnerManifest(NamedTuple):
+    pid: int
+    tag: str
+    storage_paths: List[str]
+
+
+def is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # It exists, but belongs to another user.
+    return True
+
+
+def is_manifest_name(name: str) -> bool:
+    return name.startswith(SEGMENT_FILE_PREFIX) and name.endswith(MANIFEST_SUFFIX)
+
+
+def write_manifest(
+    root: str,
+    tag: str,
+    storage_paths: Iterable[Optional[str]],
+    owner: Optional[Any] = None,
+) -> str:
+    """
+    Record that this process owns the segments of the channel, under its root.
+
+    With an ``owner``, the manifest is removed when the owner is garbage collected
+    or the interpreter exits normally, so only crashed processes leave it behind.
+    """
+
+    pid = os.getpid()
+    token = token_hex(SEGMENT_TOKEN_BYTES)
+    name = f"{SEGMENT_FILE_PREFIX}{pid}_{tag}_{token}{MANIFEST_SUFFIX}"
+    path = os.path.join(root, name)
+    paths = sorted({os.path.abspath(p) for p in storage_paths if p is not None})
+
+    with open(path, "w") as f:
+        json.dump({"pid": pid, "tag": tag, "storage_paths": paths}, f)
+
+    if owner is not None:
+        finalize(owner, remove_quietly, path)
+    return path
+
+
+def read_manifest(path: str) -> OwnerManifest:
+    with open(path) as f:
+        content = json.load(f)
+    return OwnerManifest(
+        pid=int(content["pid"]),
+        tag=str(content["tag"]),
+        storage_paths=[str(p) for p in content["storage_paths"]],
+    )
+
+
+def find_manifests(root: str) -> List[str]:
+    if not os.path.isdir(root):
+        return list()
+    names = filter(is_manifest_name, os.listdir(root))
+    return [os.path.join(root, name) for name in sorted(names)]
+
+
+def remove_quietly(path: str) -> bool:
+    try:
+        os.unlink(path)
+    except (FileNotFoundError, PermissionError):
+        return False
+    return True
+
+
+def find_orphans(
+    root: Optional[str] = None,
+    storage_paths: Iterable[str] = (),
+) -> List[str]:
+    """
+    Find the segments and manifests whose owner process is gone.
+
+    ``/dev/shm``, the given directories and those recorded in the manifests of
+    the channel root are searched. The PID is only meaningful within the same
+    PID namespace, so do not share the storage between containers.
+    """
+
+    directories: Set[str] = {os.path.abspath(p) for p in storage_paths}
+    if os.path.isdir(DEFAULT_POSIX_SHM_ROOT):
+        directories.add(DEFAULT_POSIX_SHM_ROOT)
+
+    manifests = find_manifests(root) if root else list()
+    orphans = list()
+    for path in manifests:
+        try:
+            manifest = read_manifest(path)
+        except (OSError, ValueError, KeyError, TypeError):
+            continue
+        directories.update(manifest.storage_paths)
+        if not is_process_alive(manifest.pid):
+            orphans.append(path)
+
+    for directory in sorted(directories):
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            continue
+        for name in names:
+            if name.endswith(MANIFEST_SUFFIX):
+                continue
+            pid = parse_segment_pid(name)
+            if pid is None or pid == os.getpid() or is_process_alive(pid):
+                continue
+            orphans.append(os.path.join(directory, name))
+
+    return orphans
+
+
+def collect_orphans(
+    root: Optional[str] = None,
+    storage_paths: Iterable[str] = (),
+    dry_run=False,
+) -> List[str]:
+    """Unlink the orphaned segments and manifests, and return their paths."""
+    orphans = find_orphans(root, storage_paths)
+    if dry_run:
+        return orphans
+    return [path for path in orphans if remove_quietly(path)]
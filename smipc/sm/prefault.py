@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+import mmap
+import sys
+from ctypes import CDLL, addressof, c_char, c_int, c_size_t, c_void_p, get_errno
+from ctypes.util import find_library
+from functools import lru_cache
+from multiprocessing.shared_memory import SharedMemory
+from os import strerror
+from typing import Final, Optional
+
+MADV_POPULATE_WRITE: Final[int] = getattr(mmap, "MADV_POPULATE_WRITE", 23)
+"""Populate (prefault) page tables writable, since Linux 5.14."""
+
+
+def _get_mmap(sm: SharedMemory) -> Optional[mmap.mmap]:
+    return getattr(sm, "_mmap", None)
+
+
+def populate_write(sm: SharedMemory) -> bool:
+    """Prefault all the pages with a single ``madvise`` call, if supported."""
+    if not sys.platform.startswith("linux"):
+        return False
+
+    mapped = _get_mmap(sm)
+    if mapped is None or not hasattr(mapped, "madvise"):
+        return False
+
+    try:
+        mapped.madvise(MADV_POPULATE_WRITE)
+    except OSError:
+        return False  # EINVAL: Kernels older than 5.14.
+    return True
+
+
+def touch_pages(sm: SharedMemory) -> None:
+    """
+    Prefault all the pages by writing one byte per page.
+
+    The content of the segment is overwritten, so only use it on fresh segments.
+    """
+
+    buf = sm.buf
+    assert buf is not None
+    with buf[:: mmap.PAGESIZE] as pages:
+        pages[:] = bytes(pages.nbytes)
+
+
+def prefault(sm: SharedMemory) -> None:
+    """Map all the pages of a fresh segment, so that the first write does not fault."""
+    if not populate_write(sm):
+        touch_pages(sm)
+
+
+@lru_cache
+def _load_mlock():
+    try:
+        libc = CDLL(find_library("c"), use_errno=True)
+        mlock = libc.mlock
+    except (OSError, AttributeError):
+        return None
+
+    mlock.argtypes = (c_void_p, c_size_t)
+    mlock.restype = c_int
+    return mlock
+
+
+def has_mlock() -> bool:
+    return _load_mlock() is not None
+
+
+def lock_pages(sm: SharedMemory) -> None:
+    """
+    Keep the pages of the segment resident in RAM, until it is unmapped.
+
+    Raises :class:`OSError` when the limit of locked memory is reached
+    (see ``ulimit -l`` and ``RLIMIT_MEMLOCK``).
+    """
+
+    mlock = _load_mlock()
+    if mlock is None:
+        raise NotImplementedError("The 'mlock' function is not available")
+
+    buf = sm.buf
+    assert buf is not None
+    address = addressof(c_char.from_buffer(buf))
+    if mlock(address, sm.size) != 0:
+        errno = get_errno()
+        raise OSError(errno, strerror(errno))
@@ -1,31 +1,110 @@
 # -*- coding: utf-8 -*-
 
 from collections import deque
+from functools import partial
 from multiprocessing.shared_memory import SharedMemory
 from queue import Full
-from typing import Deque, Dict, Optional, Union
+from threading import RLock
+from time import monotonic
+from typing import Deque, Dict, Iterable, List, Optional
 from weakref import finalize
 
+from smipc.buffer import (
+    ReadableBuffer,
+    WritableBuffer,
+    buffer_nbytes,
+    copy_buffer,
+    is_c_contiguous,
+)
+from smipc.sm.backend import (
+    SharedMemoryBackend,
+    get_default_backend,
+    get_free_bytes,
+    open_shared_memory,
+)
+from smipc.sm.copier import ParallelCopier
+from smipc.sm.prefault import lock_pages, prefault
+from smipc.sm.size_class import size_class
 from smipc.sm.utils import create_shared_memory, destroy_shared_memory
+from smipc.sm.worker import PeriodicWorker
 from smipc.sm.written import SmWritten
-from smipc.variables import INFINITY_QUEUE_SIZE
+from smipc.variables import (
+    DEFAULT_REFILL_INTERVAL,
+    DEFAULT_SIZE_CLASS_STEPS,
+    DEFAULT_TRIM_INTERVAL,
+    INFINITY_QUEUE_SIZE,
+)
 
 
 class SharedMemoryQueue:
-    _waiting: Deque[SharedMemory]
+    """
+    Pool of the shared memory segments of a sender.
+
+    Idle segments are kept in buckets by size class, and a request is served by the
+    smallest idle segment that fits (best-fit), so that messages of mixed sizes
+    reuse warm segments instead of recreating them.
+
+    ``max_queue`` limits the segments in flight (sent but not restored yet),
+    and ``max_bytes`` limits their total size; :class:`Full` is raised when a
+    request would exceed either of them.
+
+    New segments can be prefaulted (and locked in RAM) when they are created,
+    and the pool can be prewarmed ahead of demand, once or by a refill thread.
+    """
+
+    _waiting: Dict[int, Deque[SharedMemory]]
     _working: Dict[str, SharedMemory]
 
-    def __init__(self, max_queue=INFINITY_QUEUE_SIZE):
+    def __init__(
+        self,
+        max_queue=INFINITY_QUEUE_SIZE,
+        *,
+        size_class_steps=DEFAULT_SIZE_CLASS_STEPS,
+        max_per_class=INFINITY_QUEUE_SIZE,
+        prefault=False,
+        lock_pages=False,
+        backend: Optional[SharedMemoryBackend] = None,
+        max_bytes=INFINITY_QUEUE_SIZE,
+        idle_ttl: Optional[float] = None,
+        max_waiting_bytes=INFINITY_QUEUE_SIZE,
+        min_free_bytes=0,
+        tag="",
+        copier: Optional[ParallelCopier] = None,
+    ):
         self._max_queue = max_queue
-        self._waiting = deque()
+        self._max_bytes = max_bytes
+        self._size_class_steps = size_class_steps
+        self._max_per_class = max_per_class
+        self._prefault = prefault
+        self._lock_pages = lock_pages
+        self._backend = backend
+        self._tag = tag
+        self._copier = copier
+        self._waiting = dict()
         self._working = dict()
+        self._reused = 0
+        self._created = 0
+        self._idle_ttl = idle_ttl
+        self._max_waiting_bytes = max_waiting_bytes
+        self._min_free_bytes = min_free_bytes
+        self._idle_since: Dict[str, float] = dict()
+        self._slots: List[Optional[SharedMemory]] = list()
+        self._slot_of: Dict[str, int] = dict()
+        self._free_slots: List[int] = list()
+        self._lock = RLock()
+        self._refiller: Optional[PeriodicWorker] = None
+        self._trimmer: Optional[PeriodicWorker] = None
         self._finalizer = finalize(self, self._cleanup, self._waiting, self._working)
 
     @staticmethod
-    def _cleanup(waiting: Deque[SharedMemory], working: Dict[str, SharedMemory]):
+    def _cleanup(
+        waiting: Dict[int, Deque[SharedMemory]],
+        working: Dict[str, SharedMemory],
+    ):
         while waiting:
-            sm = waiting.popleft()
-            destroy_shared_memory(sm)
+            _, bucket = waiting.popitem()
+            while bucket:
+                destroy_shared_memory(bucket.pop())
         while working:
             _, sm = working.popitem()
             destroy_shared_memory(sm)
@@ -33,22 +112,28 @@ class SharedMemoryQueue:
         assert not working
 
     def cleanup(self) -> None:
+        self.stop_refill()
+        self.stop_trim()
         if self._finalizer.detach():
             self._cleanup(self._waiting, self._working)
             del self._waiting
             del self._working
 
     def clear_waiting(self):
-        while self._waiting:
-            sm = self._waiting.popleft()
-            destroy_shared_memory(sm)
-        assert not self._waiting
+        with self._lock:
+            while self._waiting:
+                _, bucket = self._waiting.popitem()
+                while bucket:
+                    self._destroy(bucket.pop())
+            self._idle_since.clear()
+            assert not self._waiting
 
     def clear_working(self):
-        while self._working:
-            _, sm = self._working.popitem()
-            destroy_shared_memory(sm)
-        assert not self._working
+        with self._lock:
+            while self._working:
+                _, sm = self._working.popitem()
+                self._destroy(sm)
+            assert not self._working
 
     def clear(self):
         self.clear_waiting()
@@ -58,6 +143,14 @@ class SharedMemoryQueue:
     def max_queue(self) -> int:
         return self._max_queue
 
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def has_bytes_limitation(self) -> bool:
+        return self._max_bytes > 0
+
     @property
     def has_queue_limitation(self) -> bool:
         return self._max_queue > 0
@@ -66,14 +159,65 @@ class SharedMemoryQueue:
     def is_infinity(self) -> bool:
         return not self.has_queue_limitation
 
+    @property
+    def size_class_steps(self) -> int:
+        return self._size_class_steps
+
+    @property
+    def max_per_class(self) -> int:
+        return self._max_per_class
+
     @property
     def size_waiting(self) -> int:
-        return len(self._waiting)
+        return sum(len(bucket) for bucket in self._waiting.values())
+
+    @property
+    def waiting_classes(self) -> Dict[int, int]:
+        """The number of idle segments for each segment size."""
+        return {key: len(bucket) for key, bucket in sorted(self._waiting.items())}
+
+    @property
+    def reused(self) -> int:
+        return self._reused
+
+    @property
+    def created(self) -> int:
+        return self._created
+
+    @property
+    def backend(self):
+        return self._backend
+
+    @property
+    def tag(self):
+        return self._tag
+
+    @property
+    def copier(self) -> Optional[ParallelCopier]:
+        return self._copier
+
+    def _copy(self, dest: WritableBuffer, data: ReadableBuffer) -> int:
+        if self._copier is not None:
+            return self._copier.copy(dest, data)
+        return copy_buffer(dest, data)
+
+    @property
+    def prefault(self) -> bool:
+        return self._prefault
+
+    @property
+    def lock_pages(self) -> bool:
+        return self._lock_pages
 
     @property
     def size_working(self) -> int:
         return len(self._working)
 
+    @property
+    def working_bytes(self) -> int:
+        """The total size of the segments in flight."""
+        return sum(sm.size for sm in self._working.values())
+
     @property
     def size(self) -> int:
         return self.size_waiting + self.size_working
@@ -82,49 +226,355 @@ class SharedMemoryQueue:
     def is_full(self) -> bool:
         if self.is_infinity:
             return False
-        if self.size_waiting >= 1:
-            return False
-        return self.size_waiting >= self._max_queue
+        return self.size_working >= self._max_queue
+
+    def _segment_size(self, buffer_size: int) -> int:
+        fits = [key for key in self._waiting.keys() if key >= buffer_size]
+        return min(fits) if fits else size_class(buffer_size, self._size_class_steps)
+
+    def has_room(self, buffer_size: int) -> bool:
+        """Whether a segment for ``buffer_size`` bytes fits in the limits."""
+        with self._lock:
+            if self.is_full:
+                return False
+            if not self.has_bytes_limitation:
+                return True
+
+            segment_size = self._segment_size(buffer_size)
+            if segment_size > self._max_bytes:
+                raise ValueError(
+                    f"A segment of {segment_size} bytes exceeds 'max_bytes' forever"
+                )
+            return self.working_bytes + segment_size <= self._max_bytes
 
     def find_working(self, key: str) -> SharedMemory:
         return self._working[key]
 
-    def _add_worker_safe(self, buffer_size: int) -> SharedMemory:
-        if self.is_full:
-            raise Full
-
-        if len(self._waiting) >= 1:
-            sm = self._waiting.popleft()
-            if sm.size < buffer_size:
-                destroy_shared_memory(sm)
-                sm = create_shared_memory(buffer_size)
+    def slot_of(self, name: str) -> int:
+        """The slot id of a segment, kept until the segment is destroyed."""
+        return self._slot_of[name]
+
+    def _assign_slot(self, sm: SharedMemory) -> None:
+        if sm.name in self._slot_of:
+            return
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._slots[slot] = sm
         else:
-            sm = create_shared_memory(buffer_size)
+            slot = len(self._slots)
+            self._slots.append(sm)
+        self._slot_of[sm.name] = slot
+
+    def _destroy(self, sm: SharedMemory) -> None:
+        slot = self._slot_of.pop(sm.name, None)
+        if slot is not None:
+            self._slots[slot] = None
+            self._free_slots.append(slot)
+        destroy_shared_memory(sm)
+
+    def _pop_waiting(self, key: int) -> SharedMemory:
+        bucket = self._waiting[key]
+        sm = bucket.pop()  # The most recently used segment is the warmest.
+        if not bucket:
+            del self._waiting[key]
+        self._idle_since.pop(sm.name, None)
+        return sm
+
+    def _find_waiting(self, buffer_size: int) -> Optional[SharedMemory]:
+        fits = [key for key in self._waiting.keys() if key >= buffer_size]
+        return self._pop_waiting(min(fits)) if fits else None
+
+    def _create(self, buffer_size: int) -> SharedMemory:
+        if self.has_queue_limitation and self.size >= self._max_queue:
+            if self._waiting:
+                # None of the idle segments fits, so make room for a new one.
+                self._destroy(self._pop_waiting(min(self._waiting.keys())))
 
-        assert sm is not None
-        assert sm.size >= buffer_size
-        self._working[sm.name] = sm
+        self._created += 1
+        return self._new_segment(size_class(buffer_size, self._size_class_steps))
+
+    def _new_segment(self, size: int) -> SharedMemory:
+        sm = create_shared_memory(size, self._backend, self._tag)
+        try:
+            if self._prefault:
+                prefault(sm)
+            if self._lock_pages:
+                lock_pages(sm)
+        except:  # noqa
+            destroy_shared_memory(sm)
+            raise
+        return sm
+
+    def _add_worker_safe(self, buffer_size: int) -> SharedMemory:
+        with self._lock:
+            if not self.has_room(buffer_size):
+                raise Full
+
+            sm = self._find_waiting(buffer_size)
+            if sm is not None:
+                self._reused += 1
+            else:
+                sm = self._create(buffer_size)
+
+            assert sm is not None
+            assert sm.size >= buffer_size
+            self._working[sm.name] = sm
+            self._assign_slot(sm)
+
+        if self._refiller is not None:
+            self._refiller.wake()
         return sm
 
+    def _add_workers_safe(self, buffer_sizes: List[int]) -> List[SharedMemory]:
+        """Take a working segment for each size, or none of them."""
+        sms: List[SharedMemory] = list()
+        try:
+            for buffer_size in buffer_sizes:
+                sms.append(self._add_worker_safe(buffer_size))
+        except BaseException:
+            for sm in sms:
+                self.restore(sm.name)
+            raise
+        return sms
+
+    def prewarm(self, size: int, count: int) -> int:
+        """
+        Create idle segments until ``count`` of them fit ``size`` bytes.
+
+        The segments are created without holding the lock of the pool, so that
+        senders are not delayed. Returns the number of created segments.
+        """
+
+        if size <= 0:
+            raise ValueError("The 'size' argument must be greater than 0")
+
+        segment_size = size_class(size, self._size_class_steps)
+        with self._lock:
+            # The backend may round the segments up, so count all that fit.
+            fits = (b for key, b in self._waiting.items() if key >= segment_size)
+            missing = count - sum(len(bucket) for bucket in fits)
+            if self.has_queue_limitation:
+                missing = min(missing, self._max_queue - self.size)
+        if missing <= 0:
+            return 0
+
+        created: List[SharedMemory] = list()
+        try:
+            for _ in range(missing):
+                created.append(self._new_segment(segment_size))
+        finally:
+            with self._lock:
+                for sm in created:
+                    # Filed by the real size, like the restored segments.
+                    bucket = self._waiting.setdefault(sm.size, deque())
+                    bucket.appendleft(sm)  # Warm segments stay on the right.
+                self._created += len(created)
+                now = monotonic()
+                self._idle_since.update((sm.name, now) for sm in created)
+        return len(created)
+
+    @property
+    def refilling(self) -> bool:
+        return self._refiller is not None
+
+    @property
+    def refiller(self) -> Optional[PeriodicWorker]:
+        """The refill thread, which reports the errors of the last attempts."""
+        return self._refiller
+
+    def start_refill(
+        self,
+        size: int,
+        count: int,
+        interval=DEFAULT_REFILL_INTERVAL,
+    ) -> None:
+        """
+        Keep ``count`` idle segments of ``size`` bytes ready, in a daemon thread.
+
+        A failed attempt (e.g. ``ENOSPC`` or a ``mlock`` limit) is reported by the
+        :attr:`refiller`, and retried later with a growing delay.
+        """
+        if self._refiller is not None:
+            raise RuntimeError("The refill thread has already been started")
+        self._refiller = PeriodicWorker(
+            partial(self.prewarm, size, count),
+            interval,
+            f"{type(self).__name__}.refill",
+        )
+
+    def stop_refill(self) -> None:
+        if self._refiller is not None:
+            self._refiller.stop()
+            self._refiller = None
+
+    @property
+    def waiting_bytes(self) -> int:
+        """The total size of the idle segments."""
+        return sum(key * len(bucket) for key, bucket in self._waiting.items())
+
+    def _evict_waiting(self, sm: SharedMemory) -> None:
+        bucket = self._waiting[sm.size]
+        bucket.remove(sm)
+        if not bucket:
+            del self._waiting[sm.size]
+        self._idle_since.pop(sm.name, None)
+        self._destroy(sm)
+
+    def trim(self, now: Optional[float] = None) -> int:
+        """
+        Destroy the idle segments that exceed the eviction policies, oldest first.
+
+        Returns the number of destroyed segments.
+        """
+
+        now = monotonic() if now is None else now
+        with self._lock:
+            idle = sorted(
+                (
+                    (self._idle_since.get(sm.name, now), sm)
+                    for bucket in self._waiting.values()
+                    for sm in bucket
+                ),
+                key=lambda item: item[0],
+            )
+            idle_bytes = sum(sm.size for _, sm in idle)
+            free_bytes: Optional[int] = None
+            if self._min_free_bytes > 0:
+                free_bytes = get_free_bytes(self.storage_path)
+
+            evicted = 0
+            for since, sm in idle:
+                expired = self._idle_ttl is not None and now - since >= self._idle_ttl
+                over_cap = 0 <= self._max_waiting_bytes < idle_bytes
+                low_free = free_bytes is not None and free_bytes < self._min_free_bytes
+                if not (expired or over_cap or low_free):
+                    break
+
+                self._evict_waiting(sm)
+                evicted += 1
+                idle_bytes -= sm.size
+                if free_bytes is not None:
+                    free_bytes += sm.size
+        return evicted
+
+    @property
+    def storage_path(self) -> Optional[str]:
+        backend = self._backend if self._backend is not None else get_default_backend()
+        return backend.storage_path
+
+    @property
+    def trimming(self) -> bool:
+        return self._trimmer is not None
+
+    @property
+    def trimmer(self) -> Optional[PeriodicWorker]:
+        return self._trimmer
+
+    def start_trim(self, interval=DEFAULT_TRIM_INTERVAL) -> None:
+        """Apply the eviction policies periodically, in a daemon thread."""
+        if self._trimmer is not None:
+            raise RuntimeError("The trim thread has already been started")
+        self._trimmer = PeriodicWorker(
+            self.trim,
+            interval,
+            f"{type(self).__name__}.trim",
+        )
+
+    def stop_trim(self) -> None:
+        if self._trimmer is not None:
+            self._trimmer.stop()
+            self._trimmer = None
+
+    def reserve(self, size: int, offset=0) -> SmWritten:
+        """Take a working segment for the caller to write in place."""
+        if size <= 0:
+            raise ValueError("The 'size' argument must be greater than 0")
+        end = offset + size
+        sm = self._add_worker_safe(end)
+        return SmWritten(sm.name, offset, end, self._slot_of[sm.name])
+
     def write_bytes(self, data: bytes, offset=0) -> SmWritten:
         end = offset + len(data)
         sm = self._add_worker_safe(end)
         sm.buf[offset:end] = data
-        return SmWritten(sm.name, offset, end)
+        return SmWritten(sm.name, offset, end, self._slot_of[sm.name])
 
-    def write(self, data: Union[bytes, memoryview], offset=0) -> SmWritten:
-        if isinstance(data, memoryview):
-            return self.write(data.tobytes(), offset)
-        else:
-            assert isinstance(data, bytes)
+    def write(self, data: ReadableBuffer, offset=0) -> SmWritten:
+        """
+        Copy any buffer (bytes, memoryview, numpy array, ...) into a segment.
+
+        Large copies are spread over the threads of the copier, if any.
+        """
+
+        if isinstance(data, bytes) and self._copier is None:
             return self.write_bytes(data, offset)
 
+        end = offset + buffer_nbytes(data)
+        sm = self._add_worker_safe(end)
+        buf = sm.buf
+        assert buf is not None
+        with buf[offset:end] as view:
+            self._copy(view, data)
+        return SmWritten(sm.name, offset, end, self._slot_of[sm.name])
+
+    def write_scatter(self, data: ReadableBuffer, chunk_size: int) -> List[SmWritten]:
+        """
+        Copy a buffer into as many segments of at most ``chunk_size`` bytes as needed.
+
+        All the segments are taken before copying, so :class:`Full` leaves the pool
+        as it was.
+        """
+
+        if chunk_size <= 0:
+            raise ValueError("The 'chunk_size' argument must be greater than 0")
+        if not is_c_contiguous(data):
+            data = memoryview(data).tobytes()
+
+        with memoryview(data) as view, view.cast("B") as raw:
+            total = raw.nbytes
+            begins = range(0, total, chunk_size)
+            sizes = [min(chunk_size, total - begin) for begin in begins]
+            sms = self._add_workers_safe(sizes)
+
+            result = list()
+            for sm, begin, size in zip(sms, begins, sizes):
+                buf = sm.buf
+                assert buf is not None
+                with raw[begin : begin + size] as chunk:
+                    self._copy(buf, chunk)
+                result.append(SmWritten(sm.name, 0, size, self._slot_of[sm.name]))
+        return result
+
     def restore(self, name: str) -> None:
-        self._waiting.append(self._working.pop(name))
+        with self._lock:
+            self._restore_locked(name, monotonic())
+
+    def restore_slot(self, slot: int) -> None:
+        with self._lock:
+            sm = self._slots[slot]
+            if sm is None:
+                raise KeyError(f"Unknown slot: {slot}")
+            self._restore_locked(sm.name, monotonic())
+
+    def restore_many(self, names: Iterable[str]) -> None:
+        """Restore several segments at once, taking the lock only once."""
+        with self._lock:
+            now = monotonic()
+            for name in names:
+                self._restore_locked(name, now)
+
+    def _restore_locked(self, name: str, now: float) -> None:
+        sm = self._working.pop(name)
+        bucket = self._waiting.setdefault(sm.size, deque())
+        if 0 < self._max_per_class <= len(bucket):
+            self._destroy(sm)
+        else:
+            bucket.append(sm)
+            self._idle_since[sm.name] = now
 
     @staticmethod
     def read(name: str, offset=0, size: Optional[int] = None) -> bytes:
-        sm = SharedMemory(name=name)
+        sm = open_shared_memory(name)
         try:
             if size is None:
                 return bytes(sm.buf[offset:])
@@ -136,6 +586,31 @@ class SharedMemoryQueue:
         finally:
             sm.close()
 
+    @staticmethod
+    def read_into(
+        name: str,
+        buffer: WritableBuffer,
+        offset=0,
+        size: Optional[int] = None,
+        copier: Optional[ParallelCopier] = None,
+    ) -> int:
+        """Copy the segment contents into the buffer, in parallel with a copier."""
+        sm = open_shared_memory(name)
+        try:
+            end = sm.size if size is None else offset + size
+            if end <= offset:
+                raise ValueError("The 'size' argument must be greater than 0")
+            buf = sm.buf
+            assert buf is not None
+            with buf[offset:end] as source:
+                if copier is not None:
+                    return copier.copy(buffer, source)
+                with memoryview(buffer) as view, view.cast("B") as target:
+                    target[: end - offset] = source
+            return end - offset
+        finally:
+            sm.close()
+
     class RentalManager:
         __slots__ = ("_sm", "_smq")
 
@@ -170,15 +645,5 @@ class SharedMemoryQueue:
         if rental_size <= 0 or buffer_byte <= 0:
             return self.MultiRentalManager(dict(), self)
 
-        sms = Dict[str, SharedMemory]()
-        for _ in range(rental_size):
-            try:
-                sm = self._add_worker_safe(buffer_byte)
-            except Full:
-                for sm_name in sms.keys():
-                    self.restore(sm_name)
-                raise
-            else:
-                sms[sm.name] = sm
-
-        return self.MultiRentalManager(sms=sms, smq=self)
+        sms = self._add_workers_safe([buffer_byte] * rental_size)
+        return self.MultiRentalManager({sm.name: sm for sm in sms}, self)
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+
+from mmap import PAGESIZE
+from multiprocessing.shared_memory import SharedMemory
+from struct import Struct
+from time import monotonic, sleep
+from typing import Final, Optional
+from weakref import finalize
+
+from smipc.buffer import ReadableBuffers, buffer_nbytes
+from smipc.sm.backend import SharedMemoryBackend, open_shared_memory
+from smipc.sm.fence import has_memory_fence, is_strongly_ordered, memory_fence
+from smipc.sm.size_class import round_up
+from smipc.sm.utils import create_shared_memory, destroy_shared_memory
+
+# Control block of a ring, with each cursor on its own cache line:
+#   [0:8]     head   = bytes published by the producer (monotonic)
+#   [64:72]   tail   = bytes consumed by the consumer (monotonic)
+#   [128:136] parked = the consumer is about to sleep and must be woken up
+RING_HEAD_INDEX: Final[int] = 0
+RING_TAIL_INDEX: Final[int] = 8
+RING_PARKED_INDEX: Final[int] = 16
+RING_CONTROL_SIZE: Final[int] = 256
+
+RING_ALIGNMENT: Final[int] = 8
+RING_WRAP: Final[int] = 0xFFFFFFFF
+"""Record length that tells the consumer to continue at the start of the ring."""
+
+# noinspection SpellCheckingInspection
+RING_RECORD_FORMAT: Final[str] = "@II"
+# |..............................| ^  | I = 4 byte unsigned int = record length
+# |..............................|  ^ | I = 4 byte unsigned int = reserve
+
+_RING_RECORD: Final[Struct] = Struct(RING_RECORD_FORMAT)
+RING_RECORD_HEADER_SIZE: Final[int] = _RING_RECORD.size
+
+MIN_RING_WAIT: Final[float] = 0.00001
+MAX_RING_WAIT: Final[float] = 0.001
+
+
+def _ordering_fence() -> None:
+    # Only needed on platforms that reorder stores with stores or loads with loads.
+    if not is_strongly_ordered():
+        memory_fence()
+
+
+def _store_load_fence() -> bool:
+    """Order the preceding store before the following load, if possible."""
+    if has_memory_fence():
+        memory_fence()
+        return True
+    return False
+
+
+def has_ring_support() -> bool:
+    # Without a fence, x86 still keeps the records ordered with the cursors,
+    # but the consumer must then be woken up after every write.
+    return has_memory_fence() or is_strongly_ordered()
+
+
+class _RingBase:
+    def __init__(self, sm: SharedMemory):
+        buf = sm.buf
+        assert buf is not None
+
+        if sm.size <= RING_CONTROL_SIZE:
+            raise ValueError("The shared memory is too small for a ring")
+
+        self._sm = sm
+        self._control = buf[:RING_CONTROL_SIZE].cast("Q")
+        self._data = buf[RING_CONTROL_SIZE:]
+        self._capacity = self._data.nbytes // RING_ALIGNMENT * RING_ALIGNMENT
+
+    @property
+    def name(self) -> str:
+        return self._sm.name
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def max_record(self) -> int:
+        """The largest record that can always be written, sooner or later."""
+        return (
+            self._capacity // 2 // RING_ALIGNMENT * RING_ALIGNMENT
+            - RING_RECORD_HEADER_SIZE
+        )
+
+    @property
+    def head(self) -> int:
+        return self._control[RING_HEAD_INDEX]
+
+    @property
+    def tail(self) -> int:
+        return self._control[RING_TAIL_INDEX]
+
+    @property
+    def parked(self) -> bool:
+        return self._control[RING_PARKED_INDEX] != 0
+
+    @property
+    def pending(self) -> int:
+        return self.head - self.tail
+
+    def _release_views(self) -> None:
+        self._control.release()
+        self._data.release()
+
+
+class RingWriter(_RingBase):
+    """
+    The producer side of a single-producer/single-consumer ring in shared memory.
+
+    Records are written in place and published by advancing the head cursor.
+    The caller is expected to wake the consumer up when :meth:`try_write` says so.
+    Writes never wait inside the ring; the caller waits with :meth:`wait_free`.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        backend: Optional[SharedMemoryBackend] = None,
+        tag="",
+    ):
+        if not has_ring_support():
+            raise NotImplementedError("Rings need a memory fence on this platform")
+
+        sm_size = round_up(RING_CONTROL_SIZE + size, PAGESIZE)
+        sm = create_shared_memory(sm_size, backend, tag)
+        super().__init__(sm)
+        self._control[RING_HEAD_INDEX] = 0
+        self._control[RING_TAIL_INDEX] = 0
+        self._control[RING_PARKED_INDEX] = 0
+        self._finalizer = finalize(self, self._cleanup, self._control, self._data, sm)
+
+    @staticmethod
+    def _cleanup(control: memoryview, data: memoryview, sm: SharedMemory) -> None:
+        control.release()
+        data.release()
+        destroy_shared_memory(sm)
+
+    def close(self) -> None:
+        self._finalizer()
+
+    @property
+    def free(self) -> int:
+        return self._capacity - (self.head - self.tail)
+
+    def required(self, size: int) -> int:
+        """Free space needed to write a record of ``size`` bytes at the head."""
+        record_size = round_up(RING_RECORD_HEADER_SIZE + size, RING_ALIGNMENT)
+        contiguous = self._capacity - self.head % self._capacity
+        if contiguous < record_size:
+            return contiguous + record_size  # The rest of the ring is skipped.
+        return record_size
+
+    def wait_free(self, size: int, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until a record of ``size`` bytes can be written.
+
+        Returns ``False`` if the timeout expires first.
+        """
+
+        deadline = None if timeout is None else monotonic() + timeout
+        wait = MIN_RING_WAIT
+        while self.free < self.required(size):
+            if deadline is not None:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            sleep(wait)
+            wait = min(wait * 2, MAX_RING_WAIT)
+        return True
+
+    def try_write(self, buffers: ReadableBuffers) -> Optional[bool]:
+        """
+        Write the buffers as one record, without waiting.
+
+        Returns ``None`` if there is not enough free space, otherwise whether the
+        consumer is parked and must be woken up.
+        """
+
+        size = sum(buffer_nbytes(b) for b in buffers)
+        if size > self.max_record:
+            raise ValueError(f"The record is too large for the ring: {size} bytes")
+
+        if self.free < self.required(size):
+            return None
+
+        record_size = round_up(RING_RECORD_HEADER_SIZE + size, RING_ALIGNMENT)
+        head = self.head
+        position = head % self._capacity
+        contiguous = self._capacity - position
+
+        if contiguous < record_size:
+            # Skip the rest of the ring, so that the record is never split.
+            _RING_RECORD.pack_into(self._data, position, RING_WRAP, 0)
+            head += contiguous
+            position = 0
+
+        _RING_RECORD.pack_into(self._data, position, size, 0)
+        offset = position + RING_RECORD_HEADER_SIZE
+        for buffer in buffers:
+            with memoryview(buffer) as view, view.cast("B") as chunk:
+                end = offset + chunk.nbytes
+                self._data[offset:end] = chunk
+                offset = end
+
+        # Publish the record, then check whether the consumer went to sleep.
+        _ordering_fence()
+        self._control[RING_HEAD_INDEX] = head + record_size
+        if not _store_load_fence():
+            return True  # The parked flag cannot be trusted without a fence.
+        if self._control[RING_PARKED_INDEX] != 0:
+            self._control[RING_PARKED_INDEX] = 0
+            return True
+        return False
+
+
+class RingReader(_RingBase):
+    """The consumer side of a ring created by a :class:`RingWriter` of the peer."""
+
+    def __init__(self, name: str):
+        sm = open_shared_memory(name)
+        try:
+            super().__init__(sm)
+        except:  # noqa
+            sm.close()
+            raise
+        self._record: Optional[memoryview] = None
+        self._record_end = 0
+
+    def close(self) -> None:
+        if self._record is not None:
+            self._record.release()
+            self._record = None
+        self._release_views()
+        self._sm.close()
+
+    def peek(self) -> Optional[memoryview]:
+        """Return the next record in place, or ``None`` if the ring is empty."""
+        if self._record is not None:
+            return self._record
+
+        tail = self.tail
+        if self.head == tail:
+            return None
+        _ordering_fence()
+
+        position = tail % self._capacity
+        size, _ = _RING_RECORD.unpack_from(self._data, position)
+        if size == RING_WRAP:
+            tail += self._capacity - position
+            self._control[RING_TAIL_INDEX] = tail
+            position = 0
+            size, _ = _RING_RECORD.unpack_from(self._data, position)
+
+        begin = position + RING_RECORD_HEADER_SIZE
+        self._record = self._data[begin : begin + size]
+        self._record_end = tail + round_up(
+            RING_RECORD_HEADER_SIZE + size, RING_ALIGNMENT
+        )
+        return self._record
+
+    def advance(self) -> None:
+        """Consume the record returned by :meth:`peek`, handing its space back."""
+        assert self._record is not None
+        self._record.release()
+        self._record = None
+        _ordering_fence()
+        self._control[RING_TAIL_INDEX] = self._record_end
+
+    def park(self) -> bool:
+        """
+        Announce that the consumer is going to sleep.
+
+        Returns ``True`` if the ring is still empty, in which case the producer
+        is guaranteed to wake the consumer up after its next write.
+        Both sides put a full fence between their store and their load, so
+        either the producer sees the flag or the consumer sees the record.
+        """
+
+        self._control[RING_PARKED_INDEX] = 1
+        _store_load_fence()
+        return self.head == self.tail
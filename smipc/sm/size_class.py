@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+from mmap import PAGESIZE
+
+from smipc.variables import DEFAULT_SIZE_CLASS_STEPS
+
+
+def round_up(size: int, alignment: int) -> int:
+    return (size + alignment - 1) // alignment * alignment
+
+
+def size_class(size: int, steps=DEFAULT_SIZE_CLASS_STEPS, page_size=PAGESIZE) -> int:
+    """
+    Round the size up to its size class.
+
+    Every power of two is divided into ``steps`` classes (e.g. 4, 5, 6 and 7 MiB
+    between 4 and 8 MiB), and classes are never smaller than a page.
+    At most ``1 / steps`` of each segment is wasted.
+    """
+
+    if size <= 0:
+        raise ValueError("The 'size' argument must be greater than 0")
+    if steps <= 0:
+        raise ValueError("The 'steps' argument must be greater than 0")
+
+    if size <= page_size:
+        return page_size
+
+    # The largest power of two not greater than size - 1.
+    base = 1 << ((size - 1).bit_length() - 1)
+    step = max(base // steps, 1)
+    return round_up(round_up(size, step), page_size)
@@ -1,15 +1,13 @@
 # -*- coding: utf-8 -*-
 
 from multiprocessing.shared_memory import SharedMemory
-from os import name as os_name
+from typing import Optional
 
-
-def _unregister_shared_memory_tracker(sm: SharedMemory) -> None:
-    # https://bugs.python.org/issue39959
-    if os_name != "nt":
-        from multiprocessing.resource_tracker import unregister  # noqa
-
-        unregister(getattr(sm, "_name"), "shared_memory")
+from smipc.sm.backend import (
+    SharedMemoryBackend,
+    get_default_backend,
+    open_shared_memory,
+)
 
 
 class _AttachSharedMemoryContext:
@@ -17,20 +15,25 @@ class _AttachSharedMemoryContext:
         self.name = name
 
     def __enter__(self) -> SharedMemory:
-        self.sm = SharedMemory(name=self.name)
+        self.sm = open_shared_memory(self.name)
         return self.sm
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.sm.close()
-        # _unregister_shared_memory_tracker(self.sm)
 
 
 def attach_shared_memory(name: str):
     return _AttachSharedMemoryContext(name)
 
 
-def create_shared_memory(buffer_size: int) -> SharedMemory:
-    return SharedMemory(create=True, size=buffer_size)
+def create_shared_memory(
+    buffer_size: int,
+    backend: Optional[SharedMemoryBackend] = None,
+    tag="",
+) -> SharedMemory:
+    if backend is None:
+        backend = get_default_backend()
+    return backend.create(buffer_size, tag)
 
 
 def destroy_shared_memory(sm: SharedMemory) -> None:
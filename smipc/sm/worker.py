@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+from logging import getLogger
+from threading import Event, Thread
+from typing import Any, Callable, Optional
+
+from smipc.variables import DEFAULT_WORKER_MAX_BACKOFF
+
+logger = getLogger(__name__)
+
+
+class PeriodicWorker:
+    """
+    Daemon thread that calls a function every ``interval`` seconds,
+    or as soon as :meth:`wake` is called.
+
+    An exception raised by the function is logged and kept in :attr:`last_error`,
+    and the thread keeps running. While the calls keep failing, the interval is
+    doubled each time, up to ``max_backoff`` seconds.
+    """
+
+    def __init__(
+        self,
+        function: Callable[[], Any],
+        interval: float,
+        name: str,
+        max_backoff=DEFAULT_WORKER_MAX_BACKOFF,
+    ):
+        if interval <= 0:
+            raise ValueError("The 'interval' must be greater than 0")
+
+        self._function = function
+        self._interval = interval
+        self._max_backoff = max(interval, max_backoff)
+        self._name = name
+        self._failures = 0
+        self._error_count = 0
+        self._last_error: Optional[BaseException] = None
+        self._wakeup = Event()
+        self._stop = Event()
+        self._thread: Optional[Thread] = Thread(
+            target=self._main, name=name, daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    @property
+    def alive(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def failures(self) -> int:
+        """The number of calls that failed in a row, ``0`` after a success."""
+        return self._failures
+
+    @property
+    def error_count(self) -> int:
+        return self._error_count
+
+    @property
+    def last_error(self) -> Optional[BaseException]:
+        return self._last_error
+
+    @property
+    def delay(self) -> float:
+        """The time until the next call, backed off while the calls fail."""
+        if self._failures == 0:
+            return self._interval
+        backoff = self._interval * 2 ** min(self._failures, 32)
+        return min(backoff, self._max_backoff)
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def stop(self) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+
+        self._stop.set()
+        self._wakeup.set()
+        thread.join()
+        self._thread = None
+
+    def _call(self) -> None:
+        try:
+            self._function()
+        except Exception as e:
+            self._failures += 1
+            self._error_count += 1
+            self._last_error = e
+            logger.warning(
+                "%s failed, retrying in %.3f seconds",
+                self._name,
+                self.delay,
+                exc_info=e,
+            )
+        else:
+            self._failures = 0
+
+    def _main(self) -> None:
+        while not self._stop.is_set():
+            self._call()
+            if self._failures == 0:
+                self._wakeup.wait(self._interval)
+            else:
+                # Being woken up does not cut the backoff short.
+                self._stop.wait(self.delay)
+            self._wakeup.clear()
@@ -1,12 +1,24 @@
 # -*- coding: utf-8 -*-
 
-from typing import NamedTuple, Union
+from struct import Struct
+from typing import Final, List, NamedTuple, Sequence, Tuple, Union
+
+from smipc.buffer import ReadableBuffer
+
+# noinspection SpellCheckingInspection
+SEGMENT_ENTRY_FORMAT: Final[str] = "@QH"
+# |................................| ^  | Q = 8 byte unsigned long long = size
+# |................................|  ^ | H = 2 byte unsigned short = name size
+
+_SEGMENT_ENTRY: Final[Struct] = Struct(SEGMENT_ENTRY_FORMAT)
 
 
 class SmWritten(NamedTuple):
     name: Union[str, bytes]
     offset: int
     end: int
+    slot: int = -1
+    """The slot id of the segment in its pool, or ``-1`` if it has none."""
 
     @property
     def size(self) -> int:
@@ -18,3 +30,27 @@ class SmWritten(NamedTuple):
         else:
             assert isinstance(self.name, bytes)
             return self.name
+
+
+def encode_segments(writtens: Sequence[SmWritten], encoding="utf-8") -> bytes:
+    """Encode the list of segments of a scattered message, in order."""
+    result = bytearray()
+    for written in writtens:
+        assert written.offset == 0
+        name = written.encode_name(encoding)
+        result += _SEGMENT_ENTRY.pack(written.size, len(name))
+        result += name
+    return bytes(result)
+
+
+def decode_segments(data: ReadableBuffer) -> List[Tuple[bytes, int]]:
+    """Decode the ``(name, size)`` pairs of a scattered message."""
+    result = list()
+    with memoryview(data) as view:
+        offset = 0
+        while offset < view.nbytes:
+            size, name_size = _SEGMENT_ENTRY.unpack_from(view, offset)
+            offset += _SEGMENT_ENTRY.size
+            result.append((bytes(view[offset : offset + name_size]), size))
+            offset += name_size
+    return result
@@ -5,8 +5,22 @@ from typing import Final
 DEFAULT_PIPE_BUF: Final[int] = 4096
 DEFAULT_FILE_MODE: Final[int] = 0o600
 DEFAULT_ENCODING: Final[str] = "utf-8"
+DEFAULT_DECODER_BUFFER_SIZE: Final[int] = 64 * 1024
+DEFAULT_PIPE_WRITE_TIMEOUT: Final[float] = 10.0
 
 INFINITY_QUEUE_SIZE: Final[int] = -1
+DEFAULT_SIZE_CLASS_STEPS: Final[int] = 4
+DEFAULT_ARENA_ALIGNMENT: Final[int] = 64
+DEFAULT_ATTACH_CACHE_SIZE: Final[int] = 16
+DEFAULT_PREWARM_COUNT: Final[int] = 2
+DEFAULT_REFILL_INTERVAL: Final[float] = 0.1
+DEFAULT_TRIM_INTERVAL: Final[float] = 1.0
+DEFAULT_WORKER_MAX_BACKOFF: Final[float] = 10.0
+DEFAULT_SCATTER_CHUNK_SIZE: Final[int] = 64 * 1024 * 1024
+DEFAULT_COALESCE_DELAY: Final[float] = 200e-6
+DEFAULT_RESTORE_DELAY: Final[float] = 1e-3
+DEFAULT_PARALLEL_COPY_THRESHOLD: Final[int] = 16 * 1024 * 1024
+DEFAULT_PARALLEL_COPY_CHUNK_SIZE: Final[int] = 4 * 1024 * 1024
 
 SERVER_TO_CLIENT_SUFFIX: Final[str] = ".s2c.smipc"
 CLIENT_TO_SERVER_SUFFIX: Final[str] = ".c2s.smipc"
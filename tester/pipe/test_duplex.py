@@ -3,9 +3,11 @@
 import os
 from asyncio import gather, to_thread
 from tempfile import TemporaryDirectory
-from unittest import IsolatedAsyncioTestCase, main
+from unittest import IsolatedAsyncioTestCase, main, skipUnless
+from unittest.mock import patch
 
 from smipc.pipe.duplex import FullDuplexPipe
+from smipc.pipe.inotify import has_inotify
 from smipc.pipe.temp import TemporaryPipe
 
 
@@ -52,6 +54,25 @@ class DuplexTestCase(IsolatedAsyncioTestCase):
             with self.assertRaises(OSError):
                 client.close()
 
+    @skipUnless(has_inotify(), "The inotify API is not available")
+    async def test_default_opener(self):
+        with TemporaryDirectory() as tmpdir:
+            s2c_path = os.path.join(tmpdir, "s2c.fifo")
+            c2s_path = os.path.join(tmpdir, "c2s.fifo")
+
+            # Without a 'blocking' event, the polling fallback is not used.
+            with patch("smipc.pipe.duplex.wait_pipe_writer") as wait_pipe_writer:
+                with TemporaryPipe(s2c_path), TemporaryPipe(c2s_path):
+                    server, client = await gather(
+                        to_thread(lambda: FullDuplexPipe.from_fifo(s2c_path, c2s_path)),
+                        to_thread(lambda: FullDuplexPipe.from_fifo(c2s_path, s2c_path)),
+                    )
+                    self.assertEqual(4, server.write(b"data"))
+                    self.assertEqual(b"data", client.read(4))
+                    server.close()
+                    client.close()
+            wait_pipe_writer.assert_not_called()
+
 
 if __name__ == "__main__":
     main()
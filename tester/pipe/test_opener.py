@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+import os
+from tempfile import TemporaryDirectory
+from threading import Event, Timer
+from typing import Final
+from unittest import TestCase, main
+
+from smipc.pipe.opener import PipeOpener, watch_exists, watch_pipe_writer
+from smipc.pipe.reader import PipeReader
+from smipc.pipe.temp import TemporaryPipe
+
+TEST_TIMEOUT_SECONDS: Final[float] = 0.3
+TEST_WAIT_SECONDS: Final[float] = 4.0
+
+
+class OpenerTestCase(TestCase):
+    def setUp(self):
+        self.opener = PipeOpener()
+
+    def tearDown(self):
+        self.opener.close()
+
+    def test_many_writers(self):
+        with TemporaryDirectory() as tmpdir:
+            paths = [os.path.join(tmpdir, f"{i}.fifo") for i in range(20)]
+            futures = [self.opener.open_writer(p, TEST_WAIT_SECONDS) for p in paths]
+            self.assertFalse(any(f.done() for f in futures))
+
+            pipes = [TemporaryPipe(p) for p in paths]
+            readers = [PipeReader(p) for p in paths]
+            writers = [f.result(TEST_WAIT_SECONDS) for f in futures]
+
+            for reader, writer in zip(readers, writers):
+                self.assertEqual(4, writer.write(b"data"))
+                self.assertEqual(b"data", reader.read(4))
+                writer.close()
+                reader.close()
+
+            for pipe in pipes:
+                pipe.cleanup()
+
+    def test_watch_exists(self):
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "temp.fifo")
+            timer = Timer(TEST_TIMEOUT_SECONDS, os.mkfifo, args=(path,))
+            timer.start()
+            try:
+                watch_exists(path, TEST_WAIT_SECONDS, opener=self.opener)
+                self.assertTrue(os.path.exists(path))
+            finally:
+                timer.join()
+
+    def test_missing_directory(self):
+        with TemporaryDirectory() as tmpdir:
+            directory = os.path.join(tmpdir, "a", "b")
+            path = os.path.join(directory, "temp.fifo")
+            future = self.opener.wait_exists(path, TEST_WAIT_SECONDS)
+            self.assertFalse(future.done())
+
+            def _create():
+                os.makedirs(directory)
+                os.mkfifo(path)
+
+            timer = Timer(TEST_TIMEOUT_SECONDS, _create)
+            timer.start()
+            try:
+                self.assertTrue(future.result(TEST_WAIT_SECONDS))
+            finally:
+                timer.join()
+
+            missing = os.path.join(tmpdir, "c", "temp.fifo")
+            with self.assertRaises(TimeoutError):
+                watch_exists(missing, TEST_TIMEOUT_SECONDS, opener=self.opener)
+
+    def test_timeout(self):
+        with TemporaryDirectory() as tmpdir:
+            with TemporaryPipe(os.path.join(tmpdir, "temp.fifo")) as pipe_path:
+                with self.assertRaises(TimeoutError):
+                    watch_pipe_writer(
+                        pipe_path,
+                        timeout=TEST_TIMEOUT_SECONDS,
+                        opener=self.opener,
+                    )
+
+    def test_interrupt(self):
+        with TemporaryDirectory() as tmpdir:
+            with TemporaryPipe(os.path.join(tmpdir, "temp.fifo")) as pipe_path:
+                event = Event()
+                timer = Timer(TEST_TIMEOUT_SECONDS, event.set)
+                timer.start()
+                with self.assertRaises(InterruptedError):
+                    watch_pipe_writer(pipe_path, event=event, opener=self.opener)
+                timer.join()
+
+    def test_polling_fallback(self):
+        with PipeOpener(inotify=False) as opener:
+            self.assertFalse(opener.uses_inotify)
+            with TemporaryDirectory() as tmpdir:
+                with TemporaryPipe(os.path.join(tmpdir, "temp.fifo")) as pipe_path:
+                    future = opener.open_writer(pipe_path, TEST_WAIT_SECONDS)
+                    reader = PipeReader(pipe_path)
+                    writer = future.result(TEST_WAIT_SECONDS)
+                    writer.close()
+                    reader.close()
+
+
+if __name__ == "__main__":
+    main()
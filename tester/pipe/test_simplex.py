@@ -35,6 +35,35 @@ class SimplexTestCase(TestCase):
             self.assertFalse(os.path.exists(pipe_path))
         self.assertFalse(os.path.exists(tmpdir))
 
+    def test_writev(self):
+        with TemporaryDirectory() as tmpdir:
+            with TemporaryPipe(os.path.join(tmpdir, "temp.fifo")) as pipe_path:
+                reader = PipeReader(pipe_path)
+                writer = PipeWriter(pipe_path)
+
+                buffers = b"head", bytearray(b"er"), memoryview(b"-data")
+                self.assertEqual(11, writer.writev(buffers))
+                self.assertEqual(b"header-data", reader.read(11))
+
+                writer.close()
+                reader.close()
+
+    def test_writev_all_full(self):
+        with TemporaryDirectory() as tmpdir:
+            with TemporaryPipe(os.path.join(tmpdir, "temp.fifo")) as pipe_path:
+                reader = PipeReader(pipe_path)
+                writer = PipeWriter(pipe_path)
+
+                # Nobody reads the pipe, so the write can never complete.
+                data = bytes(16 * 1024 * 1024)
+                with self.assertRaises(TimeoutError):
+                    writer.writev_all((data,), timeout=0.01)
+                with self.assertRaises(BlockingIOError):
+                    writer.writev_all((data,), timeout=0.01)
+
+                writer.close()
+                reader.close()
+
 
 if __name__ == "__main__":
     main()
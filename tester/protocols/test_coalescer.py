@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+from queue import Full
+from threading import Event
+from time import monotonic, sleep
+from typing import List, Optional
+from unittest import TestCase, main
+
+from smipc.protocols.batch import batch_nbytes
+from smipc.protocols.coalescer import Coalescer
+
+
+class CoalescerTestCase(TestCase):
+    def setUp(self):
+        self.sent: List[List[bytes]] = list()
+        self.full = False
+        self.error: Optional[Exception] = None
+        self.event = Event()
+
+    def send(self, messages: List[bytes], timeout: Optional[float]) -> None:
+        if self.full:
+            raise Full
+        if self.error is not None:
+            self.event.set()
+            raise self.error
+        self.sent.append(messages)
+        self.event.set()
+
+    def test_limit(self):
+        coalescer = Coalescer(self.send, delay=60.0)
+        try:
+            limit = batch_nbytes([10, 10])
+            coalescer.append(b"a" * 10, limit)
+            self.assertEqual(1, len(coalescer))
+            self.assertEqual(batch_nbytes([10]), coalescer.nbytes)
+            coalescer.append(b"b" * 10, limit)
+            self.assertEqual([[b"a" * 10, b"b" * 10]], self.sent)
+            self.assertEqual(0, len(coalescer))
+
+            coalescer.append(b"c", limit)
+            coalescer.append(b"d" * 20, limit)
+            self.assertEqual([b"c"], self.sent[-1])
+            self.assertEqual(1, coalescer.flush())
+            self.assertEqual([b"d" * 20], self.sent[-1])
+        finally:
+            coalescer.close()
+
+    def test_delay(self):
+        coalescer = Coalescer(self.send, delay=0.01)
+        try:
+            coalescer.append(bytearray(b"abc"), 1024)
+            self.assertTrue(self.event.wait(5.0))
+            self.assertEqual([[b"abc"]], self.sent)
+        finally:
+            coalescer.close()
+
+    def test_full(self):
+        coalescer = Coalescer(self.send, delay=60.0)
+        try:
+            coalescer.append(b"a", 1024)
+            self.full = True
+            with self.assertRaises(Full):
+                coalescer.flush()
+            self.assertEqual(1, len(coalescer))
+
+            self.full = False
+            self.assertEqual(1, coalescer.flush())
+            self.assertEqual([[b"a"]], self.sent)
+        finally:
+            coalescer.close()
+
+        with self.assertRaises(ValueError):
+            Coalescer(self.send, delay=-1.0)
+
+    def test_error(self):
+        coalescer = Coalescer(self.send, delay=60.0)
+        try:
+            coalescer.append(b"a", 1024)
+            self.error = BrokenPipeError()
+            with self.assertRaises(BrokenPipeError):
+                coalescer.append(b"b", batch_nbytes([1, 1]))
+            self.assertEqual(2, len(coalescer))
+            self.assertIsNone(coalescer.error)
+
+            self.error = None
+            self.assertEqual(2, coalescer.flush())
+            self.assertEqual([[b"a", b"b"]], self.sent)
+        finally:
+            coalescer.close()
+
+    def test_broken(self):
+        coalescer = Coalescer(self.send, delay=0.01)
+        try:
+            self.error = BrokenPipeError()
+            coalescer.append(b"a", 1024)
+            deadline = monotonic() + 5.0
+            while coalescer.error is None and monotonic() < deadline:
+                sleep(0.001)
+
+            self.assertIsInstance(coalescer.error, BrokenPipeError)
+            self.assertEqual(1, len(coalescer))
+            with self.assertRaises(RuntimeError) as context:
+                coalescer.append(b"b", 1024)
+            self.assertIsInstance(context.exception.__cause__, BrokenPipeError)
+            self.assertEqual(1, len(coalescer))
+
+            self.error = None
+            self.assertEqual(1, coalescer.flush())
+            self.assertIsNone(coalescer.error)
+            coalescer.append(b"b", 1024)
+            self.assertEqual(1, coalescer.flush())
+            self.assertEqual([[b"a"], [b"b"]], self.sent)
+        finally:
+            coalescer.close()
+
+    def test_retry(self):
+        coalescer = Coalescer(self.send, delay=0.001, max_count=2, retry=True)
+        try:
+            self.error = BlockingIOError()
+            with self.assertLogs("smipc.protocols.coalescer", "WARNING"):
+                coalescer.append(b"a", 1024)
+                coalescer.append(b"b", 1024)
+                coalescer.append(b"c", 1024)
+            self.assertEqual(3, len(coalescer))
+            self.assertIsNone(coalescer.error)
+
+            deadline = monotonic() + 5.0
+            while coalescer.failures == 0 and monotonic() < deadline:
+                sleep(0.001)
+            self.assertLessEqual(1, coalescer.failures)
+
+            self.error = None
+            while len(coalescer) and monotonic() < deadline:
+                sleep(0.001)
+            self.assertEqual(0, len(coalescer))
+            self.assertEqual([[b"a", b"b"], [b"c"]], self.sent)
+        finally:
+            coalescer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+import os
+from asyncio import gather, to_thread
+from tempfile import TemporaryDirectory
+from unittest import IsolatedAsyncioTestCase, TestCase, main
+
+from smipc.pipe.reader import PipeReader
+from smipc.pipe.temp import TemporaryPipe
+from smipc.pipe.writer import PipeWriter
+from smipc.protocols.decoder import FrameDecoder
+from smipc.protocols.header import Header, Opcode
+from smipc.protocols.sm import SmProtocol
+
+
+class FrameDecoderTestCase(TestCase):
+    def test_partial_frames(self):
+        header = Header()
+        frame1 = header.encode(Opcode.PIPE_DIRECT, 3) + b"abc"
+        frame2 = header.encode_empty()
+        frame3 = header.encode(Opcode.PIPE_DIRECT, 5) + b"defgh"
+        stream = frame1 + frame2 + frame3
+
+        decoder = FrameDecoder(header, buffer_size=header.size)
+        decoder.feed(stream[:5])
+        self.assertIsNone(decoder.pop())
+        self.assertEqual(header.size - 5, decoder.remaining())
+
+        decoder.feed(stream[5:-2])
+        result1 = decoder.pop()
+        assert result1 is not None
+        self.assertEqual(Opcode.PIPE_DIRECT, result1.header.opcode)
+        self.assertEqual(b"abc", result1.payload)
+
+        result2 = decoder.pop()
+        assert result2 is not None
+        self.assertEqual(Opcode.EMPTY, result2.header.opcode)
+        self.assertEqual(b"", result2.payload)
+
+        self.assertIsNone(decoder.pop())
+        self.assertEqual(2, decoder.remaining())
+
+        decoder.feed(stream[-2:])
+        result3 = decoder.pop()
+        assert result3 is not None
+        self.assertEqual(b"defgh", result3.payload)
+        self.assertEqual(0, decoder.pending)
+
+    def test_fill(self):
+        with TemporaryDirectory() as tmpdir:
+            with TemporaryPipe(os.path.join(tmpdir, "temp.fifo")) as pipe_path:
+                reader = PipeReader(pipe_path)
+                writer = PipeWriter(pipe_path)
+
+                header = Header()
+                count = 100
+                for i in range(count):
+                    data = str(i).encode()
+                    writer.writev((header.encode(Opcode.PIPE_DIRECT, len(data)), data))
+
+                decoder = FrameDecoder(header)
+                self.assertLess(0, decoder.fill(reader))
+
+                for i in range(count):
+                    frame = decoder.pop()
+                    assert frame is not None
+                    self.assertEqual(str(i).encode(), frame.payload)
+                self.assertIsNone(decoder.pop())
+
+                writer.close()
+                reader.close()
+
+
+class RecvManyTestCase(IsolatedAsyncioTestCase):
+    async def test_recv_many(self):
+        with TemporaryDirectory() as tmpdir:
+            s2c_path = os.path.join(tmpdir, "s2c.fifo")
+            c2s_path = os.path.join(tmpdir, "c2s.fifo")
+
+            with TemporaryPipe(s2c_path), TemporaryPipe(c2s_path):
+                server, client = await gather(
+                    to_thread(lambda: SmProtocol.from_fifo(s2c_path, c2s_path)),
+                    to_thread(lambda: SmProtocol.from_fifo(c2s_path, s2c_path)),
+                )
+
+                messages = [str(i).encode() * (i + 1) for i in range(10)]
+                large = b"L" * 1024 * 1024
+                for message in messages:
+                    server.send(message)
+                server.send(large)
+
+                self.assertEqual(messages + [large], client.recv_many())
+                self.assertEqual([], client.recv_many())
+                self.assertEqual([], server.recv_many())  # Opcode.SM_RESTORE
+                self.assertEqual(0, server.sms.size_working)
+
+                server.close()
+                client.close()
+
+
+if __name__ == "__main__":
+    main()
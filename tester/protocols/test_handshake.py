@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+import os
+from asyncio import gather, to_thread
+from tempfile import TemporaryDirectory
+from unittest import IsolatedAsyncioTestCase, main
+
+from smipc.pipe.temp import TemporaryPipe
+from smipc.protocols.header import Capability
+from smipc.protocols.options import ProtocolOptions
+from smipc.protocols.sm import SmProtocol
+
+
+class HandshakeTestCase(IsolatedAsyncioTestCase):
+    async def test_upgrade(self):
+        with TemporaryDirectory() as tmpdir:
+            s2c_path = os.path.join(tmpdir, "s2c.fifo")
+            c2s_path = os.path.join(tmpdir, "c2s.fifo")
+
+            with TemporaryPipe(s2c_path), TemporaryPipe(c2s_path):
+                server, client = await gather(
+                    to_thread(
+                        lambda: SmProtocol.from_fifo(
+                            s2c_path, c2s_path, options=ProtocolOptions(handshake=True)
+                        )
+                    ),
+                    to_thread(
+                        lambda: SmProtocol.from_fifo(
+                            c2s_path,
+                            s2c_path,
+                            options=ProtocolOptions(
+                                handshake=True, max_message_size=1024
+                            ),
+                        )
+                    ),
+                )
+                self.assertEqual(1, server.header_version)
+
+                self.assertTrue(server.wait_handshake(10))
+                self.assertTrue(client.wait_handshake(10))
+                self.assertEqual(2, server.header_version)
+                self.assertEqual(2, client.header_version)
+                self.assertEqual(1024, server.peer_capabilities.max_message_size)
+                self.assertTrue(client.peer_capabilities.supports(Capability.LEASE))
+
+                server.send(b"small")
+                # The UPGRADE frame in front of it is a signal, like EMPTY.
+                self.assertEqual([b"small"], client.recv_many())
+                self.assertEqual(2, client.peer_header_version)
+
+                client.send(b"x" * 100_000)
+                self.assertEqual([b"x" * 100_000], server.recv_many())
+                self.assertEqual(2, server.peer_header_version)
+                self.assertIsNone(client.recv())  # Opcode.SM_RESTORE
+
+                with self.assertRaises(ValueError):
+                    server.send(b"x" * 1025)
+
+                server.close()
+                client.close()
+
+    async def test_old_peer(self):
+        with TemporaryDirectory() as tmpdir:
+            s2c_path = os.path.join(tmpdir, "s2c.fifo")
+            c2s_path = os.path.join(tmpdir, "c2s.fifo")
+
+            with TemporaryPipe(s2c_path), TemporaryPipe(c2s_path):
+                server, client = await gather(
+                    to_thread(
+                        lambda: SmProtocol.from_fifo(
+                            s2c_path, c2s_path, options=ProtocolOptions(handshake=True)
+                        )
+                    ),
+                    to_thread(lambda: SmProtocol.from_fifo(c2s_path, s2c_path)),
+                )
+
+                # The handshake frames look like plain signals to the old peer.
+                server.send(b"hello")
+                self.assertEqual([b"hello"], client.recv_many())
+                self.assertIsNotNone(client.peer_capabilities)
+                self.assertEqual(1, client.header_version)
+
+                self.assertFalse(server.wait_handshake(0.05))
+                client.send(b"world")
+                self.assertEqual(b"world", server.recv())
+                self.assertEqual(1, server.header_version)
+
+                server.close()
+                client.close()
+
+
+if __name__ == "__main__":
+    main()
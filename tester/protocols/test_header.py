@@ -2,7 +2,14 @@
 
 from unittest import TestCase, main
 
-from smipc.protocols.header import Header, Opcode
+from smipc.protocols.batch import batch_nbytes, decode_batch, encode_batch_table
+from smipc.protocols.handshake import (
+    BackendKind,
+    Capabilities,
+    HelloDecoder,
+    encode_hello,
+)
+from smipc.protocols.header import Capability, Header, HeaderV2, Opcode
 
 
 class HeaderTestCase(TestCase):
@@ -12,6 +19,40 @@ class HeaderTestCase(TestCase):
         self.assertIsInstance(serialized_data, bytes)
         self.assertEqual(len(serialized_data), header.size)
 
+    def test_batch(self):
+        messages = [b"abc", b"", b"defgh"]
+        sizes = [len(m) for m in messages]
+        data = encode_batch_table(sizes) + b"".join(messages)
+        self.assertEqual(batch_nbytes(sizes), len(data))
+        self.assertEqual(messages, decode_batch(data))
+        self.assertEqual([], decode_batch(encode_batch_table([])))
+
+    def test_v2(self):
+        header = HeaderV2()
+        size = 5 * 1024**3  # Above the 32-bit fields of the version 1.
+        first = header.decode(header.encode(Opcode.SM_OVER_PIPE, 70_000, size, 1))
+        second = header.decode(header.encode(Opcode.SM_RESTORE, 10))
+        self.assertEqual(Opcode.SM_OVER_PIPE, first.opcode)
+        self.assertEqual(70_000, first.pipe_data_size)
+        self.assertEqual(size, first.sm_data_size)
+        self.assertEqual(1, first.flags)
+        self.assertEqual(first.sequence + 1, second.sequence)
+
+    def test_hello(self):
+        capabilities = Capabilities(
+            version=2,
+            flags=Capability.LEASE | Capability.HEADER_V2,
+            pipe_capacity=1024 * 1024,
+            backend=BackendKind.DIRECTORY,
+            max_message_size=300 * 1024**3,
+        )
+        header = Header()
+        decoder = HelloDecoder()
+        packets = [header.decode(data) for data in encode_hello(header, capabilities)]
+        self.assertTrue(all(p.opcode == Opcode.EMPTY for p in packets))
+        self.assertEqual([None] * 3, [decoder.feed(p) for p in packets[:-1]])
+        self.assertEqual(capabilities, decoder.feed(packets[-1]))
+
 
 if __name__ == "__main__":
     main()
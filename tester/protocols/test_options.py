@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from smipc.protocols.options import ProtocolOptions
+from smipc.server.base import BaseServer
+
+
+class ProtocolOptionsTestCase(TestCase):
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            ProtocolOptions(pipe_direct_threshold=-1)
+        with self.assertRaises(ValueError):
+            ProtocolOptions(scatter_chunk_size=0)
+        with self.assertRaises(ValueError):
+            ProtocolOptions(max_message_size=0)
+        with self.assertRaises(ValueError):
+            ProtocolOptions(coalesce_bytes=0)
+        with self.assertRaises(ValueError):
+            ProtocolOptions(restore_batch=0)
+
+    def test_pass_through(self):
+        options = ProtocolOptions(restore_batch=4, slot_ids=True)
+        with TemporaryDirectory() as tmpdir:
+            server = BaseServer(tmpdir, options=options)
+            channel = server.open("0")
+            client = server.create_client_channel("0")
+            try:
+                self.assertIs(options, server.options)
+                self.assertIs(options, channel.proto.options)
+                self.assertIs(options, client.proto.options)
+                self.assertEqual(0, channel.proto.flush_restores())
+            finally:
+                client.close()
+                channel.close()
+                channel.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,17 @@
 
 import os
 from asyncio import gather, to_thread
+from queue import Full
 from tempfile import TemporaryDirectory
 from unittest import IsolatedAsyncioTestCase, main
 
+import numpy as np
+
+from smipc.pipe.poll import wait_readable
 from smipc.pipe.temp import TemporaryPipe
+from smipc.protocols.options import ProtocolOptions
 from smipc.protocols.sm import SmProtocol
+from smipc.sm.backend import DirectoryBackend
 
 
 class SmTestCase(IsolatedAsyncioTestCase):
@@ -57,6 +63,584 @@ class SmTestCase(IsolatedAsyncioTestCase):
             self.assertFalse(os.path.exists(s2c_path))
             self.assertFalse(os.path.exists(c2s_path))
 
+    async def test_recv_into(self):
+        with TemporaryDirectory() as tmpdir:
+            s2c_path = os.path.join(tmpdir, "s2c.fifo")
+            c2s_path = os.path.join(tmpdir, "c2s.fifo")
+
+            with TemporaryPipe(s2c_path), TemporaryPipe(c2s_path):
+                server, client = await gather(
+                    to_thread(lambda: SmProtocol.from_fifo(s2c_path, c2s_path)),
+                    to_thread(lambda: SmProtocol.from_fifo(c2s_path, s2c_path)),
+                )
+
+                small = b"small"
+                buffer = bytearray(16)
+                server.send(small)
+                self.assertEqual(len(small), client.recv_into(buffer))
+                self.assertEqual(small, buffer[: len(small)])
+
+                frame = np.arange(1080 * 1920 * 3, dtype=np.uint8).reshape(
+                    1080, 1920, 3
+                )
+                image = np.zeros_like(frame)
+                server.send(frame.tobytes())
+                self.assertEqual(frame.nbytes, client.recv_into(image))
+                self.assertTrue(np.array_equal(frame, image))
+                self.assertIsNone(server.recv_into(buffer))  # Opcode.SM_RESTORE
+
+                server.send(small)
+                with self.assertRaises(ValueError):
+                    client.recv_into(bytearray(1))
+                self.assertEqual(small, client.recv())
+
+                # Any buffer is accepted, including non-contiguous arrays.
+                for array in (frame, frame[::2, ::2], frame[:4, :4]):
+                    server.send(array)
+                    self.assertEqual(array.tobytes(), client.recv())
+                    server.recv_many()  # Opcode.SM_RESTORE
+
+                server.close()
+                client.close()
+
+    async def test_attach_cache(self):
+        with TemporaryDirectory() as tmpdir:
+            s2c_path = os.path.join(tmpdir, "s2c.fifo")
+            c2s_path = os.path.join(tmpdir, "c2s.fifo")
+
+            with TemporaryPipe(s2c_path), TemporaryPipe(c2s_path):
+                server, client = await gather(
+                    to_thread(lambda: SmProtocol.from_fifo(s2c_path, c2s_path)),
+                    to_thread(lambda: SmProtocol.from_fifo(c2s_path, s2c_path)),
+                )
+
+                for i in range(10):
+                    data = str(i).encode() * 1024 * 1024
+                    server.send(data)
+                    self.assertEqual(data, client.recv())
+                    self.assertIsNone(server.recv())  # Opcode.SM_RESTORE
+
+                # The sender reuses a single pooled segment.
+                self.assertEqual(1, client.attached.misses)
+                self.assertEqual(9, client.attached.hits)
+
+                server.close()
+                client.close()
+
+    async def test_recv_lease(self):
+        with TemporaryDirectory() as tmpdir:
+            s2c_path = os.path.join(tmpdir, "s2c.fifo")
+            c2s_path = os.path.join(tmpdir, "c2s.fifo")
+
+            with TemporaryPipe(s2c_path), TemporaryPipe(c2s_path):
+                server, client = await gather(
+                    to_thread(lambda: SmProtocol.from_fifo(s2c_path, c2s_path)),
+                    to_thread(lambda: SmProtocol.from_fifo(c2s_path, s2c_path)),
+                )
+
+                image = np.arange(480 * 640 * 3, dtype=np.uint8).reshape(480, 640, 3)
+                server.send(image.tobytes())
+                server.send(b"small")
+
+                lease = client.recv_lease()
+                self.assertIsNotNone(lease)
+                assert lease is not None
+                self.assertTrue(lease.shared)
+                self.assertEqual(image.nbytes, lease.nbytes)
+
+                # The segment is not handed back while the lease is held.
+                with self.assertRaises(BlockingIOError):
+                    server.recv()
+                self.assertEqual(1, server.sms.size_working)
+
+                array = lease.ndarray(np.uint8, image.shape)
+                self.assertTrue(np.array_equal(image, array))
+                with self.assertRaises(BufferError):
+                    lease.release()
+                self.assertFalse(lease.released)
+
+                del array
+                lease.release()
+                self.assertTrue(lease.released)
+                self.assertIsNone(server.recv())  # Opcode.SM_RESTORE
+                self.assertEqual(0, server.sms.size_working)
+
+                with client.recv_lease() as small:
+                    self.assertFalse(small.shared)
+                    self.assertEqual(b"small", small.tobytes())
+
+                server.close()
+                client.close()
+
+    async def test_reserve(self):
+        with TemporaryDirectory() as tmpdir:
+            s2c_path = os.path.join(tmpdir, "s2c.fifo")
+            c2s_path = os.path.join(tmpdir, "c2s.fifo")
+
+            with TemporaryPipe(s2c_path), TemporaryPipe(c2s_path):
+                server, client = await gather(
+                    to_thread(lambda: SmProtocol.from_fifo(s2c_path, c2s_path)),
+                    to_thread(lambda: SmProtocol.from_fifo(c2s_path, s2c_path)),
+                )
+
+                shape = 480, 640, 3
+                image = np.arange(480 * 640 * 3, dtype=np.uint8).reshape(shape)
+                reservation = server.reserve(image.nbytes)
+                self.assertEqual(1, server.sms.size_working)
+                array = reservation.ndarray(np.uint8, shape)
+                np.copyto(array, image)
+                with self.assertRaises(BufferError):
+                    reservation.commit()
+                self.assertFalse(reservation.closed)
+
+                del array
+                info = reservation.commit()
+                self.assertTrue(reservation.closed)
+                self.assertEqual(image.nbytes, info.sm_byte)
+                self.assertEqual(image.tobytes(), client.recv())
+                self.assertIsNone(server.recv())  # Opcode.SM_RESTORE
+                self.assertEqual(0, server.sms.size_working)
+
+                with server.reserve(1024) as reservation:
+                    reservation.view[:5] = b"hello"
+                    reservation.commit(5)
+                self.assertEqual(b"hello", client.recv())
+                self.assertIsNone(server.recv())  # Opcode.SM_RESTORE
+
+                with self.assertRaises(RuntimeError):
+                    with server.reserve(1024):
+                        raise RuntimeError
+                self.assertEqual(0, server.sms.size_working)
+                self.assertEqual(1, server.sms.size_waiting)
+                with self.assertRaises(BlockingIOError):
+                    client.recv()
+
+                server.close()
+                client.close()
+
+    async def test_send_timeout(self):
+        with TemporaryDirectory() as tmpdir:
+            s2c_path = os.path.join(tmpdir, "s2c.fifo")
+            c2s_path = os.path.join(tmpdir, "c2s.fifo")
+
+            with TemporaryPipe(s2c_path), TemporaryPipe(c2s_path):
+                server, client = await gather(
+                    to_thread(
+                        lambda: SmProtocol.from_fifo(s2c_path, c2s_path, max_queue=1)
+                    ),
+                    to_thread(lambda: SmProtocol.from_fifo(c2s_path, s2c_path)),
+                )
+
+                first = b"1" * 1024 * 1024
+                second = b"2" * 1024 * 1024
+                server.send(first)
+                with self.assertRaises(Full):
+                    server.send(second)
+                with self.assertRaises(Full):
+                    server.send(second, timeout=0.01)
+
+                # The message in front of SM_RESTORE is kept for later.
+                client.send(b"hello")
+                self.assertEqual(first, client.recv())
+                server.send(second, timeout=10)
+                self.assertEqual(1, server.pending)
+                self.assertEqual(b"hello", server.recv())
+                self.assertEqual(second, client.recv())
+
+                server.close()
+                client.close()
+
+    async def test_scatter(self):
+        with TemporaryDirectory() as tmpdir:
+            s2c_path = os.path.join(tmpdir, "s2c.fifo")
+            c2s_path = os.path.join(tmpdir, "c2s.fifo")
+
+            with TemporaryPipe(s2c_path), TemporaryPipe(c2s_path):
+                server, client = await gather(
+                    to_thread(
+                        lambda: SmProtocol.from_fifo(
+                            s2c_path,
+                            c2s_path,
+                            options=ProtocolOptions(scatter_chunk_size=64 * 1024),
+                        )
+                    ),
+                    to_thread(lambda: SmProtocol.from_fifo(c2s_path, s2c_path)),
+                )
+
+                data = bytes(i % 251 for i in range(200_000))
+                self.assertEqual(len(data), server.send(data).sm_byte)
+                self.assertEqual(4, server.sms.size_working)
+                self.assertEqual(data, client.recv())
+                while server.sms.size_working:
+                    self.assertIsNone(server.recv())  # Opcode.SM_RESTORE
+
+                # The pooled chunks are reused by the next message.
+                server.send(data)
+                self.assertEqual(4, server.sms.created)
+
+                with self.assertRaises(ValueError):
+                    client.recv_into(bytearray(1000))
+                buffer = bytearray(len(data))
+                self.assertEqual(len(data), client.recv_into(buffer))
+                self.assertEqual(data, buffer)
+
+                server.send(data)
+                self.assertEqual(len(data), client.recv_into(buffer))
+                self.assertEqual(data, buffer)
+
+                server.send(data)
+                with client.recv_lease() as lease:
+                    self.assertEqual(data, lease.tobytes())
+
+                server.close()
+                client.close()
+
+    async def test_batch(self):
+        with TemporaryDirectory() as tmpdir:
+            s2c_path = os.path.join(tmpdir, "s2c.fifo")
+            c2s_path = os.path.join(tmpdir, "c2s.fifo")
+
+            with TemporaryPipe(s2c_path), TemporaryPipe(c2s_path):
+                server, client = await gather(
+                    to_thread(lambda: SmProtocol.from_fifo(s2c_path, c2s_path)),
+                    to_thread(lambda: SmProtocol.from_fifo(c2s_path, s2c_path)),
+                )
+
+                small = [b"a", b"", b"bc", np.arange(4, dtype=np.int32)[::2]]
+                expected = [b"a", b"", b"bc", np.array([0, 2], np.int32).tobytes()]
+                self.assertEqual(0, server.send_many(small).sm_byte)
+                server.send(b"after")
+                self.assertEqual(expected + [b"after"], client.recv_many())
+
+                large = [bytes(i % 251 for i in range(50_000)), b"xyz"]
+                self.assertLess(0, server.send_many(large).sm_byte)
+                self.assertEqual(1, server.sms.size_working)
+                self.assertEqual(large[0], client.recv())
+                self.assertEqual(large[1], client.recv())
+                while server.sms.size_working:
+                    self.assertIsNone(server.recv())  # Opcode.SM_RESTORE
+
+                server.send_many(small)
+                buffer = bytearray(10)
+                self.assertEqual(1, client.recv_into(buffer))
+                self.assertEqual(b"a", buffer[:1])
+                self.assertEqual(b"", client.recv())
+                with client.recv_lease() as lease:
+                    self.assertEqual(b"bc", lease.tobytes())
+                self.assertEqual(expected[3], client.recv())
+
+                self.assertEqual(0, server.send_many([]).pipe_byte)
+
+                server.close()
+                client.close()
+
+    async def test_coalesce(self):
+        with TemporaryDirectory() as tmpdir:
+            s2c_path = os.path.join(tmpdir, "s2c.fifo")
+            c2s_path = os.path.join(tmpdir, "c2s.fifo")
+
+            with TemporaryPipe(s2c_path), TemporaryPipe(c2s_path):
+                server, client = await gather(
+                    to_thread(
+                        lambda: SmProtocol.from_fifo(
+                            s2c_path,
+                            c2s_path,
+                            options=ProtocolOptions(
+                                coalesce_bytes=64, coalesce_delay=0.05
+                            ),
+                        )
+                    ),
+                    to_thread(lambda: SmProtocol.from_fifo(c2s_path, s2c_path)),
+                )
+                self.assertTrue(server.coalescing)
+                self.assertEqual(64, server.coalesce_limit)
+
+                self.assertEqual(0, server.send(b"a").pipe_byte)
+                self.assertEqual(0, server.send(b"b").pipe_byte)
+                self.assertEqual([], client.recv_many())
+                self.assertEqual(2, server.flush())
+                self.assertEqual(0, server.flush())
+                self.assertEqual([b"a", b"b"], client.recv_many())
+
+                # The byte limit flushes the messages that do not fit anymore.
+                for i in range(5):
+                    server.send(bytes([i]) * 20)
+                expected = [bytes([i]) * 20 for i in range(4)]
+                self.assertEqual(expected, client.recv_many())
+
+                # Larger messages flush the buffer first, to keep the order.
+                server.send(b"x" * 100)
+                self.assertEqual([b"\x04" * 20, b"x" * 100], client.recv_many())
+
+                # The delay flushes the rest.
+                server.send(b"late")
+                self.assertTrue(wait_readable(client.pipe.reader, 5.0))
+                self.assertEqual(b"late", client.recv())
+
+                server.send(b"closing")
+                server.close()
+                self.assertEqual(b"closing", client.recv())
+                client.close()
+
+    async def test_restore_batch(self):
+        with TemporaryDirectory() as tmpdir:
+            s2c_path = os.path.join(tmpdir, "s2c.fifo")
+            c2s_path = os.path.join(tmpdir, "c2s.fifo")
+
+            with TemporaryPipe(s2c_path), TemporaryPipe(c2s_path):
+                server, client = await gather(
+                    to_thread(
+                        lambda: SmProtocol.from_fifo(
+                            s2c_path,
+                            c2s_path,
+                            options=ProtocolOptions(pipe_direct_threshold=0),
+                        )
+                    ),
+                    to_thread(
+                        lambda: SmProtocol.from_fifo(
+                            c2s_path,
+                            s2c_path,
+                            options=ProtocolOptions(
+                                restore_batch=3, restore_delay=60.0
+                            ),
+                        )
+                    ),
+                )
+
+                data = [bytes([i]) * 1000 for i in range(3)]
+                for message in data:
+                    server.send(message)
+                self.assertEqual(3, server.sms.size_working)
+
+                self.assertEqual(data[0], client.recv())
+                self.assertEqual(data[1], client.recv())
+                self.assertEqual([], server.recv_many())
+                self.assertEqual(3, server.sms.size_working)
+
+                # The third segment completes the batch, acknowledged in one frame.
+                self.assertEqual(data[2], client.recv())
+                self.assertEqual([], server.recv_many())
+                self.assertEqual(0, server.sms.size_working)
+
+                server.send(data[0])
+                with client.recv_lease() as lease:
+                    self.assertEqual(data[0], lease.tobytes())
+                self.assertEqual(1, client.flush_restores())
+                self.assertIsNone(server.recv())  # Opcode.SM_RESTORE
+                self.assertEqual(0, server.sms.size_working)
+
+                server.close()
+                client.close()
+
+    async def test_slot_ids(self):
+        with TemporaryDirectory() as tmpdir:
+            s2c_path = os.path.join(tmpdir, "s2c.fifo")
+            c2s_path = os.path.join(tmpdir, "c2s.fifo")
+
+            with TemporaryPipe(s2c_path), TemporaryPipe(c2s_path):
+                server, client = await gather(
+                    to_thread(
+                        lambda: SmProtocol.from_fifo(
+                            s2c_path,
+                            c2s_path,
+                            options=ProtocolOptions(
+                                pipe_direct_threshold=0, slot_ids=True
+                            ),
+                        )
+                    ),
+                    to_thread(lambda: SmProtocol.from_fifo(c2s_path, s2c_path)),
+                )
+
+                # The name is sent once, then only the header with the slot id.
+                data = bytes(range(256)) * 4
+                first = server.send(data)
+                self.assertLess(2 * server.header_size, first.pipe_byte)
+                self.assertEqual(data, client.recv())
+                self.assertIsNone(server.recv())  # Opcode.SM_RESTORE_SLOT
+                self.assertEqual(0, server.sms.size_working)
+
+                second = server.send(data)
+                self.assertEqual(server.header_size, second.pipe_byte)
+                buffer = bytearray(len(data))
+                self.assertEqual(len(data), client.recv_into(buffer))
+                self.assertEqual(data, buffer)
+                self.assertIsNone(server.recv())
+
+                server.send(data)
+                with client.recv_lease() as lease:
+                    self.assertEqual(data, lease.tobytes())
+                    self.assertEqual(1, server.sms.size_working)
+                self.assertIsNone(server.recv())
+                self.assertEqual(0, server.sms.size_working)
+                self.assertEqual(1, server.sms.created)
+
+                server.close()
+                client.close()
+
+    async def test_directory_backend(self):
+        with TemporaryDirectory() as tmpdir, TemporaryDirectory() as sm_dir:
+            s2c_path = os.path.join(tmpdir, "s2c.fifo")
+            c2s_path = os.path.join(tmpdir, "c2s.fifo")
+            backend = DirectoryBackend(sm_dir)
+
+            with TemporaryPipe(s2c_path), TemporaryPipe(c2s_path):
+                server, client = await gather(
+                    to_thread(
+                        lambda: SmProtocol.from_fifo(
+                            s2c_path,
+                            c2s_path,
+                            options=ProtocolOptions(
+                                backend=backend, arena_size=1024 * 1024
+                            ),
+                        )
+                    ),
+                    to_thread(lambda: SmProtocol.from_fifo(c2s_path, s2c_path)),
+                )
+
+                # The receiver finds the segments from their names only.
+                for data in (b"A" * 512 * 1024, b"B" * 2 * 1024 * 1024):
+                    server.send(data)
+                    self.assertEqual(data, client.recv())
+                    self.assertIsNone(server.recv())  # Opcode.*_RESTORE
+                self.assertEqual(2, len(os.listdir(sm_dir)))
+
+                server.close()
+                client.close()
+                self.assertEqual([], os.listdir(sm_dir))
+
+    async def test_arena(self):
+        with TemporaryDirectory() as tmpdir:
+            s2c_path = os.path.join(tmpdir, "s2c.fifo")
+            c2s_path = os.path.join(tmpdir, "c2s.fifo")
+            arena_size = 8 * 1024 * 1024
+
+            with TemporaryPipe(s2c_path), TemporaryPipe(c2s_path):
+                server, client = await gather(
+                    to_thread(
+                        lambda: SmProtocol.from_fifo(
+                            s2c_path,
+                            c2s_path,
+                            options=ProtocolOptions(arena_size=arena_size),
+                        )
+                    ),
+                    to_thread(lambda: SmProtocol.from_fifo(c2s_path, s2c_path)),
+                )
+                self.assertIsNotNone(server.arena)
+                self.assertIsNone(client.arena)
+
+                for i in range(3):
+                    data = str(i).encode() * 1024 * 1024
+                    server.send(data)
+                    self.assertEqual(data, client.recv())
+                    self.assertIsNone(server.recv())  # Opcode.ARENA_RESTORE
+                    self.assertEqual(0, server.arena.allocator.allocated)
+
+                # No segment of the pool has been used, and the arena is mapped once.
+                self.assertEqual(0, server.sms.created)
+                self.assertEqual(1, client.attached.misses)
+
+                # Messages that do not fit in the arena fall back to the pool.
+                large = b"L" * (arena_size + 1)
+                server.send(large)
+                self.assertEqual(large, client.recv())
+                self.assertIsNone(server.recv())  # Opcode.SM_RESTORE
+                self.assertEqual(1, server.sms.created)
+
+                image = np.arange(1024 * 1024, dtype=np.uint8)
+                server.send(image.tobytes())
+                buffer = np.zeros_like(image)
+                self.assertEqual(image.nbytes, client.recv_into(buffer))
+                self.assertTrue(np.array_equal(image, buffer))
+                self.assertIsNone(server.recv())  # Opcode.ARENA_RESTORE
+
+                server.send(image.tobytes())
+                with client.recv_lease() as lease:
+                    self.assertTrue(lease.shared)
+                    self.assertEqual(image.tobytes(), lease.tobytes())
+                    self.assertEqual(1, server.arena.allocator.allocated)
+                self.assertIsNone(server.recv())  # Opcode.ARENA_RESTORE
+                self.assertEqual(0, server.arena.allocator.allocated)
+
+                server.close()
+                client.close()
+
+    async def test_ring(self):
+        with TemporaryDirectory() as tmpdir:
+            s2c_path = os.path.join(tmpdir, "s2c.fifo")
+            c2s_path = os.path.join(tmpdir, "c2s.fifo")
+            ring_size = 256 * 1024
+
+            with TemporaryPipe(s2c_path), TemporaryPipe(c2s_path):
+                server, client = await gather(
+                    to_thread(
+                        lambda: SmProtocol.from_fifo(
+                            s2c_path,
+                            c2s_path,
+                            options=ProtocolOptions(ring_size=ring_size),
+                        )
+                    ),
+                    to_thread(
+                        lambda: SmProtocol.from_fifo(
+                            c2s_path,
+                            s2c_path,
+                            options=ProtocolOptions(ring_size=ring_size),
+                        )
+                    ),
+                )
+                self.assertEqual(server.ring_direct_size, server.pipe_direct_threshold)
+
+                with self.assertRaises(BlockingIOError):
+                    client.recv()
+
+                # Switched to the ring by the first message.
+                server.send(b"hello")
+                self.assertEqual(b"hello", client.recv())
+                self.assertIsNotNone(client.ring_reader)
+
+                # The consumer is parked, so the doorbell is rung once.
+                messages = [str(i).encode() * 1000 for i in range(10)]
+                for message in messages:
+                    server.send(message)
+                self.assertEqual(messages, client.recv_many())
+                self.assertEqual([], client.recv_many())
+
+                # Large messages go through the shared memory pool, still in order.
+                large = b"L" * (1024 * 1024)
+                server.send(b"before")
+                server.send(large)
+                server.send(b"after")
+                self.assertEqual(b"before", client.recv())
+                self.assertEqual(large, client.recv())
+                self.assertEqual(b"after", client.recv())
+                self.assertIsNone(server.recv())  # Opcode.SM_RESTORE through a ring
+                self.assertEqual(0, server.sms.size_working)
+
+                # Larger than a ring record, so sent through a segment instead.
+                medium = np.arange(300 * 1024, dtype=np.uint8)
+                server.send_pipe_direct(medium.tobytes())
+                buffer = np.zeros_like(medium)
+                self.assertEqual(medium.nbytes, client.recv_into(buffer))
+                self.assertTrue(np.array_equal(medium, buffer))
+                self.assertIsNone(server.recv())
+
+                # A full ring does not wait in non-blocking mode.
+                record = bytes(server.ring_direct_size)
+                with self.assertRaises(BlockingIOError):
+                    for _ in range(ring_size // len(record) + 1):
+                        server.send_pipe_direct(record)
+                while client.recv_many():
+                    pass
+                server.send(b"drained")
+                self.assertEqual(b"drained", client.recv())
+
+                with self.assertRaises(BlockingIOError):
+                    client.recv()
+
+                server.close()
+                with self.assertRaises(EOFError):
+                    client.recv()
+                client.close()
+
 
 if __name__ == "__main__":
     main()
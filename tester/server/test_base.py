@@ -2,10 +2,12 @@
 
 import os
 from tempfile import TemporaryDirectory
-from unittest import TestCase, main
+from unittest import TestCase, main, skipUnless
 
+from smipc.pipe.conf import has_pipe_capacity
 from smipc.protocols.header import Opcode
-from smipc.server.base import BaseServer
+from smipc.protocols.options import ProtocolOptions
+from smipc.server.base import BaseClient, BaseServer
 
 
 class BaseTestCase(TestCase):
@@ -48,6 +50,68 @@ class BaseTestCase(TestCase):
             client2.close()
             channel2.cleanup()
 
+    @skipUnless(has_pipe_capacity(), "The pipe capacity is only available on Linux")
+    def test_pipe_direct_threshold(self):
+        with TemporaryDirectory() as tmpdir:
+            capacity = 1024 * 1024
+            threshold = 512 * 1024
+            server = BaseServer(
+                tmpdir,
+                options=ProtocolOptions(
+                    pipe_capacity=capacity, pipe_direct_threshold=threshold
+                ),
+            )
+
+            channel = server.open("0")
+            client = BaseClient.from_root(
+                tmpdir,
+                "0",
+                options=ProtocolOptions(
+                    pipe_capacity=capacity, pipe_direct_threshold=threshold
+                ),
+            )
+            self.assertLessEqual(capacity, channel.writer.pipe_capacity)
+            self.assertLessEqual(capacity, client.writer.pipe_capacity)
+
+            for size in (16 * 1024, 100_000, threshold):
+                data = bytes(i % 251 for i in range(size))
+                written = channel.send(data)
+                self.assertEqual(0, written.sm_byte)
+                self.assertLess(size, written.pipe_byte)
+                self.assertEqual(data, client.recv())
+
+                buffer = bytearray(size)
+                self.assertEqual(0, client.send(data).sm_byte)
+                self.assertEqual(size, channel.recv_into(buffer))
+                self.assertEqual(data, buffer)
+
+            self.assertLess(0, channel.send(b"x" * (threshold + 1)).sm_byte)
+
+            channel.close()
+            client.close()
+            channel.cleanup()
+
+    @skipUnless(has_pipe_capacity(), "The pipe capacity is only available on Linux")
+    def test_pipe_direct_threshold_above_capacity(self):
+        with TemporaryDirectory() as tmpdir:
+            server = BaseServer(
+                tmpdir, options=ProtocolOptions(pipe_direct_threshold=512 * 1024)
+            )
+            channel = server.open("0")
+            client = BaseClient.from_root(tmpdir, "0")
+
+            # Clamped to the capacity of the pipe, instead of blocking forever.
+            capacity = channel.writer.pipe_capacity
+            self.assertGreaterEqual(capacity, channel.proto.pipe_direct_threshold)
+
+            data = b"x" * 300_000
+            self.assertEqual(len(data), channel.send(data).sm_byte)
+            self.assertEqual(data, client.recv())
+
+            channel.close()
+            client.close()
+            channel.cleanup()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from smipc.sm.arena import ArenaWritten, FreeListAllocator, SharedMemoryArena
+
+
+class FreeListAllocatorTestCase(TestCase):
+    def test_default(self):
+        allocator = FreeListAllocator(1024, 64)
+        a = allocator.allocate(100)
+        b = allocator.allocate(64)
+        c = allocator.allocate(1)
+        self.assertEqual(0, a)
+        self.assertEqual(128, b)
+        self.assertEqual(192, c)
+        self.assertEqual(3, allocator.allocated)
+        self.assertEqual(256, allocator.used)
+        self.assertIsNone(allocator.allocate(1024))
+
+        # Best-fit: the hole left by 'b' is reused for a block of the same size.
+        allocator.free(b)
+        self.assertEqual(2, allocator.fragments)
+        self.assertEqual(128, allocator.allocate(10))
+        allocator.free(128)
+
+        # Freed blocks are merged with their free neighbors.
+        allocator.free(a)
+        allocator.free(c)
+        self.assertEqual(1, allocator.fragments)
+        self.assertEqual(0, allocator.used)
+        self.assertEqual(0, allocator.allocate(1024))
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            FreeListAllocator(0)
+        with self.assertRaises(ValueError):
+            FreeListAllocator(1024, 3)
+        with self.assertRaises(ValueError):
+            FreeListAllocator(1024).allocate(0)
+
+
+class SharedMemoryArenaTestCase(TestCase):
+    def test_default(self):
+        arena = SharedMemoryArena(7, 4096)
+        try:
+            written = arena.write(b"hello")
+            assert written is not None
+            self.assertEqual(7, written.arena_id)
+            self.assertEqual(
+                b"hello", bytes(arena.sm.buf[written.offset : written.end])
+            )
+
+            location = written.encode_location()
+            self.assertEqual(written, ArenaWritten.decode_location(location, 5))
+
+            self.assertIsNone(arena.write(bytes(4096)))
+            arena.free(written)
+            self.assertEqual(0, arena.allocator.allocated)
+        finally:
+            arena.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+import gc
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main, skipUnless
+from unittest.mock import patch
+
+from smipc.sm.backend import (
+    DirectoryBackend,
+    FileSharedMemory,
+    NativeSharedMemory,
+    PosixBackend,
+    has_native_shared_memory,
+    open_shared_memory,
+)
+from smipc.sm.utils import create_shared_memory, destroy_shared_memory
+
+
+class BackendTestCase(TestCase):
+    def test_posix(self):
+        sm = create_shared_memory(4096, PosixBackend(huge_pages=True))
+        try:
+            self.assertFalse(os.path.isabs(sm.name))
+            sm.buf[:3] = b"abc"
+            peer = open_shared_memory(sm.name)
+            self.assertEqual(b"abc", bytes(peer.buf[:3]))
+            peer.close()
+        finally:
+            destroy_shared_memory(sm)
+
+    def test_directory(self):
+        with TemporaryDirectory() as tmpdir:
+            backend = DirectoryBackend(tmpdir)
+            sm = create_shared_memory(100, backend)
+            self.assertIsInstance(sm, FileSharedMemory)
+            self.assertEqual(tmpdir, os.path.dirname(sm.name))
+            self.assertEqual(backend.page_size, sm.size)
+
+            sm.buf[:3] = b"abc"
+            peer = open_shared_memory(sm.name)
+            self.assertEqual(sm.size, peer.size)
+            self.assertEqual(b"abc", bytes(peer.buf[:3]))
+            peer.close()
+
+            destroy_shared_memory(sm)
+            self.assertEqual([], os.listdir(tmpdir))
+            with self.assertRaises(FileNotFoundError):
+                open_shared_memory(sm.name)
+
+    def test_not_a_directory(self):
+        with TemporaryDirectory() as tmpdir:
+            with self.assertRaises(NotADirectoryError):
+                DirectoryBackend(os.path.join(tmpdir, "missing"))
+
+    @skipUnless(has_native_shared_memory(), "POSIX shared memory is required")
+    def test_native(self):
+        with patch("multiprocessing.resource_tracker.register") as register:
+            sm = create_shared_memory(4096, PosixBackend())
+            peer = open_shared_memory(sm.name)
+            self.assertIsInstance(sm, NativeSharedMemory)
+            self.assertIsInstance(peer, NativeSharedMemory)
+
+            sm.buf[:3] = b"abc"
+            self.assertEqual(b"abc", bytes(peer.buf[:3]))
+            peer.close()
+            destroy_shared_memory(sm)
+            register.assert_not_called()
+
+        with self.assertRaises(FileNotFoundError):
+            open_shared_memory(sm.name)
+
+    @skipUnless(has_native_shared_memory(), "POSIX shared memory is required")
+    def test_native_collected(self):
+        sm = create_shared_memory(4096, PosixBackend())
+        name = sm.name
+        sm.close()
+        del sm
+        gc.collect()
+
+        # The owner is gone, so is the segment.
+        with self.assertRaises(FileNotFoundError):
+            open_shared_memory(name)
+
+
+if __name__ == "__main__":
+    main()
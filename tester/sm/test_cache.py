@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from smipc.sm.cache import SharedMemoryCache
+from smipc.sm.utils import create_shared_memory, destroy_shared_memory
+
+
+class SharedMemoryCacheTestCase(TestCase):
+    def setUp(self):
+        self.cache = SharedMemoryCache(max_size=2)
+        self.sms = [create_shared_memory(16) for _ in range(3)]
+        for i, sm in enumerate(self.sms):
+            sm.buf[:4] = str(i).encode() * 4
+
+    def tearDown(self):
+        self.cache.clear()
+        for sm in self.sms:
+            try:
+                destroy_shared_memory(sm)
+            except FileNotFoundError:
+                pass
+
+    def test_hits_and_eviction(self):
+        sm0, sm1, sm2 = self.sms
+        self.assertEqual(b"0000", self.cache.read(sm0.name, size=4))
+        self.assertEqual(b"0000", self.cache.read(sm0.name, size=4))
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(1, self.cache.misses)
+
+        self.assertEqual(b"1111", self.cache.read(sm1.name, size=4))
+        self.assertEqual(b"2222", self.cache.read(sm2.name, size=4))
+        self.assertEqual(2, self.cache.size)
+        self.assertNotIn(sm0.name, self.cache)
+
+        buffer = bytearray(4)
+        self.assertEqual(4, self.cache.read_into(sm1.name, buffer, size=4))
+        self.assertEqual(b"1111", buffer)
+        self.assertEqual(2, self.cache.hits)
+
+    def test_invalidate_destroyed(self):
+        sm0 = self.sms[0]
+        self.assertEqual(b"0000", self.cache.read(sm0.name, size=4))
+        destroy_shared_memory(sm0)
+
+        with self.assertRaises(FileNotFoundError):
+            self.cache.read(sm0.name, size=4)
+        self.assertNotIn(sm0.name, self.cache)
+
+
+if __name__ == "__main__":
+    main()
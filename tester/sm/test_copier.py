@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+import numpy as np
+
+from smipc.sm.copier import ParallelCopier
+from smipc.sm.queue import SharedMemoryQueue
+
+
+class ParallelCopierTestCase(TestCase):
+    def setUp(self):
+        self.copier = ParallelCopier(max_workers=4, threshold=1, chunk_size=4096)
+
+    def tearDown(self):
+        self.copier.close()
+
+    def test_copy(self):
+        data = np.random.randint(0, 256, 100_000, dtype=np.uint8).tobytes()
+        dest = bytearray(len(data) + 10)
+        self.assertEqual(len(data), self.copier.copy(dest, data))
+        self.assertEqual(data, dest[: len(data)])
+        self.assertEqual(bytes(10), dest[len(data) :])
+
+        # Non-contiguous buffers are copied in the caller.
+        array = np.arange(10_000, dtype=np.int32).reshape(100, 100)[:, ::2]
+        dest = bytearray(array.nbytes)
+        self.assertEqual(array.nbytes, self.copier.copy(dest, array))
+        self.assertEqual(array.tobytes(), dest)
+
+        with self.assertRaises(ValueError):
+            self.copier.copy(bytearray(10), data)
+
+    def test_queue(self):
+        smq = SharedMemoryQueue(copier=self.copier)
+        try:
+            data = np.arange(50_000, dtype=np.float64)
+            written = smq.write(data)
+            name = str(written.name)
+            self.assertEqual(data.tobytes(), smq.read(name, size=written.size))
+
+            buffer = np.empty_like(data)
+            size = smq.read_into(name, buffer, size=written.size, copier=self.copier)
+            self.assertEqual(data.nbytes, size)
+            np.testing.assert_array_equal(data, buffer)
+            smq.restore(name)
+        finally:
+            smq.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from smipc.sm.backend import (
+    DirectoryBackend,
+    PosixBackend,
+    make_segment_name,
+    make_segment_tag,
+    parse_segment_pid,
+)
+from smipc.sm.janitor import (
+    collect_orphans,
+    find_manifests,
+    is_process_alive,
+    read_manifest,
+    write_manifest,
+)
+from smipc.sm.utils import create_shared_memory, destroy_shared_memory
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+class _Owner:
+    pass
+
+
+class JanitorTestCase(TestCase):
+    def test_segment_name(self):
+        tag = make_segment_tag("channel")
+        self.assertEqual(8, len(tag))
+        name = make_segment_name(tag)
+        self.assertLessEqual(len(name), 31)
+        self.assertIn(f"_{tag}_", name)
+        self.assertEqual(os.getpid(), parse_segment_pid(name))
+        self.assertEqual(os.getpid(), parse_segment_pid(make_segment_name()))
+        self.assertIsNone(parse_segment_pid("psm_1234"))
+        self.assertIsNone(parse_segment_pid("smipc_abc_1234"))
+
+        sm = create_shared_memory(4096, PosixBackend(), tag)
+        try:
+            self.assertEqual(os.getpid(), parse_segment_pid(sm.name))
+            self.assertIn(tag, sm.name)
+        finally:
+            destroy_shared_memory(sm)
+
+    def test_manifest(self):
+        with TemporaryDirectory() as root:
+            owner = _Owner()
+            path = write_manifest(root, "tag", [root, None], owner)
+            self.assertEqual([path], find_manifests(root))
+
+            manifest = read_manifest(path)
+            self.assertEqual(os.getpid(), manifest.pid)
+            self.assertEqual("tag", manifest.tag)
+            self.assertEqual([root], manifest.storage_paths)
+
+            del owner
+            self.assertEqual([], find_manifests(root))
+
+    def test_collect_orphans(self):
+        with TemporaryDirectory() as root, TemporaryDirectory() as storage:
+            pid = _dead_pid()
+            self.assertFalse(is_process_alive(pid))
+            self.assertTrue(is_process_alive(os.getpid()))
+
+            orphan = os.path.join(storage, f"smipc_{pid}_tag_0000")
+            with open(orphan, "wb") as f:
+                f.write(b"x")
+            manifest = os.path.join(root, f"smipc_{pid}_tag_0000.owner")
+            with open(manifest, "w") as f:
+                json.dump({"pid": pid, "tag": "tag", "storage_paths": [storage]}, f)
+
+            alive = create_shared_memory(100, DirectoryBackend(storage), "tag")
+            unrelated = os.path.join(storage, "psm_0000")
+            with open(unrelated, "wb") as f:
+                f.write(b"x")
+
+            try:
+                found = collect_orphans(root, dry_run=True)
+                self.assertIn(orphan, found)
+                self.assertIn(manifest, found)
+                self.assertTrue(os.path.exists(orphan))
+
+                removed = collect_orphans(root)
+                self.assertIn(orphan, removed)
+                self.assertIn(manifest, removed)
+                self.assertNotIn(alive.name, removed)
+                self.assertFalse(os.path.exists(orphan))
+                self.assertFalse(os.path.exists(manifest))
+                self.assertTrue(os.path.exists(alive.name))
+                self.assertTrue(os.path.exists(unrelated))
+            finally:
+                destroy_shared_memory(alive)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from smipc.sm.prefault import has_mlock, lock_pages, prefault, touch_pages
+from smipc.sm.utils import create_shared_memory, destroy_shared_memory
+
+
+class PrefaultTestCase(TestCase):
+    def setUp(self):
+        self.sm = create_shared_memory(64 * 1024)
+
+    def tearDown(self):
+        destroy_shared_memory(self.sm)
+
+    def test_prefault(self):
+        prefault(self.sm)
+        touch_pages(self.sm)
+        self.assertEqual(bytes(self.sm.size), bytes(self.sm.buf))
+
+    def test_lock_pages(self):
+        if not has_mlock():
+            self.skipTest("The 'mlock' function is not available")
+        try:
+            lock_pages(self.sm)
+        except PermissionError:
+            self.skipTest("Locking memory is not permitted")
+        except OSError as e:
+            self.skipTest(f"The locked memory limit is reached: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
 # -*- coding: utf-8 -*-
 
 from multiprocessing.shared_memory import SharedMemory
-from unittest import TestCase, main
+from queue import Full
+from tempfile import TemporaryDirectory
+from time import monotonic, sleep
+from unittest import TestCase, main, skipIf
 
+import numpy as np
+
+from smipc.sm.backend import DirectoryBackend, get_default_backend
 from smipc.sm.queue import SharedMemoryQueue
 
 
@@ -67,6 +73,245 @@ class SharedMemoryQueueTestCase(TestCase):
         self.assertEqual(0, self.smq.size_waiting)
         self.assertEqual(0, self.smq.size_working)
 
+    def test_multi_rent(self):
+        with self.smq.multi_rent(3, 4096) as sms:
+            self.assertEqual(3, len(sms))
+            self.assertEqual(3, self.smq.size_working)
+        self.assertEqual(3, self.smq.size_waiting)
+        self.assertEqual(0, self.smq.size_working)
+
+        smq = SharedMemoryQueue(2)
+        try:
+            with self.assertRaises(Full):
+                smq.multi_rent(3, 4096)
+            self.assertEqual(0, smq.size_working)
+        finally:
+            smq.cleanup()
+
+    def test_restore_many(self):
+        writtens = [self.smq.write(bytes([i]) * 100) for i in range(3)]
+        self.assertEqual(3, self.smq.size_working)
+        self.smq.restore_many(str(w.name) for w in writtens)
+        self.assertEqual(0, self.smq.size_working)
+        self.assertEqual(3, self.smq.size_waiting)
+
+    def test_slots(self):
+        first = self.smq.write(b"a" * 100)
+        second = self.smq.write(b"b" * 100)
+        self.assertEqual({0, 1}, {first.slot, second.slot})
+        self.assertEqual(first.slot, self.smq.slot_of(str(first.name)))
+
+        self.smq.restore_slot(first.slot)
+        self.assertEqual(1, self.smq.size_working)
+        reused = self.smq.write(b"c" * 100)
+        self.assertEqual((first.name, first.slot), (reused.name, reused.slot))
+
+        self.smq.restore_slot(reused.slot)
+        self.smq.restore_slot(second.slot)
+        self.smq.clear_waiting()
+        with self.assertRaises(KeyError):
+            self.smq.restore_slot(first.slot)
+        self.assertIn(self.smq.write(b"d" * 100).slot, (0, 1))  # Freed slots.
+
+    def test_write_scatter(self):
+        data = bytes(i % 251 for i in range(10_000))
+        writtens = self.smq.write_scatter(data, 4096)
+        self.assertEqual([4096, 4096, 1808], [w.size for w in writtens])
+        self.assertEqual(3, self.smq.size_working)
+
+        chunks = [self.smq.read(str(w.name), size=w.size) for w in writtens]
+        self.assertEqual(data, b"".join(chunks))
+        for written in writtens:
+            self.smq.restore(str(written.name))
+
+        # The same pooled chunks serve the next message.
+        array = np.arange(2000, dtype=np.int64)[::2]
+        writtens = self.smq.write_scatter(array, 4096)
+        self.assertEqual(2, self.smq.size_working)
+        self.assertEqual(3, self.smq.created)
+
+        chunks = [self.smq.read(str(w.name), size=w.size) for w in writtens]
+        self.assertEqual(array.tobytes(), b"".join(chunks))
+
+    def test_size_classes(self):
+        small = 64 * 1024
+        large = 6 * 1024 * 1024
+
+        for _ in range(10):
+            written_small = self.smq.write(b"s" * small)
+            written_large = self.smq.write(b"L" * large)
+            self.smq.restore(str(written_small.name))
+            self.smq.restore(str(written_large.name))
+
+        # Alternating sizes keep reusing the same two warm segments.
+        self.assertEqual(2, self.smq.created)
+        self.assertEqual(18, self.smq.reused)
+        self.assertEqual(2, self.smq.size_waiting)
+        self.assertEqual(0, self.smq.size_working)
+
+        # Best-fit: the smallest idle segment that fits is used.
+        written = self.smq.write(b"x" * 100)
+        self.assertEqual(written_small.name, written.name)
+        self.smq.restore(str(written.name))
+
+    def test_max_per_class(self):
+        smq = SharedMemoryQueue(max_per_class=1)
+        try:
+            names = [smq.write(b"abc").name for _ in range(3)]
+            self.assertEqual(3, smq.size_working)
+            for name in names:
+                smq.restore(str(name))
+            self.assertEqual(1, smq.size_waiting)
+            self.assertEqual(0, smq.size_working)
+        finally:
+            smq.cleanup()
+
+    def test_write_buffers(self):
+        image = np.arange(6 * 8 * 3, dtype=np.uint16).reshape(6, 8, 3)
+        strided = image[::2, 1::3]
+        self.assertFalse(strided.flags.c_contiguous)
+
+        for data in (bytearray(b"abc"), memoryview(b"abcdef")[2:], image, strided):
+            expected = memoryview(data).tobytes()
+            written = self.smq.write(data, offset=1)
+            self.assertEqual(len(expected), written.size)
+            sm = self.smq.find_working(str(written.name))
+            self.assertEqual(expected, bytes(sm.buf[1 : 1 + len(expected)]))
+            self.smq.restore(str(written.name))
+
+    def test_prewarm(self):
+        smq = SharedMemoryQueue(prefault=True)
+        try:
+            self.assertEqual(3, smq.prewarm(5000, 3))
+            self.assertEqual(0, smq.prewarm(5000, 3))
+            self.assertEqual(3, smq.size_waiting)
+
+            written = smq.write(b"x" * 5000)
+            self.assertEqual(1, smq.reused)
+            self.assertEqual(1, smq.prewarm(5000, 3))
+            smq.restore(str(written.name))
+            self.assertEqual(4, smq.size_waiting)
+        finally:
+            smq.cleanup()
+
+    def test_refill(self):
+        smq = SharedMemoryQueue()
+        try:
+            smq.start_refill(5000, 2, interval=0.001)
+            self.assertTrue(smq.refilling)
+            for _ in range(10):
+                smq.write(b"x" * 5000)
+
+            deadline = monotonic() + 10
+            while smq.size_waiting < 2 and monotonic() < deadline:
+                sleep(0.001)
+            smq.stop_refill()
+            self.assertFalse(smq.refilling)
+            self.assertEqual(2, smq.size_waiting)
+            self.assertEqual(10, smq.size_working)
+        finally:
+            smq.cleanup()
+
+    def test_refill_error(self):
+        smq = SharedMemoryQueue()
+        new_segment = smq._new_segment
+        failures = [OSError(28, "No space left on device")]
+
+        def _new_segment(size: int):
+            if failures:
+                raise failures.pop()
+            return new_segment(size)
+
+        smq._new_segment = _new_segment  # type: ignore[method-assign]
+        try:
+            with self.assertLogs("smipc.sm.worker", "WARNING"):
+                smq.start_refill(5000, 2, interval=0.001)
+                deadline = monotonic() + 10
+                while smq.size_waiting < 2 and monotonic() < deadline:
+                    sleep(0.001)
+
+            refiller = smq.refiller
+            assert refiller is not None
+            self.assertEqual(2, smq.size_waiting)
+            self.assertTrue(smq.refilling)
+            self.assertEqual(1, refiller.error_count)
+            self.assertIsInstance(refiller.last_error, OSError)
+        finally:
+            smq.cleanup()
+
+    def test_limits(self):
+        smq = SharedMemoryQueue(2, max_bytes=3 * 4096)
+        try:
+            first = smq.write(b"x" * 4096)
+            second = smq.write(b"x" * 4096)
+            self.assertTrue(smq.is_full)
+            with self.assertRaises(Full):
+                smq.write(b"x")
+
+            smq.restore(str(second.name))
+            self.assertFalse(smq.is_full)
+            self.assertFalse(smq.has_room(3 * 4096))
+            self.assertTrue(smq.has_room(2 * 4096))
+            with self.assertRaises(Full):
+                smq.write(b"x" * 3 * 4096)
+            with self.assertRaises(ValueError):
+                smq.has_room(4 * 4096)
+
+            smq.restore(str(first.name))
+            self.assertEqual(0, smq.working_bytes)
+        finally:
+            smq.cleanup()
+
+    def test_trim(self):
+        smq = SharedMemoryQueue(idle_ttl=10, max_waiting_bytes=2 * 4096)
+        try:
+            names = [smq.write(b"x" * 4096).name for _ in range(4)]
+            for name in names:
+                smq.restore(str(name))
+            self.assertEqual(4 * 4096, smq.waiting_bytes)
+
+            # The oldest idle segments are evicted first, down to the cap.
+            self.assertEqual(2, smq.trim())
+            self.assertEqual(2 * 4096, smq.waiting_bytes)
+            self.assertEqual(names[3], smq.write(b"x").name)
+            smq.restore(str(names[3]))
+
+            self.assertEqual(0, smq.trim())
+            self.assertEqual(2, smq.trim(now=monotonic() + 10))
+            self.assertEqual(0, smq.size_waiting)
+        finally:
+            smq.cleanup()
+
+    def test_prewarm_rounding_backend(self):
+        page_size = 2 * 1024 * 1024
+        with TemporaryDirectory() as root:
+            backend = DirectoryBackend(root, page_size=page_size)
+            smq = SharedMemoryQueue(backend=backend, idle_ttl=0.0)
+            try:
+                self.assertEqual(2, smq.prewarm(64 * 1024, 2))
+                self.assertEqual(0, smq.prewarm(64 * 1024, 2))
+                self.assertEqual({page_size: 2}, smq.waiting_classes)
+                self.assertEqual(2 * page_size, smq.waiting_bytes)
+                self.assertEqual(2, smq.trim())
+                self.assertEqual(0, smq.size_waiting)
+            finally:
+                smq.cleanup()
+
+    @skipIf(get_default_backend().storage_path is None, "No '/dev/shm' directory")
+    def test_trim_free_bytes(self):
+        smq = SharedMemoryQueue(min_free_bytes=2**62)
+        try:
+            smq.restore(str(smq.write(b"x").name))
+            smq.start_trim(interval=0.001)
+            deadline = monotonic() + 10
+            while smq.size_waiting and monotonic() < deadline:
+                sleep(0.001)
+            smq.stop_trim()
+            self.assertFalse(smq.trimming)
+            self.assertEqual(0, smq.size_waiting)
+        finally:
+            smq.cleanup()
+
 
 if __name__ == "__main__":
     main()
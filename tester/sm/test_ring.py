@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from smipc.sm.ring import RingReader, RingWriter
+
+
+class RingTestCase(TestCase):
+    def setUp(self):
+        self.writer = RingWriter(4096)
+        self.reader = RingReader(self.writer.name)
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.close()
+
+    def test_default(self):
+        self.assertIsNone(self.reader.peek())
+        self.assertFalse(self.writer.try_write((b"abc", b"de")))
+
+        record = self.reader.peek()
+        assert record is not None
+        self.assertEqual(b"abcde", bytes(record))
+        self.reader.advance()
+        self.assertIsNone(self.reader.peek())
+        self.assertEqual(0, self.writer.pending)
+
+    def test_wrap(self):
+        payload = bytes(range(256)) * 4
+        for i in range(100):
+            data = payload[: 1 + i * 7 % len(payload)]
+            self.writer.try_write((data,))
+            record = self.reader.peek()
+            assert record is not None
+            self.assertEqual(data, bytes(record))
+            self.reader.advance()
+        self.assertGreater(self.writer.head, self.writer.capacity)
+
+    def test_park(self):
+        self.assertTrue(self.reader.park())
+        self.assertTrue(self.writer.try_write((b"wake",)))
+        self.assertFalse(self.writer.parked)
+
+        # Parking fails while a record is pending.
+        self.assertFalse(self.reader.park())
+        self.assertTrue(self.writer.try_write((b"up",)))
+        self.assertFalse(self.writer.try_write((b"!",)))
+
+    def test_full(self):
+        record = bytes(self.writer.max_record)
+        self.assertIsNotNone(self.writer.try_write((record,)))
+        self.assertIsNotNone(self.writer.try_write((record,)))
+        self.assertIsNone(self.writer.try_write((record,)))
+        self.assertFalse(self.writer.wait_free(len(record), timeout=0.01))
+
+        self.assertIsNotNone(self.reader.peek())
+        self.reader.advance()
+        self.assertTrue(self.writer.wait_free(len(record), timeout=0.01))
+        self.assertIsNotNone(self.writer.try_write((record,)))
+
+    def test_too_large(self):
+        with self.assertRaises(ValueError):
+            self.writer.try_write((bytes(self.writer.max_record + 1),))
+
+
+if __name__ == "__main__":
+    main()
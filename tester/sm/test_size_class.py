@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from smipc.sm.size_class import size_class
+
+
+class SizeClassTestCase(TestCase):
+    def test_default(self):
+        page = 4096
+        self.assertEqual(page, size_class(1, 4, page))
+        self.assertEqual(page, size_class(page, 4, page))
+        self.assertEqual(2 * page, size_class(page + 1, 4, page))
+        self.assertEqual(64 * 1024, size_class(64 * 1024, 4, page))
+        self.assertEqual(80 * 1024, size_class(64 * 1024 + 1, 4, page))
+        self.assertEqual(6 * 1024 * 1024, size_class(1920 * 1080 * 3, 4, page))
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            size_class(0)
+        with self.assertRaises(ValueError):
+            size_class(1, 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+from threading import Event
+from unittest import TestCase, main
+
+from smipc.sm.worker import PeriodicWorker
+
+TEST_WAIT_SECONDS = 10.0
+
+
+class PeriodicWorkerTestCase(TestCase):
+    def test_error(self):
+        calls = list()
+        recovered = Event()
+
+        def _function():
+            calls.append(None)
+            if len(calls) <= 3:
+                raise OSError(28, "No space left on device")
+            recovered.set()
+
+        with self.assertLogs("smipc.sm.worker", "WARNING"):
+            worker = PeriodicWorker(_function, 0.001, "test", max_backoff=0.004)
+            try:
+                self.assertTrue(recovered.wait(TEST_WAIT_SECONDS))
+                self.assertTrue(worker.alive)
+                self.assertEqual(3, worker.error_count)
+                self.assertIsInstance(worker.last_error, OSError)
+            finally:
+                worker.stop()
+        self.assertEqual(0, worker.failures)
+        self.assertFalse(worker.alive)
+
+    def test_backoff(self):
+        worker = PeriodicWorker(lambda: None, 1.0, "test", max_backoff=5.0)
+        worker.stop()
+        self.assertEqual(1.0, worker.delay)
+        worker._failures = 1
+        self.assertEqual(2.0, worker.delay)
+        worker._failures = 10
+        self.assertEqual(5.0, worker.delay)
+
+
+if __name__ == "__main__":
+    main()
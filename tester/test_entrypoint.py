@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 
+import os
 from contextlib import redirect_stdout
 from io import StringIO
+from tempfile import TemporaryDirectory
 from unittest import TestCase, main
 
 from smipc.arguments import version
@@ -20,6 +22,22 @@ class EntrypointTestCase(TestCase):
         self.assertEqual(0, code)
         self.assertEqual(version(), buffer.getvalue().strip())
 
+    def test_gc(self):
+        with TemporaryDirectory() as root, TemporaryDirectory() as storage:
+            orphan = os.path.join(storage, "smipc_999999999_tag_0000")
+            with open(orphan, "wb") as f:
+                f.write(b"x")
+
+            lines = list()
+            cmdline = ["--root-dir", root, "gc", "--storage", storage]
+            self.assertEqual(0, entrypoint_main([*cmdline, "--dry-run"], lines.append))
+            self.assertIn(f"Would remove '{orphan}'", lines)
+            self.assertTrue(os.path.exists(orphan))
+
+            self.assertEqual(0, entrypoint_main(cmdline, lines.append))
+            self.assertIn(f"Removed '{orphan}'", lines)
+            self.assertFalse(os.path.exists(orphan))
+
 
 if __name__ == "__main__":
     main()